@@ -0,0 +1,68 @@
+"""
+Microbenchmark of vsdkx.core.util.model.box_sanity_check against the per box
+loop it replaced. Run it from the repository root with
+
+    python -m benchmarks.box_sanity_check
+"""
+import timeit
+
+import numpy as np
+
+from vsdkx.core.util.model import box_sanity_check
+
+WIDTH = 1920
+HEIGHT = 1080
+
+
+def loop_box_sanity_check(boxes, width, height):
+    sanitized_boxes = []
+
+    for box in boxes:
+        xmin = max(0, int(box[0]))
+        ymin = max(0, int(box[1]))
+        xmax = min(width, int(box[2]))
+        ymax = min(height, int(box[3]))
+
+        if xmin >= xmax:
+            xmax = min(xmin + 10, width)
+        if ymin >= ymax:
+            ymax = min(ymin + 10, height)
+
+        sanitized_boxes.append(np.array([xmin, ymin, xmax, ymax]))
+
+    return sanitized_boxes
+
+
+def random_boxes(count, seed=0):
+    rng = np.random.default_rng(seed)
+    low = rng.uniform(-50, [WIDTH, HEIGHT], size=(count, 2))
+    size = rng.uniform(-20, 300, size=(count, 2))
+    return np.hstack([low, low + size]).astype(np.float32)
+
+
+def main():
+    print(f"{'boxes':>8} {'loop (us)':>12} {'vectorized (us)':>16} "
+          f"{'inplace (us)':>13} {'speedup':>8}")
+    for count in (10, 1000, 100000):
+        boxes = random_boxes(count)
+        assert np.array_equal(
+            np.array(loop_box_sanity_check(boxes, WIDTH, HEIGHT),
+                     dtype=np.int32).reshape(-1, 4),
+            box_sanity_check(boxes, WIDTH, HEIGHT))
+        number = max(1, 100000 // count)
+        loop = min(timeit.repeat(
+            lambda: loop_box_sanity_check(boxes, WIDTH, HEIGHT),
+            number=number, repeat=5)) / number
+        vectorized = min(timeit.repeat(
+            lambda: box_sanity_check(boxes, WIDTH, HEIGHT),
+            number=number, repeat=5)) / number
+        int_boxes = boxes.astype(np.int32)
+        inplace = min(timeit.repeat(
+            lambda: box_sanity_check(int_boxes, WIDTH, HEIGHT, inplace=True),
+            number=number, repeat=5)) / number
+        print(f"{count:>8} {loop * 1e6:>12.1f} {vectorized * 1e6:>16.1f} "
+              f"{inplace * 1e6:>13.1f} {loop / vectorized:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Compare two result files of benchmarks/pipeline.py
+
+    python -m benchmarks.compare before.json after.json --threshold 0.1
+
+Exits with status 1 if any case got slower than the threshold.
+"""
+import argparse
+import json
+
+
+def _key(result: dict) -> str:
+    return f"{result['name']} {json.dumps(result['params'], sort_keys=True)}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("baseline", type=str, help="results to compare to")
+    parser.add_argument("current", type=str, help="results to check")
+    parser.add_argument("--metric", type=str, default="mean",
+                        help="metric to compare, lower is better")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="relative slowdown to report as a regression")
+    args = parser.parse_args()
+
+    with open(args.baseline) as baseline_file:
+        baseline = {_key(result): result
+                    for result in json.load(baseline_file)["results"]}
+    with open(args.current) as current_file:
+        current = json.load(current_file)["results"]
+
+    regressions = 0
+    for result in current:
+        key = _key(result)
+        if key not in baseline:
+            print(f"{key:<70} new")
+            continue
+        before = baseline[key]["metrics"][args.metric]
+        after = result["metrics"][args.metric]
+        change = (after - before) / before if before else 0.0
+        marker = ""
+        if change > args.threshold:
+            marker = "REGRESSION"
+            regressions += 1
+        print(f"{key:<70} {before * 1e6:>10.1f} -> {after * 1e6:>10.1f} us "
+              f"{change:+8.1%} {marker}")
+    raise SystemExit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Configurable model driver and addon for benchmarking the detector without a
+real model. Their latency is spent sleeping, so it doesn't compete with the
+measured overhead for the CPU.
+"""
+import time
+
+import numpy as np
+
+from vsdkx.core.interfaces import ModelDriver, Addon
+from vsdkx.core.structs import Inference, AddonObject, FrameObject
+
+
+def _random_boxes(rng: np.random.Generator, count: int, width: int,
+                  height: int) -> np.ndarray:
+    low = rng.uniform(0, [width, height], size=(count, 2))
+    size = rng.uniform(5, 200, size=(count, 2))
+    return np.hstack([low, low + size]).astype(np.float32)
+
+
+class FakeModelDriver(ModelDriver):
+    """
+    Model driver which emits random boxes
+
+    Settings:
+        boxes (int): number of boxes of each inference
+        latency (float): seconds each inference takes
+        batch_latency (float): seconds each inference_batch call takes on
+        top of latency for each frame in it, by default latency
+        seed (int): seed of the random boxes
+    """
+
+    def __init__(self, model_settings: dict, model_config: dict,
+                 drawing_config: dict):
+        self._boxes = model_settings.get("boxes", 10)
+        self._latency = model_settings.get("latency", 0.0)
+        self._batch_latency = model_settings.get("batch_latency",
+                                                 self._latency)
+        self._rng = np.random.default_rng(model_settings.get("seed", 0))
+        self._cache = {}
+
+    def _inference(self, frame: FrameObject) -> Inference:
+        # the arrays are generated once per frame size, so the driver itself
+        # costs next to nothing besides its latency
+        height, width = frame.frame.shape[:2]
+        if (width, height) not in self._cache:
+            self._cache[(width, height)] = (
+                _random_boxes(self._rng, self._boxes, width, height),
+                self._rng.integers(0, 80, size=(self._boxes, 1),
+                                   dtype=np.int32),
+                self._rng.uniform(0, 1, size=self._boxes).astype(np.float32))
+        boxes, classes, scores = self._cache[(width, height)]
+        return Inference(boxes=boxes, classes=classes, scores=scores)
+
+    def inference(self, frame: FrameObject) -> Inference:
+        if self._latency:
+            time.sleep(self._latency)
+        return self._inference(frame)
+
+    def inference_batch(self, frames):
+        if self._batch_latency:
+            time.sleep(self._batch_latency)
+        return [self._inference(frame) for frame in frames]
+
+
+class FakeAddon(Addon):
+    """
+    Addon which spends some time and stores the number of boxes it saw
+
+    Settings:
+        latency (float): seconds each post_process takes
+        key (str): key in shared to store the number of boxes in
+    """
+
+    def __init__(self, addon_config: dict, model_settings: dict,
+                 model_config: dict, drawing_config: dict):
+        self._latency = addon_config.get("latency", 0.0)
+        self._key = addon_config.get("key", "boxes")
+        self.reads = {"inference"}
+        self.writes = {f"shared.{self._key}"}
+
+    def post_process(self, addon_object: AddonObject) -> AddonObject:
+        if self._latency:
+            time.sleep(self._latency)
+        addon_object.shared[self._key] = len(addon_object.inference.boxes)
+        return addon_object
@@ -0,0 +1,240 @@
+"""
+Benchmark suite of the detector pipeline. It runs EventDetector with
+benchmarks.fakes, box_sanity_check and the drawing utilities over a grid of
+frame sizes, box counts and addon counts and writes machine readable results
+that can be compared between runs with benchmarks/compare.py.
+
+    python -m benchmarks.pipeline --output before.json
+    python -m benchmarks.pipeline --output after.json
+    python -m benchmarks.compare before.json after.json
+"""
+import argparse
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from vsdkx.core.detector import EventDetector
+from vsdkx.core.util.drawing import Renderer, draw_boxes, draw_zones
+from vsdkx.core.util.model import box_sanity_check
+
+
+def _sizes(value: str):
+    # "480x640,1080x1920" to [(480, 640), (1080, 1920)]
+    return [tuple(int(side) for side in size.split("x"))
+            for size in value.split(",")]
+
+
+def _ints(value: str):
+    return [int(item) for item in value.split(",")]
+
+
+def _timings(function, repeat: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        function()
+    durations = np.empty(repeat)
+    for index in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations[index] = time.perf_counter() - start
+    return {"mean": float(durations.mean()),
+            "p50": float(np.quantile(durations, 0.5)),
+            "p95": float(np.quantile(durations, 0.95)),
+            "throughput": float(1 / durations.mean())}
+
+
+def _allocated(function, repeat: int) -> float:
+    # peak of python and numpy allocations during one call, on average
+    tracemalloc.start()
+    peaks = []
+    for _ in range(repeat):
+        tracemalloc.reset_peak()
+        function()
+        peaks.append(tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+    return float(np.mean(peaks))
+
+
+def _frame(size) -> np.ndarray:
+    height, width = size
+    return np.random.default_rng(0).integers(0, 255, (height, width, 3),
+                                             dtype=np.uint8)
+
+
+def bench_detect(args) -> list:
+    results = []
+    for size in args.frame_sizes:
+        frame = _frame(size)
+        for boxes in args.boxes:
+            for addons in args.addons:
+                config = {
+                    "model": {"class": "benchmarks.fakes.FakeModelDriver",
+                              "settings": {"boxes": boxes,
+                                           "latency": args.latency}},
+                    "addons": {f"addon{index}": {
+                        "class": "benchmarks.fakes.FakeAddon",
+                        "key": f"addon{index}",
+                        "latency": args.addon_latency}
+                        for index in range(addons)},
+                }
+                detector = EventDetector(config)
+                metrics = _timings(lambda: detector.detect(frame, {}),
+                                   args.frames, args.warmup)
+                metrics["overhead"] = metrics["mean"] - args.latency \
+                    - addons * args.addon_latency
+                metrics["allocated"] = _allocated(
+                    lambda: detector.detect(frame, {}),
+                    min(args.frames, 20))
+                detector.close()
+                results.append({"name": "detect",
+                                "params": {"frame": "x".join(map(str, size)),
+                                           "boxes": boxes,
+                                           "addons": addons},
+                                "metrics": metrics})
+    return results
+
+
+def bench_detect_batch(args) -> list:
+    results = []
+    size = args.frame_sizes[0]
+    frame = _frame(size)
+    for batch in args.batch_sizes:
+        detector = EventDetector({
+            "model": {"class": "benchmarks.fakes.FakeModelDriver",
+                      "settings": {"boxes": args.boxes[0],
+                                   "latency": args.latency}}})
+        frames = [frame] * batch
+        metrics = _timings(lambda: detector.detect_batch(frames),
+                           max(1, args.frames // batch), args.warmup)
+        metrics["throughput"] *= batch
+        detector.close()
+        results.append({"name": "detect_batch",
+                        "params": {"frame": "x".join(map(str, size)),
+                                   "batch": batch},
+                        "metrics": metrics})
+    return results
+
+
+def bench_box_sanity_check(args) -> list:
+    results = []
+    height, width = args.frame_sizes[0]
+    rng = np.random.default_rng(0)
+    for count in args.boxes:
+        low = rng.uniform(-50, [width, height], size=(count, 2))
+        boxes = np.hstack([low, low + rng.uniform(-20, 300, (count, 2))])
+        metrics = _timings(lambda: box_sanity_check(boxes, width, height),
+                           args.frames, args.warmup)
+        results.append({"name": "box_sanity_check",
+                        "params": {"boxes": count},
+                        "metrics": metrics})
+    return results
+
+
+def bench_drawing(args) -> list:
+    results = []
+    drawing_config = {"zones": [[[10, 10], [200, 10], [200, 200], [10, 200]],
+                                [[300, 300], [400, 300], [350, 400]]]}
+    for size in args.frame_sizes:
+        frame = _frame(size)
+        height, width = size
+        rng = np.random.default_rng(0)
+        for count in args.boxes:
+            # frames smaller than 100 pixels still get boxes at the origin
+            low = rng.uniform(0, [max(width - 100, 1), max(height - 100, 1)],
+                              (count, 2))
+            boxes = np.hstack([low, low + 50]).astype(np.int32)
+            scores = rng.uniform(0, 1, count).astype(np.float32)
+            classes = np.zeros((count, 1), dtype=np.int32)
+
+            def draw():
+                draw_zones(drawing_config, frame)
+                draw_boxes(drawing_config, frame, boxes, scores, classes)
+
+            results.append({"name": "drawing",
+                            "params": {"frame": "x".join(map(str, size)),
+                                       "boxes": count},
+                            "metrics": _timings(draw, args.frames,
+                                                args.warmup)})
+
+            # unchanged boxes, so the cached layer is only composed
+            renderer = Renderer({**drawing_config, "overlay": True})
+            results.append({"name": "drawing_overlay",
+                            "params": {"frame": "x".join(map(str, size)),
+                                       "boxes": count},
+                            "metrics": _timings(
+                                lambda: renderer.render(frame, boxes, scores,
+                                                        classes),
+                                args.frames, args.warmup)})
+    return results
+
+
+BENCHMARKS = {
+    "detect": bench_detect,
+    "detect_batch": bench_detect_batch,
+    "box_sanity_check": bench_box_sanity_check,
+    "drawing": bench_drawing,
+}
+
+
+def _meta() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"],
+                                capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": commit,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "opencv": cv2.__version__,
+            "machine": platform.machine(),
+            "processor": platform.processor()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--only", type=str, nargs="+",
+                        choices=sorted(BENCHMARKS),
+                        help="benchmarks to run, by default all")
+    parser.add_argument("--frame-sizes", type=_sizes,
+                        default=[(480, 640), (1080, 1920)],
+                        help="comma separated HEIGHTxWIDTH frame sizes")
+    parser.add_argument("--boxes", type=_ints, default=[10, 100, 1000],
+                        help="comma separated numbers of boxes")
+    parser.add_argument("--addons", type=_ints, default=[0, 1, 8],
+                        help="comma separated numbers of addons")
+    parser.add_argument("--batch-sizes", type=_ints, default=[1, 8, 16],
+                        help="comma separated batch sizes for detect_batch")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="seconds each fake inference takes")
+    parser.add_argument("--addon-latency", type=float, default=0.0,
+                        help="seconds each fake addon takes")
+    parser.add_argument("--frames", type=int, default=200,
+                        help="measured calls of each case")
+    parser.add_argument("--warmup", type=int, default=10,
+                        help="calls before measuring each case")
+    parser.add_argument("--output", type=str,
+                        help="path of the JSON results, printed if missing")
+    args = parser.parse_args()
+
+    results = []
+    for name in args.only or BENCHMARKS:
+        for result in BENCHMARKS[name](args):
+            print(f"{result['name']:<18} {json.dumps(result['params']):<48} "
+                  f"{result['metrics']['mean'] * 1e6:>12.1f} us")
+            results.append(result)
+    report = {"meta": _meta(), "results": results}
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Deterministic model driver and addons for the tests
+"""
+import asyncio
+import os
+import time
+
+import numpy as np
+
+from vsdkx.core.interfaces import ModelDriver, Addon
+from vsdkx.core.structs import Inference, AddonObject, FrameObject
+
+
+class RecordingDriver(ModelDriver):
+    """
+    Model driver which finds one box at the top left quarter of every frame
+    and records the frames and batches it was called with. The score is the
+    mean of the frame divided by 255, so different frames give different
+    results.
+    """
+
+    def __init__(self, model_settings: dict, model_config: dict,
+                 drawing_config: dict):
+        self.shapes = []
+        self.batches = []
+
+    def inference(self, frame: FrameObject) -> Inference:
+        self.shapes.append(frame.frame.shape)
+        height, width = frame.frame.shape[:2]
+        return Inference(boxes=[[0, 0, width // 2, height // 2]],
+                         classes=[[1]],
+                         scores=[float(frame.frame.mean()) / 255])
+
+    def inference_batch(self, frames):
+        self.batches.append(len(frames))
+        return [self.inference(frame) for frame in frames]
+
+
+class CountingAddon(Addon):
+    """
+    Addon which counts the frames it post processed in shared["count"]
+    """
+
+    def __init__(self, addon_config: dict, model_settings: dict,
+                 model_config: dict, drawing_config: dict):
+        self.count = 0
+
+    def post_process(self, addon_object: AddonObject) -> AddonObject:
+        self.count += 1
+        addon_object.shared["count"] = self.count
+        return addon_object
+
+
+class ExtraAddon(Addon):
+    """
+    Independent addon which writes the number of boxes, the number of frames
+    it post processed and its process id to inference.extra[key], key is
+    taken from the addon config
+    """
+
+    independent = True
+    reads = {"inference"}
+
+    def __init__(self, addon_config: dict, model_settings: dict,
+                 model_config: dict, drawing_config: dict):
+        self.key = addon_config.get("key", "extra")
+        self.writes = {f"extra.{self.key}"}
+        self.count = 0
+
+    def post_process(self, addon_object: AddonObject) -> AddonObject:
+        self.count += 1
+        addon_object.inference.extra[self.key] = [
+            len(addon_object.inference.boxes), self.count, os.getpid()]
+        return addon_object
+
+
+class HistoryAddon(Addon):
+    """
+    Independent addon which appends the number of frames it post processed
+    to the list in shared["history"], changing the list in place
+    """
+
+    independent = True
+    reads = {"shared.history"}
+    writes = {"shared.history"}
+
+    def __init__(self, addon_config: dict, model_settings: dict,
+                 model_config: dict, drawing_config: dict):
+        self.count = 0
+
+    def post_process(self, addon_object: AddonObject) -> AddonObject:
+        self.count += 1
+        addon_object.shared["history"].append(self.count)
+        return addon_object
+
+
+def config(**sections) -> dict:
+    """
+    System config with RecordingDriver, sections are merged into the model
+    section when their key is model and added otherwise
+    """
+    system_config = {"model": {"class": "tests.fakes.RecordingDriver"}}
+    for key, value in sections.items():
+        if key == "model":
+            system_config["model"].update(value)
+        else:
+            system_config[key] = value
+    return system_config
+
+
+def frame(value: int = 0, shape=(48, 64, 3)) -> np.ndarray:
+    return np.full(shape, value, dtype=np.uint8)
+
+
+class AsyncDriver(RecordingDriver):
+    """
+    RecordingDriver with a coroutine inference which takes latency seconds
+    """
+
+    def __init__(self, model_settings: dict, model_config: dict,
+                 drawing_config: dict):
+        super().__init__(model_settings, model_config, drawing_config)
+        self.latency = model_settings.get("latency", 0.0)
+
+    async def inference(self, frame: FrameObject) -> Inference:
+        await asyncio.sleep(self.latency)
+        return super().inference(frame)
+
+
+class SlowDriver(RecordingDriver):
+    """
+    RecordingDriver whose blocking inference takes latency seconds
+    """
+
+    def __init__(self, model_settings: dict, model_config: dict,
+                 drawing_config: dict):
+        super().__init__(model_settings, model_config, drawing_config)
+        self.latency = model_settings.get("latency", 0.0)
+
+    def inference(self, frame: FrameObject) -> Inference:
+        time.sleep(self.latency)
+        return super().inference(frame)
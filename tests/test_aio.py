@@ -0,0 +1,81 @@
+import asyncio
+import time
+
+from vsdkx.core.aio import AsyncEventDetector
+from vsdkx.core.detector import EventDetector
+from tests.fakes import config, frame
+
+
+def test_frames_without_stream_run_concurrently():
+    detector = EventDetector(config(
+        model={"class": "tests.fakes.SlowDriver",
+               "settings": {"latency": 0.2}}))
+    front = AsyncEventDetector(detector, max_concurrency=4)
+    try:
+        start = time.monotonic()
+        inferences = asyncio.run(
+            front.detect_many([frame(value) for value in range(4)]))
+        assert time.monotonic() - start < 0.6
+        assert len(inferences) == 4
+    finally:
+        front.close()
+        detector.close()
+
+
+def test_frames_of_a_stream_keep_their_order():
+    detector = EventDetector(config(
+        addons={"count": {"class": "tests.fakes.CountingAddon"}}))
+    front = AsyncEventDetector(detector, max_concurrency=4)
+
+    async def detect():
+        metadatas = [{} for _ in range(5)]
+        await asyncio.gather(*[front.detect(frame(), metadata, "camera")
+                               for metadata in metadatas])
+        return [metadata["count"] for metadata in metadatas]
+
+    try:
+        assert asyncio.run(detect()) == [1, 2, 3, 4, 5]
+    finally:
+        front.close()
+        detector.close()
+
+
+def test_coroutine_driver_uses_scheduler_and_cache():
+    detector = EventDetector(config(
+        model={"class": "tests.fakes.AsyncDriver",
+               "skip": {"mode": "stride", "stride": 2},
+               "cache": True}))
+    front = AsyncEventDetector(detector)
+
+    async def detect():
+        for value in (1, 1, 2, 2, 1):
+            await front.detect(frame(value), stream="camera")
+
+    try:
+        asyncio.run(detect())
+        # frames 2 and 4 are skipped, frame 5 is a cache hit
+        assert detector.scheduler.frames_skipped == 2
+        assert detector.cache.stats()["hits"] == 1
+        assert len(detector.model_driver.shapes) == 2
+    finally:
+        front.close()
+        detector.close()
+
+
+def test_coroutine_driver_matches_the_blocking_one_with_roi():
+    zones = [[[10, 5], [20, 5], [20, 15]], [[40, 30], [50, 30], [50, 40]]]
+    results = []
+    for driver in ("RecordingDriver", "AsyncDriver"):
+        detector = EventDetector(config(
+            model={"class": f"tests.fakes.{driver}",
+                   "roi": {"mode": "tiles"}},
+            drawing={"zones": zones}))
+        front = AsyncEventDetector(detector)
+        try:
+            inference = asyncio.run(front.detect(frame(), {}))
+            results.append((inference, detector.model_driver.shapes))
+        finally:
+            front.close()
+            detector.close()
+    assert results[0] == results[1]
+    assert len(results[0][1]) == 2
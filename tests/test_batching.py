@@ -0,0 +1,75 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from vsdkx.core.batching import BatchingEventDetector, Overloaded, \
+    RequestBatcher
+from vsdkx.core.detector import EventDetector
+from tests.fakes import config, frame
+
+
+def test_batches_concurrent_requests():
+    detector = BatchingEventDetector(config(
+        server={"batching": {"max_batch_size": 4, "max_wait_ms": 50}}))
+    try:
+        frames = [frame(value) for value in range(8)]
+        with ThreadPoolExecutor(8) as executor:
+            inferences = list(executor.map(detector.detect, frames))
+        assert [round(float(inference.scores[0]) * 255)
+                for inference in inferences] == list(range(8))
+        assert max(detector.model_driver.batches) > 1
+        assert max(detector.model_driver.batches) <= 4
+    finally:
+        detector.close()
+
+
+def test_warmup_without_batcher():
+    detector = BatchingEventDetector(config(
+        model={"warmup": {"shapes": [[16, 16, 3]], "frames": 2}},
+        server={"batching": {"max_batch_size": 2}}))
+    try:
+        assert detector.ready
+        assert detector.batcher is not None
+        assert len(detector.model_driver.shapes) == 2
+    finally:
+        detector.close()
+
+
+def test_without_section_detects_directly():
+    detector = BatchingEventDetector(config())
+    try:
+        assert detector.batcher is None
+        assert len(detector.detect(frame()).boxes) == 1
+    finally:
+        detector.close()
+
+
+def test_rejects_when_queue_is_full():
+    detector = EventDetector(config())
+    batcher = RequestBatcher(detector, max_batch_size=1, max_wait_ms=0,
+                             max_queue=1)
+    try:
+        with batcher._condition:
+            # the batching thread can't take requests while this is held
+            batcher._queue.append(object())
+            with pytest.raises(Overloaded):
+                batcher._admit()
+            batcher._queue.clear()
+        assert batcher.rejected == 1
+    finally:
+        batcher.close()
+        detector.close()
+
+
+def test_sheds_expired_requests():
+    detector = EventDetector(config())
+    batcher = RequestBatcher(detector, max_batch_size=8, max_wait_ms=100,
+                             deadline_ms=1)
+    try:
+        future = batcher.submit(frame())
+        with pytest.raises(Overloaded):
+            future.result()
+        assert batcher.shed == 1
+    finally:
+        batcher.close()
+        detector.close()
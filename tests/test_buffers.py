@@ -0,0 +1,59 @@
+import cv2
+import numpy as np
+
+from vsdkx.core.capture import open_capture
+from vsdkx.core.detector import EventDetector
+from vsdkx.core.pipeline import VideoPipeline
+from vsdkx.core.util.buffers import BufferPool
+from tests.fakes import config, frame
+
+
+def _video(path: str, frames: int) -> str:
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 10,
+                             (64, 48))
+    for index in range(frames):
+        writer.write(frame(index * 20))
+    writer.release()
+    return path
+
+
+def _run(video: str, buffer_pool):
+    detector = EventDetector(config())
+    kept = []
+    capture = open_capture(video, {"reuse_frames": True})
+    try:
+        VideoPipeline(detector, capture,
+                      lambda image, inference: kept.append(image),
+                      queue_size=1, buffer_pool=buffer_pool).run()
+    finally:
+        capture.release()
+        detector.close()
+    return kept
+
+
+def test_pool_reuses_arrays():
+    pool = BufferPool(max_per_key=1)
+    array = pool.acquire((2, 3))
+    pool.release(array)
+    assert pool.acquire((2, 3)) is array
+    assert pool.acquire((2, 3), np.float32) is not array
+    pool.release(np.empty((2, 3)))
+    pool.release(np.empty((2, 3)))
+    assert pool.allocated == 2 and pool.reused == 1
+
+
+def test_frames_are_kept_without_reuse(tmp_path):
+    video = _video(str(tmp_path / "a.avi"), 6)
+    kept = _run(video, None)
+    assert len(kept) == 6
+    assert len({id(image) for image in kept}) == 6
+    assert [round(image.mean() / 20) for image in kept] == list(range(6))
+
+
+def test_frames_are_overwritten_with_reuse(tmp_path):
+    video = _video(str(tmp_path / "a.avi"), 6)
+    pool = BufferPool()
+    kept = _run(video, pool)
+    assert len(kept) == 6
+    assert pool.reused > 0
+    assert len({id(image) for image in kept}) < 6
@@ -0,0 +1,93 @@
+import json
+import logging
+
+import cv2
+import pytest
+
+from vsdkx.core import bulk
+from vsdkx.core.bulk import BulkRunner, Task, collect_inputs, plan_tasks
+from vsdkx.core.detector import EventDetector
+from vsdkx.core.sinks import JSONLinesSink
+from tests.fakes import config, frame
+
+
+def _video(path: str, frames: int) -> str:
+    # the value of frame i is 8 * i, so the scores tell the frames apart
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 10,
+                             (64, 48))
+    for index in range(frames):
+        writer.write(frame(index * 8))
+    writer.release()
+    return path
+
+
+def _frames(results):
+    return [(index, round(float(inference.scores[0]) * 255 / 8))
+            for _, index, inference in results]
+
+
+@pytest.fixture
+def worker():
+    bulk._init_worker(config(), {})
+    yield
+    bulk._detector.close()
+    bulk._detector = None
+    bulk._capture_config = {}
+
+
+def test_collect_inputs(tmp_path):
+    (tmp_path / "clips").mkdir()
+    for name in ("clips/a.mp4", "clips/b.txt", "c.jpg", "d.png"):
+        (tmp_path / name).write_bytes(b"")
+    manifest = tmp_path / "list.txt"
+    manifest.write_text("# images\nc.jpg\n\nclips/a.mp4\n")
+    assert collect_inputs([str(tmp_path / "clips"), str(tmp_path / "*.png"),
+                           str(manifest)]) == \
+        [str(tmp_path / name) for name in ("c.jpg", "clips/a.mp4", "d.png")]
+
+
+def test_plan_tasks(tmp_path):
+    video = _video(str(tmp_path / "a.avi"), 10)
+    tasks = plan_tasks([video, str(tmp_path / "b.jpg")], segment_frames=4)
+    assert [task.id for task in tasks] == \
+        [f"{video}#0-4", f"{video}#4-8", f"{video}#8-",
+         str(tmp_path / "b.jpg")]
+    assert [task.id for task in plan_tasks([video], 10)] == [video]
+
+
+def test_segments_are_numbered_by_the_capture(tmp_path, worker):
+    video = _video(str(tmp_path / "a.avi"), 10)
+    task_id, results, error = bulk._run_task(Task(video, 4, 8))
+    assert error is None and task_id == f"{video}#4-8"
+    assert _frames(results) == [(index, index) for index in range(4, 8)]
+    bulk._capture_config = {"skip": 2}
+    _, results, _ = bulk._run_task(Task(video, 3))
+    assert _frames(results) == [(5, 5), (8, 8)]
+
+
+def test_worker_config_logs_dropped_settings(caplog):
+    system_config = config(model={"cache": {"path": "cache.bin"}},
+                           metrics={"enabled": True, "port": 9100})
+    with caplog.at_level(logging.WARNING, logger=bulk.LOG_TAG):
+        worker_config = bulk._worker_config(system_config)
+    assert "port" not in worker_config["metrics"]
+    assert "path" not in worker_config["model"]["cache"]
+    assert system_config["metrics"]["port"] == 9100
+    assert len(caplog.records) == 2
+
+
+def test_resume_skips_finished_tasks(tmp_path):
+    videos = [_video(str(tmp_path / f"{name}.avi"), 6) for name in "ab"]
+    checkpoint = str(tmp_path / "bulk.done")
+    output = tmp_path / "results.jsonl"
+    with JSONLinesSink(str(output)) as sink:
+        summary = BulkRunner(config(), videos[:1], sink, workers=2,
+                             segment_frames=4, checkpoint=checkpoint).run()
+    assert summary["done"] == 2 and summary["frames"] == 6
+    with JSONLinesSink(str(output)) as sink:
+        summary = BulkRunner(config(), videos, sink, workers=2,
+                             segment_frames=4, checkpoint=checkpoint).run()
+    assert summary["skipped"] == 2 and summary["done"] == 2
+    rows = [json.loads(line) for line in output.read_text().splitlines()]
+    assert sorted((row["stream"], row["frame"]) for row in rows) == \
+        sorted((video, index) for video in videos for index in range(6))
@@ -0,0 +1,93 @@
+import numpy as np
+
+from vsdkx.core.cache import ResultCache
+from vsdkx.core.detector import EventDetector
+from vsdkx.core.structs import Inference
+from tests.fakes import config, frame
+
+
+def _inference(count: int = 2) -> Inference:
+    return Inference(boxes=np.zeros((count, 4)),
+                     classes=np.zeros(count, dtype=np.int32),
+                     scores=np.zeros(count))
+
+
+def test_hit_returns_writable_copy():
+    cache = ResultCache()
+    key = cache.key(frame(1))
+    assert cache.get(key) is None
+    cache.put(key, _inference())
+    cached = cache.get(cache.key(frame(1)))
+    assert len(cached.boxes) == 2 and cached.boxes.flags.writeable
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_key_depends_on_frame_and_fingerprint():
+    assert ResultCache.key(frame(1)) != ResultCache.key(frame(2))
+    assert ResultCache.key(frame(1), b"a") != ResultCache.key(frame(1), b"b")
+    assert ResultCache.key(frame(1, (4, 4, 3))) \
+        != ResultCache.key(frame(1, (4, 3, 4)))
+
+
+def test_evicts_least_recently_used():
+    cache = ResultCache(max_entries=2)
+    keys = [bytes([index]) * 16 for index in range(3)]
+    cache.put(keys[0], _inference())
+    cache.put(keys[1], _inference())
+    cache.get(keys[0])
+    cache.put(keys[2], _inference())
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_evicts_by_bytes():
+    cache = ResultCache(max_bytes=300)
+    for index in range(5):
+        cache.put(bytes([index]) * 16, _inference())
+    assert cache.stats()["bytes"] <= 300
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "cache.bin")
+    cache = ResultCache(path=path)
+    cache.put(b"k" * 16, _inference(3))
+    cache.close()
+    # an entry cut off while writing is dropped
+    with open(path, "ab") as file:
+        file.write(b"partial")
+    cache = ResultCache(path=path)
+    assert len(cache.get(b"k" * 16).boxes) == 3
+    assert cache.stats()["disk_hits"] == 1
+    cache.close()
+
+
+def test_detector_skips_model_for_cached_frames():
+    detector = EventDetector(config(model={"cache": True}))
+    try:
+        first = detector.detect(frame(1))
+        second = detector.detect(frame(1))
+        assert len(detector.model_driver.shapes) == 1
+        assert np.array_equal(first.boxes, second.boxes)
+        detector.detect_batch([frame(1), frame(2)])
+        assert detector.model_driver.batches == [1]
+    finally:
+        detector.close()
+
+
+def test_zone_change_invalidates_cache():
+    system_config = config(model={"cache": True, "roi": {"margin": 0}},
+                           drawing={"zones": [[[10, 10], [30, 10],
+                                               [30, 20], [10, 20]]]})
+    detector = EventDetector(system_config)
+    try:
+        detector.detect(frame(1))
+        system_config = config(model={"cache": True, "roi": {"margin": 0}},
+                               drawing={"zones": [[[0, 0], [20, 0],
+                                                   [20, 20], [0, 20]]]})
+        detector.update_config(system_config)
+        boxes = detector.detect(frame(1)).boxes
+        assert len(detector.model_driver.shapes) == 2
+        assert boxes[0].tolist() == [0, 0, 10, 10]
+    finally:
+        detector.close()
@@ -0,0 +1,67 @@
+import cv2
+import pytest
+
+from vsdkx.core.capture import OpenCVCapture, open_capture
+from tests.fakes import frame
+
+
+@pytest.fixture
+def video(tmp_path) -> str:
+    # frame i has the value 40 * i, so the frames tell which one was read
+    path = str(tmp_path / "video.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 10,
+                             (64, 48))
+    for value in range(6):
+        writer.write(frame(value * 40))
+    writer.release()
+    return path
+
+
+def _values(capture) -> list:
+    values = []
+    while True:
+        status, image = capture.read()
+        if not status:
+            break
+        values.append(round(image.mean() / 40))
+    capture.release()
+    return values
+
+
+def test_skip_and_seek(video):
+    assert _values(OpenCVCapture(video)) == [0, 1, 2, 3, 4, 5]
+    assert _values(OpenCVCapture(video, skip=1)) == [1, 3, 5]
+    capture = OpenCVCapture(video)
+    capture.seek(4)
+    assert capture.get(cv2.CAP_PROP_POS_FRAMES) == 4
+    assert _values(capture) == [4, 5]
+
+
+def test_scale_reads_into_the_given_image(video):
+    capture = OpenCVCapture(video, scale=0.5)
+    try:
+        status, image = capture.read()
+        assert status and image.shape == (24, 32, 3)
+        status, second = capture.read(image)
+        assert second is image
+        assert round(second.mean() / 40) == 1
+    finally:
+        capture.release()
+
+
+def test_open_capture_validates_the_config(video):
+    capture = open_capture(video, {"backend": "opencv", "scale": 0.5,
+                                   "reuse_frames": True})
+    try:
+        assert isinstance(capture, OpenCVCapture) and capture.isOpened()
+        assert capture.scale == 0.5
+    finally:
+        capture.release()
+    with pytest.raises(ValueError):
+        open_capture(video, {"backend": "gpu"})
+    with pytest.raises(ValueError):
+        open_capture(video, {"api": "directx"})
+    with pytest.raises(ValueError):
+        open_capture(video, {"skip": -1})
+    with pytest.raises(TypeError):
+        open_capture(video, {"frames": 3})
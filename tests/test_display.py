@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import cv2
+
+from vsdkx.core.display import DebugDisplay
+from tests.fakes import frame
+
+
+def _frame_count(path: str) -> int:
+    capture = cv2.VideoCapture(path)
+    count = 0
+    while capture.read()[0]:
+        count += 1
+    capture.release()
+    return count
+
+
+def test_video_is_finished_on_close(tmp_path):
+    path = str(tmp_path / "debug.avi")
+    display = DebugDisplay("video", path, fps=1000, fourcc="MJPG")
+    for value in range(3):
+        display.show(frame(value))
+    display.close()
+    assert _frame_count(path) == display.frames_shown > 0
+
+
+def test_video_is_finished_at_exit(tmp_path):
+    path = str(tmp_path / "debug.avi")
+    script = textwrap.dedent(f"""
+        from vsdkx.core.display import DebugDisplay
+        from tests.fakes import frame
+        display = DebugDisplay("video", {path!r}, fps=1000, fourcc="MJPG")
+        display.show(frame())
+    """)
+    subprocess.run([sys.executable, "-c", script], check=True,
+                   cwd=os.path.dirname(os.path.dirname(__file__)))
+    assert _frame_count(path) == 1
+
+
+def test_mjpeg_appends_jpegs(tmp_path):
+    path = str(tmp_path / "debug.mjpeg")
+    display = DebugDisplay("mjpeg", path, fps=1000)
+    display.show(frame())
+    display.close()
+    with open(path, "rb") as file:
+        assert file.read(2) == b"\xff\xd8"
@@ -0,0 +1,69 @@
+import cv2
+import numpy as np
+
+from vsdkx.core.util.drawing import Renderer, draw_boxes, draw_zones
+
+BOXES = np.array([[10, 12, 40, 30], [20, 25, 60, 44]], dtype=np.int32)
+SCORES = np.array([0.9, 0.5], dtype=np.float32)
+
+
+def _reference(config: dict, image: np.ndarray):
+    # the drawing of the boxes before Renderer
+    for box, score in zip(BOXES.tolist(), SCORES.tolist()):
+        xmin, ymin, xmax, ymax = box
+        cv2.rectangle(image, (xmin + 2, ymin - 2), (xmax + 2, ymax - 2),
+                      config.get("rectangle_color") or (60, 179, 113),
+                      config.get("box_thickness") or 3)
+        cv2.putText(image, ": %.2f" % score, (xmin + 2, ymin - 2),
+                    cv2.FONT_HERSHEY_SIMPLEX,
+                    config.get("box_font_scale", 0.8),
+                    config.get("text_color", (0, 0, 0)),
+                    config.get("box_thickness", 3))
+
+
+def test_boxes_match_reference():
+    for config in ({}, {"box_thickness": 1, "rectangle_color": (255, 0, 0)},
+                   {"box_thickness": -1}):
+        expected = np.full((64, 80, 3), 200, dtype=np.uint8)
+        _reference(config, expected)
+        image = np.full((64, 80, 3), 200, dtype=np.uint8)
+        draw_boxes(config, image, BOXES, SCORES)
+        assert np.array_equal(image, expected), config
+
+
+def test_filled_boxes():
+    image = np.zeros((64, 80, 3), dtype=np.uint8)
+    Renderer({"box_thickness": -1}).draw_boxes(image, BOXES)
+    assert image[20, 30].tolist() == [60, 179, 113]
+
+
+def test_zones():
+    config = {"zones": [[[5, 5], [30, 5], [30, 30]]], "zones_color": 255}
+    image = np.zeros((64, 80, 3), dtype=np.uint8)
+    draw_zones(config, image)
+    expected = np.zeros((64, 80, 3), dtype=np.uint8)
+    cv2.polylines(expected, [np.array(config["zones"][0])], True, 255, 3)
+    assert np.array_equal(image, expected)
+
+
+def test_overlay_is_close_to_direct_drawing():
+    config = {"zones": [[[5, 5], [70, 5], [70, 60]]]}
+    expected = np.full((64, 80, 3), 120, dtype=np.uint8)
+    Renderer(config).render(expected, BOXES, SCORES)
+    renderer = Renderer(dict(config, overlay=True))
+    for _ in range(2):
+        image = np.full((64, 80, 3), 120, dtype=np.uint8)
+        renderer.render(image, BOXES, SCORES)
+        difference = np.abs(image.astype(int) - expected.astype(int))
+        assert difference.max() <= 2
+
+
+def test_config_changes_are_picked_up():
+    config = {"rectangle_color": (255, 0, 0), "box_thickness": -1}
+    renderer = Renderer(config)
+    image = np.zeros((64, 80, 3), dtype=np.uint8)
+    renderer.render(image, BOXES)
+    assert image[20, 30].tolist() == [255, 0, 0]
+    config["rectangle_color"] = (0, 0, 255)
+    renderer.render(image, BOXES)
+    assert image[20, 30].tolist() == [0, 0, 255]
@@ -0,0 +1,78 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from vsdkx.core.detector import EventDetector
+from vsdkx.core.executors import GraphAddonExecutor, \
+    ProcessAddonExecutor, SerialAddonExecutor
+from tests.fakes import config, frame
+
+ADDONS = {"count": {"class": "tests.fakes.CountingAddon"},
+          "a": {"class": "tests.fakes.ExtraAddon", "key": "a"},
+          "b": {"class": "tests.fakes.ExtraAddon", "key": "b"}}
+
+
+def _detect(mode: str, frames: int = 2):
+    detector = EventDetector(config(addons=ADDONS,
+                                    execution={"addons": mode}))
+    try:
+        inferences = [detector.detect(frame(value), {})
+                      for value in range(frames)]
+        return detector, inferences
+    finally:
+        detector.close()
+
+
+@pytest.mark.parametrize("mode, executor",
+                         [("serial", SerialAddonExecutor),
+                          ("graph", GraphAddonExecutor),
+                          ("process", ProcessAddonExecutor)])
+def test_modes_give_the_same_results(mode, executor):
+    detector, inferences = _detect(mode)
+    assert isinstance(detector._pipeline.executor, executor)
+    for key in "ab":
+        assert [inference.extra[key][:2] for inference in inferences] == \
+            [[1, 1], [1, 2]]
+    pids = {inference.extra["a"][2] for inference in inferences}
+    assert (pids == {os.getpid()}) == (mode != "process")
+
+
+def test_workers_return_values_changed_in_place():
+    detector = EventDetector(config(
+        addons={"history": {"class": "tests.fakes.HistoryAddon"}},
+        execution={"addons": "process"}))
+    try:
+        metadata = {"history": [0]}
+        detector.detect(frame(), metadata)
+        detector.detect(frame(), metadata)
+        assert metadata["history"] == [0, 1, 2]
+    finally:
+        detector.close()
+
+
+def test_concurrent_calls_take_turns_with_the_workers():
+    detector = EventDetector(config(addons=ADDONS,
+                                    execution={"addons": "process"}))
+    try:
+        with ThreadPoolExecutor(4) as pool:
+            inferences = list(pool.map(
+                lambda value: detector.detect(frame(value), {}), range(20)))
+        for key in "ab":
+            assert sorted(inference.extra[key][1]
+                          for inference in inferences) == list(range(1, 21))
+    finally:
+        detector.close()
+
+
+def test_graph_runs_declared_addons_together():
+    detector, _ = _detect("graph", 1)
+    names = [[type(addon).__name__ for addon in level]
+             for level in detector._pipeline.executor._levels]
+    # the counting addon declares nothing, so the others wait for it
+    assert names == [["CountingAddon"], ["ExtraAddon", "ExtraAddon"]]
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        EventDetector(config(execution={"addons": "threads"}))
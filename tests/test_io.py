@@ -0,0 +1,57 @@
+import os
+import threading
+
+from vsdkx.core.util.io import Config, get_env
+
+
+def _write(path, text: str, offset: int = 0):
+    # a later mtime than the previous write, whatever the file system
+    # resolution
+    path.write_text(text)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + offset * 10 ** 9))
+
+
+def test_environment_references(tmp_path, monkeypatch):
+    monkeypatch.setenv("VSDKX_TEST_URI", "rtsp://camera")
+    monkeypatch.delenv("VSDKX_TEST_UNSET", raising=False)
+    path = tmp_path / "config.yaml"
+    _write(path, "source:\n"
+                 "  uri: ${VSDKX_TEST_URI}\n"
+                 "  user: ${VSDKX_TEST_UNSET}\n")
+    config = Config(str(path))
+    assert config.get("source.uri") == "rtsp://camera"
+    # unset variables fall back to the default like missing keys
+    assert config.get("source.user", "admin") == "admin"
+    assert config.data == {"source": {"uri": "rtsp://camera"}}
+
+
+def test_dotted_keys_are_indexed(tmp_path):
+    path = tmp_path / "config.yaml"
+    _write(path, "model:\n  class: a.b.C\n  settings:\n    size: 3\n")
+    config = Config(str(path))
+    assert config.get("model.settings.size") == 3
+    assert config.get("model.settings") == {"size": 3}
+    assert config.get("model.class") == "a.b.C"
+    assert config.get("model.missing", 1) == 1
+    assert get_env(str(path), "model.settings.size") == 3
+    _write(path, "model:\n  settings:\n    size: 4\n", 1)
+    assert get_env(str(path), "model.settings.size") == 4
+
+
+def test_watch_reloads_changed_files(tmp_path):
+    path = tmp_path / "config.yaml"
+    _write(path, "model:\n  debug: false\n")
+    config = Config(str(path))
+    reloaded = threading.Event()
+    config.watch(lambda changed: reloaded.set(), interval=0.01)
+    try:
+        _write(path, "model: [unclosed\n", 1)
+        # the broken file is logged and the previous config kept
+        assert not reloaded.wait(0.2)
+        assert config.get("model.debug") is False
+        _write(path, "model:\n  debug: true\n", 2)
+        assert reloaded.wait(5)
+        assert config.get("model.debug") is True
+    finally:
+        config.stop_watching()
@@ -0,0 +1,71 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from vsdkx.core import metrics as metrics_module
+from vsdkx.core.metrics import Metrics
+
+
+def _record(metrics: Metrics, monkeypatch, stage: str, durations):
+    # durations in milliseconds, measured with a fake clock
+    for duration in durations:
+        monkeypatch.setattr(metrics_module.time, "perf_counter_ns",
+                            lambda: 1_000_000)
+        start = metrics.clock()
+        monkeypatch.setattr(metrics_module.time, "perf_counter_ns",
+                            lambda: 1_000_000 + duration * 1_000_000)
+        metrics.record(stage, start)
+
+
+def test_percentiles_of_the_rolling_window(monkeypatch):
+    metrics = Metrics(enabled=True, window=4)
+    _record(metrics, monkeypatch, "inference", [1, 2, 3, 4, 5, 6])
+    summary = metrics.snapshot()["inference"]
+    assert summary["count"] == 6
+    assert summary["sum"] == pytest.approx(0.021)
+    # only the last 4 durations are in the window
+    assert summary["p50"] == pytest.approx(0.0045)
+    assert summary["p99"] == pytest.approx(0.00597)
+
+
+def test_disabled_metrics_record_nothing():
+    metrics = Metrics()
+    metrics.record("inference", metrics.clock())
+    metrics.count("cache_hit")
+    assert metrics.snapshot() == {}
+    assert metrics.counters() == {}
+
+
+def _get(metrics: Metrics, path: str):
+    url = f"http://127.0.0.1:{metrics.port}{path}"
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            return response.status, response.read().decode()
+    except urllib.error.HTTPError as e:
+        return e.code, None
+
+
+def test_endpoints(monkeypatch):
+    metrics = Metrics(enabled=True)
+    _record(metrics, monkeypatch, "inference", [2])
+    metrics.count("cache_hit", 3)
+    ready = []
+    metrics.serve(0, ready=lambda: bool(ready))
+    try:
+        assert metrics._server.server_address[0] == "127.0.0.1"
+        status, body = _get(metrics, "/metrics")
+        assert status == 200
+        assert 'vsdkx_stage_seconds_count{stage="inference"} 1' in body
+        assert 'vsdkx_events_total{event="cache_hit"} 3' in body
+        status, body = _get(metrics, "/metrics.json")
+        assert status == 200
+        assert json.loads(body)["counters"] == {"cache_hit": 3}
+        assert _get(metrics, "/ready")[0] == 503
+        ready.append(True)
+        assert _get(metrics, "/ready") == (200, "ready\n")
+        assert _get(metrics, "/missing")[0] == 404
+    finally:
+        metrics.close()
+    assert metrics.port is None
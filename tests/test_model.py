@@ -0,0 +1,102 @@
+import sys
+import types
+
+import numpy as np
+import pytest
+
+from benchmarks.box_sanity_check import HEIGHT, WIDTH, \
+    loop_box_sanity_check, random_boxes
+from vsdkx.core.util.model import TFLiteInterpreterPool, box_sanity_check
+
+
+def test_box_sanity_check_matches_the_loop():
+    boxes = random_boxes(1000)
+    expected = np.array(loop_box_sanity_check(boxes, WIDTH, HEIGHT),
+                        dtype=np.int32)
+    sanitized = box_sanity_check(boxes, WIDTH, HEIGHT)
+    assert sanitized.dtype == np.int32
+    assert np.array_equal(sanitized, expected)
+
+
+def test_box_sanity_check_inplace():
+    boxes = np.array([[-5, -5, 20, 20], [30, 30, 10, 40]], dtype=np.int32)
+    sanitized = box_sanity_check(boxes, 25, 25, inplace=True)
+    assert sanitized is boxes
+    assert boxes.tolist() == [[0, 0, 20, 20], [30, 30, 25, 25]]
+    floats = boxes.astype(np.float32)
+    assert box_sanity_check(floats, 25, 25, inplace=True) is not floats
+
+
+def test_box_sanity_check_empty():
+    assert box_sanity_check([], 10, 10).shape == (0, 4)
+    assert box_sanity_check([1, 2, 3, 4], 10, 10).tolist() == [[1, 2, 3, 4]]
+
+
+class _Interpreter:
+    """
+    Stands in for tf.lite.Interpreter, invoke doubles the input
+    """
+
+    created = []
+
+    def __init__(self, model_path, num_threads=None,
+                 experimental_op_resolver_type=None):
+        self.kwargs = {"num_threads": num_threads,
+                       "resolver": experimental_op_resolver_type}
+        self._tensors = [np.zeros(3, np.float32), np.zeros(3, np.float32)]
+        _Interpreter.created.append(self)
+
+    def allocate_tensors(self):
+        pass
+
+    def get_input_details(self):
+        return [{"index": 0}]
+
+    def get_output_details(self):
+        return [{"index": 1}]
+
+    def tensor(self, index):
+        return lambda: self._tensors[index]
+
+    def invoke(self):
+        np.multiply(self._tensors[0], 2, out=self._tensors[1])
+
+
+@pytest.fixture
+def tflite(monkeypatch):
+    _Interpreter.created = []
+    resolvers = types.SimpleNamespace(
+        AUTO="auto", BUILTIN_WITHOUT_DEFAULT_DELEGATES="builtin")
+    lite = types.SimpleNamespace(
+        Interpreter=_Interpreter,
+        experimental=types.SimpleNamespace(OpResolverType=resolvers))
+    monkeypatch.setitem(sys.modules, "tensorflow",
+                        types.SimpleNamespace(lite=lite))
+    return _Interpreter
+
+
+def test_interpreter_pool_checkout_and_checkin(tflite):
+    pool = TFLiteInterpreterPool("model.tflite", size=2, num_threads=2)
+    assert [interpreter.kwargs for interpreter in tflite.created] == \
+        [{"num_threads": 2, "resolver": "auto"}] * 2
+    first = pool.checkout()
+    second = pool.checkout()
+    assert first.interpreter is not second.interpreter
+    with pytest.raises(TimeoutError):
+        pool.checkout(timeout=0.01)
+    pool.checkin(first)
+    with pool.interpreter(timeout=0.01) as slot:
+        assert slot is first
+        slot.set_input([1, 2, 3])
+        slot.invoke()
+        # the output is a view into the interpreter's buffer
+        assert slot.output().tolist() == [2, 4, 6]
+        assert slot.output() is slot.interpreter._tensors[1]
+    assert pool.checkout(timeout=0.01) is first
+
+
+def test_interpreter_pool_without_default_delegates(tflite):
+    TFLiteInterpreterPool("model.tflite", xnnpack=False)
+    assert tflite.created[0].kwargs["resolver"] == "builtin"
+    with pytest.raises(ValueError):
+        TFLiteInterpreterPool("model.tflite", size=0)
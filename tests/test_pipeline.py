@@ -0,0 +1,67 @@
+import queue
+
+from vsdkx.core.detector import EventDetector
+from vsdkx.core.pipeline import VideoPipeline, _STOP
+from tests.fakes import config, frame
+
+
+class FakeCapture:
+    """
+    Capture returning frames with the values 0 to count - 1
+    """
+
+    def __init__(self, count: int):
+        self.count = count
+        self.read_count = 0
+
+    def read(self, image=None):
+        if self.read_count == self.count:
+            return False, None
+        self.read_count += 1
+        return True, frame(self.read_count - 1)
+
+
+class LateQueue(queue.Queue):
+    """
+    Queue whose first timed get runs into the reader queuing its last frame
+    and ending right after the get gave up
+    """
+
+    def __init__(self, pipeline: VideoPipeline):
+        super().__init__(4)
+        self._pipeline = pipeline
+        self._late = True
+
+    def get(self, block=True, timeout=None):
+        if self._late and timeout is not None:
+            self._late = False
+            self.put("last frame")
+            self._pipeline._source_done.set()
+            raise queue.Empty
+        return super().get(block, timeout)
+
+
+def test_all_frames_are_processed():
+    detector = EventDetector(config())
+    results = []
+    try:
+        pipeline = VideoPipeline(
+            detector, FakeCapture(20),
+            lambda image, inference: results.append(int(image[0, 0, 0])),
+            queue_size=2)
+        pipeline.run()
+    finally:
+        detector.close()
+    assert results == list(range(20))
+    assert pipeline.frames_read == pipeline.frames_processed == 20
+
+
+def test_frame_queued_after_timeout_is_not_lost():
+    detector = EventDetector(config())
+    try:
+        pipeline = VideoPipeline(detector, FakeCapture(0))
+        pipeline._frames = LateQueue(pipeline)
+        assert pipeline._get(pipeline._frames) == "last frame"
+        assert pipeline._get(pipeline._frames) is _STOP
+    finally:
+        detector.close()
@@ -0,0 +1,69 @@
+import os
+
+import pytest
+
+from vsdkx.core import registry as registry_module
+from vsdkx.core.detector import EventDetector
+from vsdkx.core.registry import MODEL_GROUP, PluginRegistry
+from tests.fakes import RecordingDriver, config
+
+
+def test_entry_points_are_looked_up_once(monkeypatch):
+    lookups = []
+
+    def entry_points(group):
+        lookups.append(group)
+        return {"recording": "tests.fakes:RecordingDriver"}
+
+    monkeypatch.setattr(registry_module, "_entry_points", entry_points)
+    registry = PluginRegistry()
+    assert registry.resolve("tests.fakes.SlowDriver", MODEL_GROUP) == \
+        "tests.fakes.SlowDriver"
+    assert lookups == []
+    assert registry.resolve("recording", MODEL_GROUP) == \
+        "tests.fakes.RecordingDriver"
+    with pytest.raises(ValueError):
+        registry.resolve("missing", MODEL_GROUP)
+    assert lookups == [MODEL_GROUP]
+
+
+def test_classes_and_settings_are_cached():
+    registry = PluginRegistry()
+    path = "tests.fakes.RecordingDriver"
+    assert registry.load_class(path) is RecordingDriver
+    assert registry.load_class(path) is RecordingDriver
+    assert list(registry.load_times) == [path]
+    # settings which fail to import are empty and not imported again
+    settings = registry.default_settings("tests.settings.DEFAULT")
+    assert settings == {}
+    assert registry.default_settings("tests.settings.DEFAULT") is settings
+
+
+def test_profiles_are_parsed_again_when_changed(tmp_path):
+    registry = PluginRegistry()
+    path = tmp_path / "profile.yaml"
+    path.write_text("small:\n  size: 1\n")
+    first = registry.profile(str(path))
+    assert first == {"small": {"size": 1}}
+    assert registry.profile(str(path)) is first
+    path.write_text("small:\n  size: 2\n")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert registry.profile(str(path)) == {"small": {"size": 2}}
+
+
+def test_startup_report():
+    detector = EventDetector(config(
+        model={"warmup": {"shapes": [[48, 64, 3]], "frames": 1}},
+        addons={"count": {"class": "tests.fakes.CountingAddon"}}))
+    try:
+        report = detector.startup_report
+        assert report["model"]["class"] == "tests.fakes.RecordingDriver"
+        assert report["addons.count"]["class"] == \
+            "tests.fakes.CountingAddon"
+        for label in ("model", "addons.count"):
+            assert set(report[label]) == {"class", "settings", "import",
+                                          "init"}
+        assert report["total"] > 0 and report["warmup"] > 0
+    finally:
+        detector.close()
@@ -0,0 +1,148 @@
+import threading
+import time
+
+import pytest
+
+from vsdkx.core.detector import EventDetector
+from tests.fakes import RecordingDriver, SlowDriver, config, frame
+
+COUNTING = {"count": {"class": "tests.fakes.CountingAddon"}}
+
+
+def test_reload_swaps_the_pipeline():
+    detector = EventDetector(config())
+    old = detector.model_driver
+    detector.reload(config(model={"warmup": {"shapes": [[48, 64, 3]],
+                                             "frames": 2}},
+                           addons=COUNTING), wait=True)
+    try:
+        assert detector.model_driver is not old
+        assert len(detector.model_driver.shapes) == 2
+        result = detector.detect(frame(), {})
+        assert result.boxes.tolist() == [[0, 0, 32, 24]]
+        # the warm-up frames ran through the new addons as well
+        assert detector.addons[0].count == 3
+        assert len(old.shapes) == 0
+    finally:
+        detector.close()
+
+
+def test_update_config_reloads_structure_changes():
+    detector = EventDetector(config())
+    try:
+        old = detector.model_driver
+        detector.update_config(config(drawing={"zones": []}))
+        assert detector.model_driver is old
+        detector.update_config(config(addons=COUNTING))
+        # the reload runs in the background
+        deadline = time.monotonic() + 5
+        while detector.model_driver is old and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert detector.model_driver is not old
+        assert len(detector.addons) == 1
+    finally:
+        detector.close()
+
+
+def test_failed_reload_keeps_the_running_pipeline():
+    detector = EventDetector(config(model={"roi": False}))
+    try:
+        old = detector.model_driver
+        detector.reload(config(model={"class": "tests.fakes.MissingDriver"}),
+                        wait=True)
+        assert detector.model_driver is old
+        assert detector.detect(frame(), {}).boxes.tolist() == \
+            [[0, 0, 32, 24]]
+    finally:
+        detector.close()
+
+
+def test_calls_in_flight_finish_on_their_pipeline():
+    detector = EventDetector(config(model={
+        "class": "tests.fakes.SlowDriver", "settings": {"latency": 0.3}}))
+    old = detector.model_driver
+    old_pipeline = detector._pipeline
+    results = []
+    call = threading.Thread(
+        target=lambda: results.append(detector.detect(frame(10), {})))
+    call.start()
+    time.sleep(0.1)
+    detector.reload(config(), wait=True)
+    try:
+        assert isinstance(old, SlowDriver)
+        assert type(detector.model_driver) is RecordingDriver
+        # the old pipeline stays open until the call released it
+        assert not old_pipeline.acquire()
+        call.join()
+        assert len(results) == 1 and len(old.shapes) == 1
+        assert detector.model_driver.shapes == []
+    finally:
+        detector.close()
+
+
+def test_reload_reaches_the_forks():
+    detector = EventDetector(config(addons=COUNTING))
+    fork = detector.fork()
+    nested = fork.fork()
+    closed = detector.fork()
+    closed.close()
+    fork.detect(frame(), {})
+    try:
+        detector.reload(config(addons=COUNTING), wait=True)
+        for forked in (fork, nested):
+            assert forked.model_driver is detector.model_driver
+            assert forked.addons[0] is not detector.addons[0]
+            assert forked.addons[0].count == 0
+        forked_addon = fork.addons[0]
+        fork.detect(frame(), {})
+        assert forked_addon.count == 1
+        assert detector.addons[0].count == 0
+        with pytest.raises(RuntimeError):
+            closed.detect(frame(), {})
+    finally:
+        nested.close()
+        fork.close()
+        detector.close()
+
+
+def test_detect_after_close():
+    detector = EventDetector(config())
+    detector.close()
+    with pytest.raises(RuntimeError):
+        detector.detect(frame(), {})
+    with pytest.raises(RuntimeError):
+        detector.detect_batch([frame()])
+    # a reload finishing after close doesn't open the detector again
+    detector.reload(config(), wait=True)
+    with pytest.raises(RuntimeError):
+        detector.detect(frame(), {})
+    detector.close()
+
+
+def test_warm_up_records_no_metrics():
+    warmup = {"shapes": [[48, 64, 3]], "frames": 2}
+    detector = EventDetector(config(model={"warmup": warmup},
+                                    metrics={"enabled": True},
+                                    addons=COUNTING))
+    try:
+        assert len(detector.model_driver.shapes) == 2
+        detector.reload(config(model={"warmup": warmup},
+                               metrics={"enabled": True},
+                               addons=COUNTING), wait=True)
+        assert len(detector.model_driver.shapes) == 2
+        assert detector.metrics.snapshot() == {}
+        detector.detect(frame(), {})
+        assert detector.metrics.snapshot()["detect"]["count"] == 1
+    finally:
+        detector.close()
+
+
+def test_warm_up_skips_coroutine_drivers():
+    detector = EventDetector(config(model={
+        "class": "tests.fakes.AsyncDriver",
+        "warmup": {"shapes": [[48, 64, 3]]}}))
+    try:
+        assert detector.model_driver.shapes == []
+        assert "warmup" not in detector.startup_report
+    finally:
+        detector.close()
@@ -0,0 +1,57 @@
+from vsdkx.core.detector import EventDetector
+from vsdkx.core.roi import RegionOfInterest
+from vsdkx.core.structs import FrameObject, Inference
+from tests.fakes import config, frame
+
+ZONES = [[[10, 5], [20, 5], [20, 15]], [[40, 30], [50, 30], [50, 40]]]
+
+
+def test_from_config():
+    drawing = {"zones": ZONES}
+    assert RegionOfInterest.from_config(config(), drawing) is None
+    roi = RegionOfInterest.from_config(config(model={"roi": True}), drawing)
+    assert (roi.mode, roi.margin) == ("union", 0)
+    roi = RegionOfInterest.from_config(
+        config(model={"roi": {"mode": "tiles", "margin": 2}}), drawing)
+    assert (roi.mode, roi.margin) == ("tiles", 2)
+
+
+def test_rectangles():
+    shape = (48, 64, 3)
+    assert RegionOfInterest({"zones": ZONES}).rectangles(shape) == \
+        [(10, 5, 50, 40)]
+    assert RegionOfInterest({"zones": ZONES}, "tiles", 8).rectangles(
+        shape) == [(2, 0, 28, 23), (32, 22, 58, 48)]
+    assert RegionOfInterest({}).rectangles(shape) == [(0, 0, 64, 48)]
+
+
+def test_zone_changes_are_picked_up():
+    drawing = {"zones": ZONES[:1]}
+    roi = RegionOfInterest(drawing)
+    assert roi.rectangles((48, 64)) == [(10, 5, 20, 15)]
+    drawing["zones"] = ZONES[1:]
+    assert roi.rectangles((48, 64)) == [(40, 30, 50, 40)]
+
+
+def test_crop_and_merge():
+    roi = RegionOfInterest({"zones": ZONES}, "tiles")
+    crops = roi.crop(FrameObject(frame(), {"stream": "a"}))
+    assert [crop.frame.shape for crop in crops] == [(10, 10, 3),
+                                                    (10, 10, 3)]
+    assert crops[0].metadata == {"stream": "a"}
+    merged = roi.merge((48, 64, 3), [
+        Inference(boxes=[[0, 0, 2, 2]], classes=[1], scores=[0.5]),
+        Inference(boxes=[[1, 1, 3, 3]], classes=[2], scores=[0.25])])
+    assert merged.boxes.tolist() == [[10, 5, 12, 7], [41, 31, 43, 33]]
+    assert merged.classes.tolist() == [1, 2]
+
+
+def test_detector_with_roi_true():
+    detector = EventDetector(config(model={"roi": True},
+                                    drawing={"zones": ZONES}))
+    try:
+        inference = detector.detect(frame(), {})
+        assert detector.model_driver.shapes == [(35, 40, 3)]
+        assert inference.boxes.tolist() == [[10, 5, 30, 22]]
+    finally:
+        detector.close()
@@ -0,0 +1,64 @@
+import pytest
+
+from vsdkx.core.detector import EventDetector
+from vsdkx.core.scheduler import FrameScheduler
+from vsdkx.core.structs import Inference
+from tests.fakes import config, frame
+
+
+def _run(scheduler: FrameScheduler, frames) -> int:
+    calls = []
+    for image in frames:
+        scheduler.infer(image, lambda: calls.append(1) or Inference())
+    return len(calls)
+
+
+def test_from_config():
+    assert FrameScheduler.from_config(config()) is None
+    assert FrameScheduler.from_config(config(model={"skip": False})) is None
+    scheduler = FrameScheduler.from_config(config(model={"skip": True}))
+    assert (scheduler.mode, scheduler.stride) == ("stride", 2)
+    scheduler = FrameScheduler.from_config(
+        config(model={"skip": {"mode": "diff", "threshold": 2}}))
+    assert (scheduler.mode, scheduler.threshold) == ("diff", 2)
+    with pytest.raises(ValueError):
+        FrameScheduler.from_config(config(model={"skip": {"mode": "x"}}))
+
+
+def test_stride():
+    scheduler = FrameScheduler(stride=3)
+    assert _run(scheduler, [frame()] * 9) == 3
+    assert scheduler.frames_skipped == 6
+
+
+def test_diff_and_max_stale():
+    scheduler = FrameScheduler("diff", threshold=4, max_stale=3)
+    frames = [frame(0), frame(1), frame(2), frame(50), frame(50)] + \
+        [frame(50)] * 4
+    # 0, the jump to 50 and every 4th frame of the static rest
+    assert _run(scheduler, frames) == 3
+
+
+def test_hash_and_shape_change():
+    scheduler = FrameScheduler("hash")
+    assert _run(scheduler, [frame(), frame(), frame(shape=(24, 32, 3))]) == 2
+
+
+def test_reused_inference_is_a_copy():
+    scheduler = FrameScheduler()
+    first = scheduler.infer(frame(), lambda: Inference(boxes=[[0, 0, 1, 1]]))
+    reused = scheduler.infer(frame(), lambda: None)
+    reused.boxes = reused.boxes + 1
+    assert first.boxes.tolist() == [[0, 0, 1, 1]]
+    scheduler.reset()
+    assert _run(scheduler, [frame()]) == 1
+
+
+def test_detector_with_skip_true():
+    detector = EventDetector(config(model={"skip": True}))
+    try:
+        for _ in range(4):
+            detector.detect(frame(), {})
+        assert len(detector.model_driver.shapes) == 2
+    finally:
+        detector.close()
@@ -0,0 +1,89 @@
+import json
+import threading
+
+import numpy as np
+import pytest
+
+from vsdkx.core.sinks import JSONLinesSink, NpzChunkSink, ResultSink, \
+    open_sink
+from vsdkx.core.structs import Inference
+
+
+def _inference(count=1):
+    return Inference(boxes=[[0, 0, 4, 4]] * count,
+                     classes=[1] * count,
+                     scores=[0.5] * count,
+                     extra={"mask": np.eye(2, dtype=np.uint8)})
+
+
+class FailingSink(ResultSink):
+
+    def _write_batch(self, records):
+        raise OSError("disk full")
+
+
+def test_jsonl(tmp_path):
+    path = tmp_path / "results.jsonl"
+    with open_sink("jsonl", str(path)) as sink:
+        for _ in range(3):
+            sink.write(_inference())
+        sink.write(_inference(2), "cam", 7)
+        sink.flush()
+        assert len(path.read_text().splitlines()) == 4
+    rows = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [(row["stream"], row["frame"]) for row in rows] == \
+        [(None, 0), (None, 1), (None, 2), ("cam", 7)]
+    assert rows[3]["boxes"] == [[0, 0, 4, 4]] * 2
+    assert rows[0]["extra"] == {"mask": [[1, 0], [0, 1]]}
+
+
+def test_npz_chunks(tmp_path):
+    path = str(tmp_path / "results.npz")
+    sink = NpzChunkSink(path, batch_size=2)
+    for count in range(3):
+        sink.write(_inference(count))
+    sink.close()
+    first = np.load(str(tmp_path / "results-000000.npz"))
+    assert first["frame"].tolist() == [0, 1]
+    assert first["box_offsets"].tolist() == [0, 0, 1]
+    second = np.load(str(tmp_path / "results-000001.npz"))
+    assert second["boxes"].shape == (2, 4)
+    # numbering continues after the chunks of an earlier run
+    sink = NpzChunkSink(path)
+    sink.write(_inference())
+    sink.close()
+    assert (tmp_path / "results-000002.npz").exists()
+
+
+def test_failed_write_releases_flush(tmp_path):
+    sink = FailingSink(str(tmp_path / "results"), flush_interval=10.0)
+    sink.write(_inference())
+    errors = []
+
+    def flush():
+        try:
+            sink.flush()
+        except OSError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=flush)
+    thread.start()
+    thread.join(5.0)
+    assert not thread.is_alive()
+    assert errors
+    with pytest.raises(OSError):
+        sink.write(_inference())
+    with pytest.raises(OSError):
+        sink.close()
+
+
+def test_unknown_sink(tmp_path):
+    with pytest.raises(ValueError):
+        open_sink("csv", str(tmp_path / "results"))
+    with open_sink("jsonl", str(tmp_path / "results.jsonl")) as sink:
+        assert isinstance(sink, JSONLinesSink)
+
+
+def test_sinks_must_implement_write_batch(tmp_path):
+    with pytest.raises(TypeError):
+        ResultSink(str(tmp_path / "results"))
@@ -0,0 +1,60 @@
+import cv2
+import pytest
+
+from vsdkx.core.detector import EventDetector
+from vsdkx.core.streams import MultiStreamRunner
+from tests.fakes import config, frame
+
+
+def _video(path: str, frames: int) -> str:
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 10,
+                             (64, 48))
+    for value in range(frames):
+        writer.write(frame(value * 10))
+    writer.release()
+    return path
+
+
+def test_streams_use_forks_and_schedulers(tmp_path):
+    detector = EventDetector(config(
+        model={"skip": {"mode": "stride", "stride": 2}},
+        addons={"count": {"class": "tests.fakes.CountingAddon"}}))
+    sources = [_video(str(tmp_path / "a.avi"), 6),
+               _video(str(tmp_path / "b.avi"), 4)]
+    results = []
+    runner = MultiStreamRunner(
+        detector, sources,
+        lambda stream, image, inference: results.append(stream),
+        batch_size=2, drop_oldest=False, report_interval=60)
+    runner.run()
+    try:
+        assert results.count(sources[0]) == 6
+        assert results.count(sources[1]) == 4
+        forks = [stream.detector for stream in runner._streams]
+        assert [fork.addons[0].count for fork in forks] == [6, 4]
+        assert [fork.scheduler.frames_skipped for fork in forks] == [3, 2]
+        # the frames the schedulers didn't skip went through the model
+        assert sum(detector.model_driver.batches) == 5
+        # run closed the forks but not the detector
+        for fork in forks:
+            with pytest.raises(RuntimeError):
+                fork.detect(frame(), {})
+        detector.detect(frame(), {})
+    finally:
+        detector.close()
+
+
+def test_detect_batch_with_forks():
+    detector = EventDetector(config(
+        addons={"count": {"class": "tests.fakes.CountingAddon"}}))
+    fork = detector.fork()
+    try:
+        inferences = detector.detect_batch([frame(1), frame(2), frame(3)],
+                                           detectors=[detector, fork, fork])
+        assert len(inferences) == 3
+        assert detector.model_driver.batches == [3]
+        assert detector.addons[0].count == 1
+        assert fork.addons[0].count == 2
+    finally:
+        fork.close()
+        detector.close()
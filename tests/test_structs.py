@@ -0,0 +1,72 @@
+import copy
+
+import numpy as np
+import pytest
+
+from vsdkx.core.structs import Inference
+from vsdkx.core.util.codec import decode_inference, encode_inference
+
+
+def _inference(**extra):
+    return Inference(boxes=[[1, 2, 3, 4], [5, 6, 7, 8]],
+                     classes=[0, 3],
+                     scores=[0.5, 0.25],
+                     extra=extra)
+
+
+def test_arrays_are_typed():
+    inference = _inference()
+    assert inference.boxes.dtype == np.int32
+    assert inference.classes.dtype == np.int32
+    assert inference.scores.dtype == np.float32
+    assert Inference(boxes=[[0.5, 1, 2, 3]]).boxes.dtype == np.float32
+    assert Inference(boxes=()).boxes.shape == (0, 4)
+
+
+def test_wide_boxes_keep_the_coordinates():
+    detections = np.array([[1, 2, 3, 4, 0.9, 2], [5, 6, 7, 8, 0.5, 1]])
+    boxes = Inference(boxes=detections).boxes
+    assert boxes.tolist() == [[1, 2, 3, 4], [5, 6, 7, 8]]
+    assert boxes.flags.c_contiguous
+    assert Inference(boxes=[1, 2, 3, 4]).boxes.tolist() == [[1, 2, 3, 4]]
+    with pytest.raises(ValueError):
+        Inference(boxes=[[1, 2, 3]])
+    with pytest.raises(ValueError):
+        Inference(boxes=np.zeros((2, 2, 4)))
+
+
+def test_labels_must_be_integers():
+    with pytest.raises(ValueError):
+        Inference(classes=["person"])
+
+
+def test_dict_access():
+    inference = _inference(tracks=[1])
+    assert inference["extra"] == {"tracks": [1]}
+    assert Inference(**inference) == inference
+    with pytest.raises(KeyError):
+        inference["frame"]
+
+
+def test_equality_with_arrays_in_extra():
+    inference = _inference(mask=np.ones((2, 2)), nested={"ids": np.arange(3)})
+    assert inference == copy.deepcopy(inference)
+    other = copy.deepcopy(inference)
+    other.extra["mask"][0, 0] = 0
+    assert inference != other
+    assert inference != _inference(mask=np.ones((2, 2)))
+
+
+def test_codec_round_trip():
+    inference = _inference(count=2, names=["a", "b"])
+    encoded = b"".join(encode_inference(inference))
+    assert decode_inference(encoded) == inference
+    empty = Inference()
+    assert decode_inference(b"".join(encode_inference(empty))) == empty
+
+
+def test_codec_turns_arrays_in_extra_into_lists():
+    inference = _inference(mask=np.eye(2, dtype=np.uint8))
+    decoded = decode_inference(b"".join(encode_inference(inference)))
+    assert decoded.extra == {"mask": [[1, 0], [0, 1]]}
+    assert decoded == inference
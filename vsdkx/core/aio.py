@@ -0,0 +1,193 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Hashable, List
+
+from numpy import ndarray
+
+from vsdkx.core.detector import EventDetector, _Pipeline
+from vsdkx.core.interfaces import Addon
+from vsdkx.core.structs import AddonObject, FrameObject, Inference
+
+
+class _StreamSlot:
+    def __init__(self, detector: EventDetector):
+        self.detector = detector
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+class AsyncEventDetector:
+    """
+    asyncio front end of EventDetector. Blocking hooks run on a thread pool
+    so they don't stall the event loop, while model drivers and addons can
+    also implement inference, pre_process and post_process as coroutines,
+    which are awaited on the loop.
+
+    At most max_concurrency inference calls run at the same time, further
+    callers wait for their turn, which gives backpressure to the producers.
+    Frames of the same stream are processed one after another in the order
+    detect was called, frames without a stream concurrently.
+    """
+
+    def __init__(self,
+                 detector: EventDetector,
+                 max_concurrency: int = 1,
+                 fork_streams: bool = False,
+                 workers: int = None):
+        """
+        Initialize with detector
+
+        Args:
+            detector (EventDetector): the detector to run
+            max_concurrency (int): number of inference calls that may run at
+            the same time
+            fork_streams (bool): give every stream its own addons with
+            EventDetector.fork, otherwise all streams share the addons of
+            detector and blocking addons must be thread safe
+            workers (int): threads for the blocking hooks, by default
+            max_concurrency + 1 so the addons of one frame can run while
+            other frames are inferred
+        """
+        if max_concurrency <= 0:
+            raise ValueError("max_concurrency must be positive")
+        self._detector = detector
+        self._fork_streams = fork_streams
+        self._limit = asyncio.Semaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(
+            workers or max_concurrency + 1,
+            thread_name_prefix="vsdkx-async")
+        self._streams: Dict[Hashable, _StreamSlot] = {}
+
+    async def detect(self,
+                     frame: ndarray,
+                     metadata: dict = None,
+                     stream: Hashable = None) -> Inference:
+        """
+        Get the inference result of frame after all the addons got applied
+
+        Args:
+            frame: the frame data
+            metadata: the metadata dictionary
+            stream: id of the stream the frame belongs to, frames of one
+            stream are processed in the order they were passed, frames
+            without a stream run concurrently
+
+        Returns:
+            (Inference): the inference result
+        """
+        if metadata is None:
+            metadata = {}
+        if stream is None:
+            return await self._detect(self._detector, frame, metadata)
+        slot = self._streams.get(stream)
+        if slot is None:
+            slot = self._streams[stream] = _StreamSlot(
+                self._detector.fork() if self._fork_streams
+                else self._detector)
+        slot.users += 1
+        try:
+            async with slot.lock:
+                return await self._detect(slot.detector, frame, metadata)
+        finally:
+            slot.users -= 1
+            # forked streams keep their addon state until close_stream
+            if slot.users == 0 and slot.detector is self._detector \
+                    and self._streams.get(stream) is slot:
+                del self._streams[stream]
+
+    def close_stream(self, stream: Hashable):
+        """
+        Forget a stream, with fork_streams its addons are closed as well
+
+        Args:
+            stream: id of the stream
+        """
+        slot = self._streams.pop(stream, None)
+        if slot is not None and slot.detector is not self._detector:
+            slot.detector.close()
+
+    async def detect_many(self, frames: List[ndarray],
+                          stream: Hashable = None) -> List[Inference]:
+        """
+        Run detect on frames, the results keep the order of frames. Without
+        a stream the frames run concurrently, up to max_concurrency
+        inference calls at once, with a stream one after another.
+
+        Args:
+            frames: list of frame data
+            stream: id of the stream the frames belong to
+
+        Returns:
+            (List[Inference]): the inference results
+        """
+        return await asyncio.gather(*[self.detect(frame, stream=stream)
+                                      for frame in frames])
+
+    def close(self):
+        """
+        Shut the thread pool down
+        """
+        self._executor.shutdown(wait=False)
+
+    async def _call(self, function, *args):
+        if asyncio.iscoroutinefunction(function):
+            return await function(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor,
+                                          functools.partial(function, *args))
+
+    async def _addons(self, addons: List[Addon], stage: str,
+                      addon_object: AddonObject) -> AddonObject:
+        for addon in addons:
+            addon_object = await self._call(getattr(addon, stage),
+                                            addon_object)
+        return addon_object
+
+    @staticmethod
+    def _has_coroutines(addons: List[Addon], stage: str) -> bool:
+        return any(asyncio.iscoroutinefunction(getattr(addon, stage))
+                   for addon in addons)
+
+    async def _detect(self, detector: EventDetector, frame: ndarray,
+                      metadata: dict) -> Inference:
+        # the pipeline is held like in EventDetector.detect, so a reload
+        # can't close it while the frame is processed
+        pipeline = detector._acquire()
+        try:
+            return await self._detect_with(detector, pipeline, frame,
+                                           metadata)
+        finally:
+            pipeline.release()
+
+    async def _detect_with(self, detector: EventDetector, pipeline: _Pipeline,
+                           frame: ndarray, metadata: dict) -> Inference:
+        # without coroutine addons a stage takes one hop to the thread pool
+        # and keeps using the configured addon executor
+        if self._has_coroutines(pipeline.addons, "pre_process"):
+            addon_object = await self._addons(
+                pipeline.addons, "pre_process",
+                AddonObject(frame=frame, inference=None, shared=metadata,
+                            buffers=detector.buffer_pool.lease()))
+            frame_object = FrameObject(addon_object.frame, metadata)
+        else:
+            addon_object, frame_object = await self._call(
+                detector._pre_process, pipeline, frame, metadata)
+
+        async with self._limit:
+            if asyncio.iscoroutinefunction(pipeline.model_driver.inference):
+                inference = await detector._schedule_async(pipeline,
+                                                           frame_object)
+            else:
+                inference = await self._call(detector._schedule, pipeline,
+                                             frame_object)
+
+        if self._has_coroutines(pipeline.addons, "post_process"):
+            detector._sanitize(frame_object, inference)
+            addon_object.inference = inference
+            addon_object = await self._addons(pipeline.addons,
+                                              "post_process", addon_object)
+            return await self._call(detector._finish, pipeline,
+                                    addon_object, frame_object)
+        return await self._call(detector._post_process, pipeline,
+                                addon_object, frame_object, inference)
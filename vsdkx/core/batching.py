@@ -0,0 +1,283 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Deque, List, Optional
+
+from numpy import ndarray
+
+from vsdkx.core.detector import EventDetector
+from vsdkx.core.structs import Inference
+from vsdkx.core.util.io import get_env_dict
+
+LOG_TAG = "RequestBatcher"
+
+
+class Overloaded(RuntimeError):
+    """
+    Raised for a request which was rejected or shed because the batcher
+    could not answer it in time
+    """
+
+
+class _Request:
+    __slots__ = ("frame", "metadata", "future", "arrived", "expires")
+
+    def __init__(self, frame: ndarray, metadata: dict,
+                 deadline: Optional[float]):
+        self.frame = frame
+        self.metadata = metadata
+        self.future = Future()
+        self.arrived = time.monotonic()
+        self.expires = None if deadline is None else self.arrived + deadline
+
+
+class RequestBatcher:
+    """
+    Collects concurrent detect requests into micro batches for
+    EventDetector.detect_batch. A batch is run when max_batch_size requests
+    are waiting or when its first request waited max_wait_ms, the results
+    are handed back through futures.
+
+    With a deadline, requests are rejected right away when the queue is
+    longer than max_queue or when the batches ahead of them would take
+    longer than the deadline, going by the duration of the recent batches.
+    Requests which still expire in the queue are shed before inference.
+    Both fail with Overloaded, so the clients can back off or retry
+    elsewhere instead of waiting.
+    """
+
+    def __init__(self,
+                 detector: EventDetector,
+                 max_batch_size: int = 8,
+                 max_wait_ms: float = 5.0,
+                 max_queue: int = 64,
+                 deadline_ms: float = None):
+        """
+        Initialize with detector
+
+        Args:
+            detector (EventDetector): the detector the batches are run with
+            max_batch_size (int): maximum number of frames of a batch
+            max_wait_ms (float): maximum milliseconds the first request of a
+            batch waits for more requests
+            max_queue (int): maximum number of waiting requests
+            deadline_ms (float): milliseconds after which a waiting request
+            is given up, never when None
+        """
+        if max_batch_size <= 0 or max_queue <= 0:
+            raise ValueError("max_batch_size and max_queue must be positive")
+        self._logger = logging.getLogger(LOG_TAG)
+        self._detector = detector
+        self._max_batch_size = max_batch_size
+        self._max_wait = max_wait_ms / 1000
+        self._max_queue = max_queue
+        self._deadline = None if deadline_ms is None else deadline_ms / 1000
+        self._queue: Deque[_Request] = deque()
+        self._condition = threading.Condition()
+        self._batch_duration = 0.0
+        self._closed = False
+        self.batches = 0
+        self.requests = 0
+        self.rejected = 0
+        self.shed = 0
+        self._thread = threading.Thread(target=self._run,
+                                        name="vsdkx-batcher",
+                                        daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def from_config(cls, detector: EventDetector,
+                    system_config: dict) -> Optional["RequestBatcher"]:
+        """
+        Create the batcher from the server.batching section
+
+        Args:
+            detector (EventDetector): the detector the batches are run with
+            system_config: the config dictionary
+
+        Returns:
+            (RequestBatcher): the batcher, None without the section
+        """
+        config = get_env_dict(system_config, "server.batching")
+        if not config:
+            return None
+        return cls(detector, **config)
+
+    def submit(self, frame: ndarray, metadata: dict = None) -> Future:
+        """
+        Queue frame for the next batch
+
+        Args:
+            frame: the frame data
+            metadata: the metadata dictionary
+
+        Returns:
+            (Future): resolves to the Inference of frame, or fails with
+            Overloaded when the request is shed
+        """
+        request = _Request(frame, {} if metadata is None else metadata,
+                           self._deadline)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("The batcher is closed")
+            self._admit()
+            self._queue.append(request)
+            self._condition.notify()
+        return request.future
+
+    def detect(self, frame: ndarray, metadata: dict = None) -> Inference:
+        """
+        Get the inference result of frame from the next batch
+
+        Args:
+            frame: the frame data
+            metadata: the metadata dictionary
+
+        Returns:
+            (Inference): the inference result
+        """
+        return self.submit(frame, metadata).result()
+
+    def close(self):
+        """
+        Run the waiting requests and stop the batching thread
+        """
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+        self._logger.info(f"Ran {self.requests} requests in {self.batches} "
+                          f"batches, rejected {self.rejected} and shed "
+                          f"{self.shed}")
+
+    def _admit(self):
+        # called with the condition held
+        waiting = len(self._queue)
+        if waiting >= self._max_queue:
+            self.rejected += 1
+            raise Overloaded(f"{waiting} requests are waiting")
+        if self._deadline is not None:
+            # only the batches ahead count, so an empty queue always admits
+            expected = -(-waiting // self._max_batch_size) \
+                * self._batch_duration
+            if expected > self._deadline:
+                self.rejected += 1
+                raise Overloaded(f"Expected to wait {expected * 1000:.1f}ms")
+
+    def _next_batch(self) -> List[_Request]:
+        with self._condition:
+            while not self._queue and not self._closed:
+                self._condition.wait()
+            if not self._queue:
+                return []
+            flush = self._queue[0].arrived + self._max_wait
+            while len(self._queue) < self._max_batch_size \
+                    and not self._closed:
+                timeout = flush - time.monotonic()
+                if timeout <= 0:
+                    break
+                self._condition.wait(timeout)
+            count = min(len(self._queue), self._max_batch_size)
+            return [self._queue.popleft() for _ in range(count)]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            now = time.monotonic()
+            live = []
+            for request in batch:
+                if request.expires is not None and now > request.expires:
+                    self.shed += 1
+                    request.future.set_exception(Overloaded(
+                        "The deadline passed in the queue"))
+                elif request.future.set_running_or_notify_cancel():
+                    live.append(request)
+            if live:
+                self._run_batch(live)
+
+    def _run_batch(self, batch: List[_Request]):
+        start = time.monotonic()
+        try:
+            inferences = self._detector.detect_batch(
+                [request.frame for request in batch],
+                [request.metadata for request in batch])
+        except BaseException as e:
+            for request in batch:
+                request.future.set_exception(e)
+            return
+        for request, inference in zip(batch, inferences):
+            request.future.set_result(inference)
+        duration = time.monotonic() - start
+        # moving average, the first batch sets it
+        self._batch_duration = duration if not self.batches \
+            else 0.8 * self._batch_duration + 0.2 * duration
+        self.batches += 1
+        self.requests += len(batch)
+
+
+class BatchingEventDetector(EventDetector):
+    """
+    EventDetector for the gRPC server which runs concurrent detect calls of
+    the server's threads as micro batches when the config has a
+    server.batching section, see RequestBatcher. Without it detect works
+    like the one of EventDetector.
+    """
+
+    def __init__(self, system_config: dict):
+        """
+        Initialize with the config dictionary
+
+        Args:
+            system_config: you can see the structure of this dictionary
+            in README.md file
+        """
+        # EventDetector.__init__ warms up through detect, before batching
+        self.batcher = None
+        super().__init__(system_config)
+        self.batcher = RequestBatcher.from_config(self, system_config)
+
+    def detect(self, frame: ndarray, metadata: dict = {}) -> Inference:
+        """
+        Get the inference result of frame, from the next batch when batching
+        is configured
+
+        Args:
+            frame: the frame data
+            metadata: the metadata dictionary
+
+        Returns:
+            (Inference): the inference result
+
+        Raises:
+            Overloaded: when the request was rejected or shed
+        """
+        if self.batcher is None:
+            return super().detect(frame, metadata)
+        return self.batcher.detect(frame, metadata)
+
+    def fork(self) -> "BatchingEventDetector":
+        """
+        Create a detector with its own addons, as EventDetector.fork, and
+        its own batcher
+
+        Returns:
+            (BatchingEventDetector): the new detector
+        """
+        forked = super().fork()
+        forked.batcher = RequestBatcher.from_config(forked,
+                                                    self._system_config)
+        return forked
+
+    def close(self):
+        """
+        Run the waiting requests, then close the detector
+        """
+        if self.batcher is not None:
+            self.batcher.close()
+        super().close()
@@ -0,0 +1,399 @@
+import copy
+import glob
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing.util import Finalize
+from typing import List, Optional, Sequence, Set, Tuple
+
+import cv2
+
+from vsdkx.core.capture import open_capture
+from vsdkx.core.detector import EventDetector
+from vsdkx.core.sinks import ParquetSink, ResultSink
+from vsdkx.core.structs import Inference
+from vsdkx.core.util.io import get_env_dict
+
+LOG_TAG = "BulkRunner"
+
+IMAGE_EXTENSIONS = (".bmp", ".jpeg", ".jpg", ".png", ".tif", ".tiff",
+                    ".webp")
+VIDEO_EXTENSIONS = (".avi", ".m4v", ".mkv", ".mov", ".mp4", ".mpg", ".ts",
+                    ".webm")
+MANIFEST_EXTENSIONS = (".list", ".lst", ".txt")
+
+
+def _is_media(path: str) -> bool:
+    return path.lower().endswith(IMAGE_EXTENSIONS + VIDEO_EXTENSIONS)
+
+
+def collect_inputs(sources: Sequence[str]) -> List[str]:
+    """
+    Expand directories, globs and manifest files into the image and video
+    files to process
+
+    Args:
+        sources: directories, which are searched recursively, glob patterns,
+        manifest files with one path per line, relative to the manifest,
+        and plain files
+
+    Returns:
+        (List[str]): the files, sorted and without duplicates
+    """
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            for root, _, names in os.walk(source):
+                paths += [os.path.join(root, name) for name in names
+                          if _is_media(name)]
+        elif glob.has_magic(source):
+            paths += [path for path in glob.glob(source, recursive=True)
+                      if os.path.isfile(path) and _is_media(path)]
+        elif source.lower().endswith(MANIFEST_EXTENSIONS):
+            directory = os.path.dirname(source)
+            with open(source, encoding="utf-8") as manifest:
+                for line in manifest:
+                    line = line.strip()
+                    if line and not line.startswith("#"):
+                        paths.append(os.path.join(directory, line))
+        else:
+            paths.append(source)
+    return sorted(set(os.path.normpath(path) for path in paths))
+
+
+class Task:
+    """
+    A unit of work for one worker, an image or the frames start to stop of
+    a video
+
+    Attributes:
+        path (str): the image or video file
+        start (int): index of the first frame
+        stop (int): index after the last frame, the end of the video when
+        None
+    """
+
+    __slots__ = ("path", "start", "stop")
+
+    def __init__(self, path: str, start: int = 0, stop: int = None):
+        self.path = path
+        self.start = start
+        self.stop = stop
+
+    @property
+    def id(self) -> str:
+        """
+        The name of the task in the checkpoint
+        """
+        if self.start == 0 and self.stop is None:
+            return self.path
+        stop = "" if self.stop is None else self.stop
+        return f"{self.path}#{self.start}-{stop}"
+
+    def __repr__(self):
+        return f"Task({self.id})"
+
+
+def plan_tasks(paths: Sequence[str], segment_frames: int = 0,
+               capture_config: dict = None) -> List[Task]:
+    """
+    Create the tasks of paths, videos longer than segment_frames are split
+    into segments which are processed by different workers
+
+    Args:
+        paths: the image and video files
+        segment_frames (int): frames of a segment, videos are not split when
+        0 or when their length is unknown
+        capture_config (dict): the capture section of the system config
+
+    Returns:
+        (List[Task]): the tasks in the order of paths
+    """
+    tasks = []
+    for path in paths:
+        if segment_frames <= 0 \
+                or not path.lower().endswith(VIDEO_EXTENSIONS):
+            tasks.append(Task(path))
+            continue
+        capture = open_capture(path, capture_config)
+        count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT)) \
+            if capture.isOpened() else 0
+        capture.release()
+        if count <= segment_frames:
+            tasks.append(Task(path))
+            continue
+        tasks += [Task(path, start, min(start + segment_frames, count))
+                  for start in range(0, count, segment_frames)]
+        # frame counts are estimates, the last segment reads to the end
+        tasks[-1].stop = None
+    return tasks
+
+
+class Checkpoint:
+    """
+    File of the ids of the finished tasks, one per line, so an interrupted
+    run can be resumed without processing them again
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize with path
+
+        Args:
+            path (str): the checkpoint file, created when missing
+        """
+        self.path = path
+        self.done: Set[str] = set()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as file:
+                self.done = {line.rstrip("\n") for line in file
+                             if line.strip()}
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def mark(self, task_ids: Sequence[str]):
+        """
+        Record task_ids as finished
+
+        Args:
+            task_ids: the ids of the finished tasks
+        """
+        if not task_ids:
+            return
+        self._file.write("".join(f"{task_id}\n" for task_id in task_ids))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.done.update(task_ids)
+
+    def close(self):
+        self._file.close()
+
+
+# the detector of a worker process, loaded once by _init_worker
+_detector: Optional[EventDetector] = None
+_capture_config: dict = {}
+
+
+def _worker_config(system_config: dict) -> dict:
+    # the workers must not bind the same metrics port or append to the same
+    # cache file
+    config = copy.deepcopy(system_config)
+    logger = logging.getLogger(LOG_TAG)
+    if config.get("metrics", {}).pop("port", None) is not None:
+        logger.warning("The workers don't serve metrics, metrics.port is "
+                       "ignored")
+    cache = config.get("model", {}).get("cache")
+    if isinstance(cache, dict) and cache.pop("path", None) is not None:
+        logger.warning("The workers only cache results in memory, "
+                       "model.cache.path is ignored")
+    return config
+
+
+def _init_worker(system_config: dict, capture_config: dict):
+    global _detector, _capture_config
+    _detector = EventDetector(system_config)
+    _capture_config = capture_config
+    Finalize(_detector, _detector.close, exitpriority=10)
+
+
+def _run_task(task: Task) -> Tuple[str, list, Optional[str]]:
+    # runs in a worker, returns the id of task, its (stream, frame,
+    # inference) results and an error message if it failed
+    try:
+        if _detector.scheduler is not None:
+            _detector.scheduler.reset()
+        if not task.path.lower().endswith(VIDEO_EXTENSIONS):
+            image = cv2.imread(task.path)
+            if image is None:
+                return task.id, [], f"Could not read {task.path}"
+            return task.id, [(task.path, 0, _detector.detect(image, {}))], \
+                None
+        capture = open_capture(task.path, _capture_config)
+        if not capture.isOpened():
+            return task.id, [], f"Could not open {task.path}"
+        results = []
+        try:
+            if task.start:
+                capture.seek(task.start)
+            step = 1 + _capture_config.get("skip", 0)
+            reuse_frames = _capture_config.get("reuse_frames", False)
+            index = task.start - step
+            buffer = None
+            while True:
+                status, frame = capture.read(buffer)
+                if not status:
+                    break
+                # the capture knows which frame it decoded, counting them
+                # is off after an inexact seek or with keyframes_only
+                position = int(capture.get(cv2.CAP_PROP_POS_FRAMES))
+                index = position - 1 if position > 0 else index + step
+                if task.stop is not None and index >= task.stop:
+                    break
+                if index >= task.start:
+                    inference = _detector.detect(frame, {})
+                    # the arrays may be reused by the model driver
+                    results.append((task.path, index, Inference(
+                        boxes=inference.boxes.copy(),
+                        classes=inference.classes.copy(),
+                        scores=inference.scores.copy(),
+                        extra=dict(inference.extra))))
+                if reuse_frames:
+                    _detector.buffer_pool.release(frame)
+                    buffer = _detector.buffer_pool.acquire(frame.shape,
+                                                           frame.dtype)
+        finally:
+            capture.release()
+        return task.id, results, None
+    except Exception as e:
+        return task.id, [], f"{type(e).__name__}: {e}"
+
+
+class BulkRunner:
+    """
+    Offline processing of many images and videos with a pool of worker
+    processes. Every worker loads the detector once and then runs the
+    tasks it is given, videos longer than segment_frames are split into
+    segments so they are spread over the workers too. The results go to a
+    sink, named by the file and numbered by the frame.
+
+    With a checkpoint the finished tasks are recorded after their results
+    are written, and a run with the same checkpoint skips them. Tasks are
+    only recorded every report_interval seconds, so the results of the
+    tasks finished after the last record are written again when an
+    interrupted run is resumed. Results are written at least once, readers
+    should keep one result per stream and frame. Addons which keep state
+    between frames, e.g. trackers, start over at every segment.
+    """
+
+    def __init__(self,
+                 system_config: dict,
+                 sources: Sequence[str],
+                 sink: ResultSink,
+                 workers: int = None,
+                 segment_frames: int = 0,
+                 checkpoint: str = None,
+                 report_interval: float = 10.0):
+        """
+        Initialize with system_config and sources
+
+        Args:
+            system_config: the config dictionary of the detectors
+            sources: directories, globs, manifest files or files, see
+            collect_inputs
+            sink (ResultSink): where the results are written, it is not
+            closed
+            workers (int): number of worker processes, one per CPU when None
+            segment_frames (int): frames of a video segment, 0 to process
+            every video as one task
+            checkpoint (str): path of the checkpoint file
+            report_interval (float): seconds between progress reports
+        """
+        self._logger = logging.getLogger(LOG_TAG)
+        self._system_config = system_config
+        self._capture_config = get_env_dict(system_config, "capture", {})
+        self._sources = list(sources)
+        self._sink = sink
+        self._workers = workers or os.cpu_count() or 1
+        self._segment_frames = segment_frames
+        self._checkpoint_path = checkpoint
+        self._report_interval = report_interval
+
+    def run(self) -> dict:
+        """
+        Process all the sources
+
+        Returns:
+            (dict): number of tasks, finished, failed and skipped ones, the
+            frames, the seconds taken and the frames per second of all the
+            workers together
+        """
+        start = time.monotonic()
+        checkpoint = None if self._checkpoint_path is None \
+            else Checkpoint(self._checkpoint_path)
+        try:
+            tasks = plan_tasks(collect_inputs(self._sources),
+                               self._segment_frames,
+                               self._capture_config)
+            pending = tasks if checkpoint is None \
+                else [task for task in tasks
+                      if task.id not in checkpoint.done]
+            summary = {"tasks": len(tasks),
+                       "done": 0,
+                       "failed": 0,
+                       "skipped": len(tasks) - len(pending),
+                       "frames": 0}
+            if pending and summary["skipped"] \
+                    and isinstance(self._sink, ParquetSink) \
+                    and os.path.exists(self._sink.path):
+                raise ValueError(f"Resuming can't append to "
+                                 f"{self._sink.path}, write the results of "
+                                 f"the remaining tasks to another file")
+            self._logger.info(f"Processing {len(pending)} of {len(tasks)} "
+                              f"tasks with {self._workers} workers")
+            if pending:
+                self._process(pending, checkpoint, summary, start)
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
+        summary["seconds"] = time.monotonic() - start
+        summary["fps"] = summary["frames"] / summary["seconds"] \
+            if summary["seconds"] > 0 else 0.0
+        self._logger.info(f"Finished {summary}")
+        return summary
+
+    def _process(self, pending: List[Task], checkpoint: Optional[Checkpoint],
+                 summary: dict, start: float):
+        context = multiprocessing.get_context(
+            get_env_dict(self._system_config, "execution.start_method",
+                         "spawn"))
+        finished = []
+        last_report = last_checkpoint = time.monotonic()
+        tasks = iter(pending)
+        with ProcessPoolExecutor(self._workers, mp_context=context,
+                                 initializer=_init_worker,
+                                 initargs=(_worker_config(
+                                     self._system_config),
+                                     self._capture_config)) as executor:
+            # a few tasks per worker are queued, so the results don't pile
+            # up in memory
+            running = set()
+            while True:
+                for task in tasks:
+                    running.add(executor.submit(_run_task, task))
+                    if len(running) >= 2 * self._workers:
+                        break
+                if not running:
+                    break
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task_id, results, error = future.result()
+                    if error is not None:
+                        summary["failed"] += 1
+                        self._logger.error(f"{task_id} failed: {error}")
+                        continue
+                    for stream, frame, inference in results:
+                        self._sink.write(inference, stream, frame)
+                    summary["done"] += 1
+                    summary["frames"] += len(results)
+                    finished.append(task_id)
+                now = time.monotonic()
+                if checkpoint is not None and finished \
+                        and now - last_checkpoint >= self._report_interval:
+                    # the results must be on disk before their tasks count
+                    # as finished
+                    self._sink.flush()
+                    checkpoint.mark(finished)
+                    finished = []
+                    last_checkpoint = now
+                if now - last_report >= self._report_interval:
+                    self._logger.info(
+                        f"{summary['done'] + summary['failed']}/"
+                        f"{len(pending)} tasks, {summary['frames']} frames, "
+                        f"{summary['frames'] / (now - start):.1f} fps")
+                    last_report = now
+        if checkpoint is not None and finished:
+            self._sink.flush()
+            checkpoint.mark(finished)
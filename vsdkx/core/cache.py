@@ -0,0 +1,314 @@
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from numpy import ndarray
+
+from vsdkx.core.structs import Inference
+from vsdkx.core.util.codec import decode_inference, encode_inference, \
+    jsonable
+from vsdkx.core.util.io import get_env_dict
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+LOG_TAG = "ResultCache"
+
+KEY_SIZE = 16
+
+# key and length of the encoded inference before each entry of the file
+_ENTRY = struct.Struct(f"<{KEY_SIZE}sI")
+
+
+def fingerprint(*configs) -> bytes:
+    """
+    Digest of configs, for cache keys which change with the config
+
+    Args:
+        configs: JSON serializable config values
+
+    Returns:
+        (bytes): the digest
+    """
+    text = json.dumps(configs, sort_keys=True, default=jsonable)
+    return hashlib.blake2b(text.encode(), digest_size=KEY_SIZE).digest()
+
+
+class _DiskTier:
+    """
+    Append only file of encoded inferences, read through mmap. The index is
+    rebuilt from the entry headers when the file is opened, so the entries
+    survive restarts. When the file would grow past max_bytes it is emptied.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self._path = path
+        self._max_bytes = max_bytes
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a+b")
+        self._map: Optional[mmap.mmap] = None
+        self._index: Dict[bytes, Tuple[int, int]] = {}
+        self._size = os.path.getsize(path)
+        self._remap()
+        offset = 0
+        while offset + _ENTRY.size <= self._size:
+            key, length = _ENTRY.unpack_from(self._map, offset)
+            offset += _ENTRY.size
+            if offset + length > self._size:
+                break
+            self._index[key] = (offset, length)
+            offset += length
+        if offset != self._size:
+            # an entry was cut off while writing
+            self._file.truncate(offset)
+            self._size = offset
+            self._remap()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def _remap(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._size:
+            self._map = mmap.mmap(self._file.fileno(), self._size,
+                                  access=mmap.ACCESS_READ)
+
+    def get(self, key: bytes) -> Optional[memoryview]:
+        location = self._index.get(key)
+        if location is None:
+            return None
+        offset, length = location
+        return memoryview(self._map)[offset:offset + length]
+
+    def put(self, key: bytes, encoded: bytes):
+        if key in self._index:
+            return
+        length = _ENTRY.size + len(encoded)
+        if self._size + length > self._max_bytes:
+            self.clear()
+            if length > self._max_bytes:
+                return
+        self._file.seek(0, os.SEEK_END)
+        self._file.write(_ENTRY.pack(key, len(encoded)))
+        self._file.write(encoded)
+        self._file.flush()
+        self._index[key] = (self._size + _ENTRY.size, len(encoded))
+        self._size += length
+        self._remap()
+
+    def clear(self):
+        self._index.clear()
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.truncate(0)
+        self._size = 0
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+
+class ResultCache:
+    """
+    Cache of model outputs keyed by a digest of the preprocessed frame and a
+    fingerprint of the config, so frames seen before, e.g. the same image or
+    a replayed clip, skip the model. The addons still run on every frame.
+
+    The frames are hashed with xxhash when the optional xxhash package is
+    installed and with blake2b otherwise. Entries are kept encoded with
+    vsdkx.core.util.codec in memory, the least recently used ones are
+    evicted when there are more than max_entries or they take more than
+    max_bytes. With path they are also written to a file, which is memory
+    mapped and read when an entry is not in memory any more or after a
+    restart. Arrays in the extra of cached inferences come back as lists.
+
+    Attributes:
+        hits (int): lookups answered from memory or the file
+        misses (int): lookups which needed the model
+    """
+
+    def __init__(self,
+                 max_entries: int = 1024,
+                 max_bytes: int = 64 * 2 ** 20,
+                 path: str = None,
+                 disk_bytes: int = 2 ** 30):
+        """
+        Initialize with the limits
+
+        Args:
+            max_entries (int): maximum number of entries in memory
+            max_bytes (int): maximum size of the entries in memory
+            path (str): file of the disk tier, no disk tier when None
+            disk_bytes (int): size at which the file is emptied
+        """
+        if max_entries <= 0 or max_bytes <= 0:
+            raise ValueError("max_entries and max_bytes must be positive")
+        self._logger = logging.getLogger(LOG_TAG)
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._entries: "OrderedDict[bytes, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._disk = None if path is None else _DiskTier(path, disk_bytes)
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if self._disk is not None:
+            self._logger.info(f"Opened {path} with {len(self._disk)} "
+                              f"entries")
+
+    @classmethod
+    def from_config(cls, system_config: dict) -> Optional["ResultCache"]:
+        """
+        Create the cache from the model.cache section
+
+        Args:
+            system_config: the config dictionary
+
+        Returns:
+            (ResultCache): the cache, None without the section
+        """
+        config = get_env_dict(system_config, "model.cache")
+        if not config:
+            return None
+        return cls(**(config if isinstance(config, dict) else {}))
+
+    @staticmethod
+    def key(frame: ndarray, config_fingerprint: bytes = b"") -> bytes:
+        """
+        Digest of the pixels, shape and dtype of frame and the fingerprint
+
+        Args:
+            frame (ndarray): the preprocessed frame
+            config_fingerprint (bytes): the fingerprint of the config
+
+        Returns:
+            (bytes): the key
+        """
+        frame = np.ascontiguousarray(frame)
+        header = f"{frame.shape}{frame.dtype}".encode() + config_fingerprint
+        if xxhash is not None:
+            digest = xxhash.xxh3_128(header)
+        else:
+            digest = hashlib.blake2b(header, digest_size=KEY_SIZE)
+        digest.update(memoryview(frame.reshape(-1).view(np.uint8)))
+        return digest.digest()
+
+    def get(self, key: bytes) -> Optional[Inference]:
+        """
+        Look key up, in memory first and then in the file
+
+        Args:
+            key (bytes): the key of the frame
+
+        Returns:
+            (Inference): a copy of the cached inference which may be
+            modified, None on a miss
+        """
+        with self._lock:
+            encoded = self._entries.get(key)
+            if encoded is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return decode_inference(bytearray(encoded))
+            if self._disk is not None:
+                view = self._disk.get(key)
+                if view is not None:
+                    encoded = bytes(view)
+                    view.release()
+                    self._insert(key, encoded)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return decode_inference(bytearray(encoded))
+            self.misses += 1
+            return None
+
+    def put(self, key: bytes, inference: Inference):
+        """
+        Cache inference, it is encoded right away so it may be modified
+        afterwards
+
+        Args:
+            key (bytes): the key of the frame
+            inference (Inference): the model output of the frame
+        """
+        try:
+            encoded = b"".join(encode_inference(inference))
+        except (TypeError, ValueError) as e:
+            self._logger.debug(f"Not caching an inference: {e}")
+            return
+        with self._lock:
+            self._insert(key, encoded)
+            if self._disk is not None:
+                self._disk.put(key, encoded)
+
+    def _insert(self, key: bytes, encoded: bytes):
+        # called with the lock held
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= len(previous)
+        if len(encoded) > self._max_bytes:
+            return
+        self._entries[key] = encoded
+        self._bytes += len(encoded)
+        while len(self._entries) > self._max_entries \
+                or self._bytes > self._max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            (dict): hits, misses, evictions and the size of both tiers
+        """
+        with self._lock:
+            stats = {"hits": self.hits,
+                     "disk_hits": self.disk_hits,
+                     "misses": self.misses,
+                     "evictions": self.evictions,
+                     "entries": len(self._entries),
+                     "bytes": self._bytes}
+            if self._disk is not None:
+                stats["disk_entries"] = len(self._disk)
+                stats["disk_bytes"] = self._disk.size
+        return stats
+
+    def clear(self):
+        """
+        Drop all the entries, also from the file
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if self._disk is not None:
+                self._disk.clear()
+
+    def close(self):
+        """
+        Close the file of the disk tier
+        """
+        with self._lock:
+            if self._disk is not None:
+                self._disk.close()
+                self._disk = None
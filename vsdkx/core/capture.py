@@ -0,0 +1,281 @@
+import logging
+from typing import Optional, Tuple, Union
+
+import cv2
+from numpy import ndarray
+
+LOG_TAG = "Capture"
+
+# OpenCV backend names accepted in capture.api
+APIS = {
+    "any": "CAP_ANY",
+    "ffmpeg": "CAP_FFMPEG",
+    "gstreamer": "CAP_GSTREAMER",
+    "v4l2": "CAP_V4L2",
+    "msmf": "CAP_MSMF",
+    "dshow": "CAP_DSHOW",
+    "avfoundation": "CAP_AVFOUNDATION",
+}
+
+
+def _resize(frame: ndarray, scale: float,
+            image: Optional[ndarray]) -> ndarray:
+    # resizes into image when it has the right shape
+    height = max(int(frame.shape[0] * scale), 1)
+    width = max(int(frame.shape[1] * scale), 1)
+    if image is None or image.shape[:2] != (height, width) \
+            or image.shape[2:] != frame.shape[2:] \
+            or image.dtype != frame.dtype:
+        image = None
+    return cv2.resize(frame, (width, height), dst=image,
+                      interpolation=cv2.INTER_AREA)
+
+
+class OpenCVCapture:
+    """
+    cv2.VideoCapture with a configurable backend and decoder settings. It is
+    a drop in replacement of cv2.VideoCapture for the runners, read returns
+    (status, frame) and can decode into a given image.
+
+    With scale the frames are shrunk right after decoding, and with skip
+    only every skip + 1-th frame is decoded, the frames in between are
+    grabbed without being decoded into an image.
+    """
+
+    def __init__(self,
+                 source: Union[str, int],
+                 api: str = "any",
+                 threads: int = None,
+                 buffer_size: int = None,
+                 hw_acceleration: bool = False,
+                 scale: float = 1.0,
+                 skip: int = 0):
+        """
+        Initialize with source
+
+        Args:
+            source (str|int): video path, url or camera index
+            api (str): OpenCV backend, one of APIS
+            threads (int): decoder threads, OpenCV's default when None
+            buffer_size (int): frames buffered by the backend, a small value
+            keeps the latency of live cameras low
+            hw_acceleration (bool): decode on the GPU when the backend
+            supports it
+            scale (float): factor the frames are resized with
+            skip (int): frames grabbed and dropped after each read frame
+        """
+        if api not in APIS:
+            raise ValueError(f"Unknown capture api {api}")
+        if scale <= 0 or skip < 0:
+            raise ValueError("scale must be positive and skip must not be "
+                             "negative")
+        self._logger = logging.getLogger(LOG_TAG)
+        self.scale = scale
+        self.skip = skip
+        # decoder settings must be passed when opening, older OpenCV
+        # versions without them only get the backend
+        params = []
+        if threads is not None and hasattr(cv2, "CAP_PROP_N_THREADS"):
+            params += [cv2.CAP_PROP_N_THREADS, threads]
+        if hw_acceleration and hasattr(cv2, "CAP_PROP_HW_ACCELERATION"):
+            params += [cv2.CAP_PROP_HW_ACCELERATION,
+                       cv2.VIDEO_ACCELERATION_ANY]
+        backend = getattr(cv2, APIS[api], cv2.CAP_ANY)
+        if params:
+            self._capture = cv2.VideoCapture(source, backend, params)
+        else:
+            self._capture = cv2.VideoCapture(source, backend)
+        if buffer_size is not None:
+            self._capture.set(cv2.CAP_PROP_BUFFERSIZE, buffer_size)
+        if self.isOpened():
+            self._logger.info(f"Opened {source} with "
+                              f"{self._capture.getBackendName()}")
+
+    def isOpened(self) -> bool:
+        return self._capture.isOpened()
+
+    def read(self, image: ndarray = None) -> Tuple[bool, Optional[ndarray]]:
+        """
+        Decode the next frame
+
+        Args:
+            image: array to decode into when it has the frame's shape
+
+        Returns:
+            (bool, ndarray): whether a frame was read and the frame
+        """
+        for _ in range(self.skip):
+            if not self._capture.grab():
+                return False, None
+        if self.scale == 1.0:
+            return self._capture.read(image)
+        status, frame = self._capture.read()
+        if not status:
+            return False, None
+        return True, _resize(frame, self.scale, image)
+
+    def get(self, prop: int) -> float:
+        return self._capture.get(prop)
+
+    def seek(self, index: int):
+        """
+        Continue reading at frame index of a video file
+
+        Args:
+            index (int): index of the next frame read
+        """
+        self._capture.set(cv2.CAP_PROP_POS_FRAMES, index)
+
+    def release(self):
+        self._capture.release()
+
+
+class PyAVCapture:
+    """
+    Capture decoding with PyAV, which needs the optional av package. FFmpeg
+    decodes on its own threads and scales while converting to BGR, and with
+    keyframes_only all the other frames are skipped by the decoder.
+    """
+
+    def __init__(self,
+                 source: Union[str, int],
+                 threads: int = None,
+                 scale: float = 1.0,
+                 keyframes_only: bool = False,
+                 options: dict = None):
+        """
+        Initialize with source
+
+        Args:
+            source (str|int): video path or url, camera indexes are not
+            supported
+            threads (int): decoder threads, chosen by FFmpeg when None
+            scale (float): factor the frames are resized with
+            keyframes_only (bool): decode only the keyframes
+            options (dict): FFmpeg options of the input, e.g.
+            {"rtsp_transport": "tcp"}
+        """
+        try:
+            import av
+        except ImportError:
+            raise ImportError("The pyav capture backend needs the av "
+                              "package, install it with pip install av")
+        if scale <= 0:
+            raise ValueError("scale must be positive")
+        self._logger = logging.getLogger(LOG_TAG)
+        self.scale = scale
+        self._container = av.open(str(source), options=options or {})
+        stream = self._container.streams.video[0]
+        stream.thread_type = "AUTO"
+        if threads is not None:
+            stream.codec_context.thread_count = threads
+        if keyframes_only:
+            stream.codec_context.skip_frame = "NONKEY"
+        self._frames = self._container.decode(stream)
+        self._pending = None
+        # index of the next frame, like CAP_PROP_POS_FRAMES of OpenCV
+        self._position = 0
+        self._opened = True
+        self._logger.info(f"Opened {source} with PyAV")
+
+    def isOpened(self) -> bool:
+        return self._opened
+
+    def read(self, image: ndarray = None) -> Tuple[bool, Optional[ndarray]]:
+        """
+        Decode the next frame. PyAV always allocates the frame, image is
+        accepted for compatibility with OpenCVCapture.
+
+        Args:
+            image: ignored
+
+        Returns:
+            (bool, ndarray): whether a frame was read and the frame
+        """
+        if not self._opened:
+            return False, None
+        frame, self._pending = self._pending, None
+        if frame is None:
+            try:
+                frame = next(self._frames)
+            except StopIteration:
+                return False, None
+        self._position = self._index(frame) + 1
+        if self.scale == 1.0:
+            return True, frame.to_ndarray(format="bgr24")
+        return True, frame.to_ndarray(
+            format="bgr24",
+            width=max(int(frame.width * self.scale), 1),
+            height=max(int(frame.height * self.scale), 1))
+
+    def _index(self, frame) -> int:
+        # the index of frame from its timestamp, so skipped frames and
+        # inexact seeks are accounted for
+        stream = self._container.streams.video[0]
+        if frame.pts is None or not stream.average_rate \
+                or not stream.time_base:
+            return self._position
+        return int(round((frame.pts - (stream.start_time or 0))
+                         * stream.time_base * stream.average_rate))
+
+    def get(self, prop: int) -> float:
+        stream = self._container.streams.video[0]
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self._position)
+        if prop == cv2.CAP_PROP_FPS:
+            return float(stream.average_rate or 0)
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return float(stream.frames)
+        return 0.0
+
+    def seek(self, index: int):
+        """
+        Continue reading at frame index of a video file. FFmpeg seeks to the
+        keyframe before it and the frames up to index are decoded and
+        dropped.
+
+        Args:
+            index (int): index of the next frame read
+        """
+        stream = self._container.streams.video[0]
+        if not stream.average_rate or not stream.time_base:
+            raise ValueError("The video has no frame rate to seek with")
+        target = int(index / stream.average_rate / stream.time_base) \
+            + (stream.start_time or 0)
+        self._container.seek(target, stream=stream)
+        self._frames = self._container.decode(stream)
+        self._pending = None
+        self._position = index
+        for frame in self._frames:
+            if frame.pts is None or frame.pts >= target:
+                self._pending = frame
+                break
+
+    def release(self):
+        if self._opened:
+            self._container.close()
+            self._opened = False
+
+
+BACKENDS = {"opencv": OpenCVCapture, "pyav": PyAVCapture}
+
+
+def open_capture(source: Union[str, int], config: dict = None):
+    """
+    Open source with the backend of the capture config
+
+    Args:
+        source (str|int): video path, url or camera index
+        config (dict): the capture section of the system config, backend
+        selects opencv or pyav and the other keys except reuse_frames,
+        which is read by the runners, are the arguments of the backend
+
+    Returns:
+        (OpenCVCapture|PyAVCapture): the capture
+    """
+    config = dict(config or {})
+    backend = config.pop("backend", "opencv")
+    config.pop("reuse_frames", None)
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown capture backend {backend}")
+    return BACKENDS[backend](source, **config)
@@ -1,22 +1,119 @@
-import importlib
+import asyncio
+import copy
 import logging
+import multiprocessing
 import os
+import threading
 import time
-from dataclasses import asdict
+import weakref
+from typing import Generator, List, Optional, Sequence, Tuple
 
 import cv2
+import numpy as np
 from numpy import ndarray
 
+from vsdkx.core.cache import ResultCache, fingerprint
+from vsdkx.core.display import DebugDisplay
+from vsdkx.core.executors import SerialAddonExecutor, \
+    ProcessAddonExecutor, GraphAddonExecutor, RemoteAddon
 from vsdkx.core.interfaces import ModelDriver, Addon
-from vsdkx.core.structs import AddonObject, FrameObject
-from vsdkx.core.util import io
-from vsdkx.core.util.drawing import draw_zones, draw_boxes, show_window
+from vsdkx.core.metrics import Metrics
+from vsdkx.core.structs import AddonObject, FrameObject, Inference
+from vsdkx.core.registry import registry, MODEL_GROUP, ADDON_GROUP
+from vsdkx.core.roi import RegionOfInterest
+from vsdkx.core.scheduler import FrameScheduler
+from vsdkx.core.util.buffers import BufferPool
+from vsdkx.core.util.drawing import Renderer
 from vsdkx.core.util.io import get_env_dict
-from vsdkx.core.util.imp import import_default_settings
 from vsdkx.core.util.model import box_sanity_check
 
 LOG_TAG = "EventDetector"
 
+# attributes derived from the system config which are replaced by reload
+_CONFIG_ATTRIBUTES = ("startup_report", "_system_config", "_drawing_config",
+                      "_model_settings", "_model_config", "_addons_config",
+                      "_execution", "_start_method", "_threads")
+
+
+class _Pipeline:
+    """
+    The model driver, addons and addon executor of a detector and the
+    frame scheduler, region of interest, renderer and cache fingerprint
+    that go with them, which are swapped together by reload. A call reads
+    them only from the pipeline it acquired, so it finishes with the ones it
+    started with. It counts the calls using it, so a retired pipeline is
+    closed only after the calls in flight finished.
+    """
+
+    def __init__(self, model_driver: ModelDriver, addons: List[Addon],
+                 executor: SerialAddonExecutor,
+                 scheduler: Optional[FrameScheduler],
+                 roi: Optional[RegionOfInterest],
+                 renderer: Renderer,
+                 fingerprint: bytes):
+        self.model_driver = model_driver
+        self.addons = addons
+        self.executor = executor
+        self.scheduler = scheduler
+        self.roi = roi
+        self.renderer = renderer
+        self.fingerprint = fingerprint
+        self._lock = threading.Lock()
+        self._users = 0
+        self._retired = False
+
+    def acquire(self) -> bool:
+        with self._lock:
+            if self._retired:
+                return False
+            self._users += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self._users -= 1
+            close = self._retired and self._users == 0
+        if close:
+            self.close()
+
+    def retire(self):
+        with self._lock:
+            if self._retired:
+                return
+            self._retired = True
+            close = self._users == 0
+        if close:
+            self.close()
+
+    def close(self):
+        self.executor.close()
+
+
+def _warmup_frames(system_config: dict) -> List[ndarray]:
+    # synthetic frames of the shapes in model.warmup, random so that no
+    # shortcut for empty frames is taken
+    shapes = get_env_dict(system_config, "model.warmup.shapes", [])
+    count = get_env_dict(system_config, "model.warmup.frames", 3)
+    generator = np.random.default_rng(0)
+    return [generator.integers(0, 256, tuple(shape), dtype=np.uint8)
+            for shape in shapes for _ in range(count)]
+
+
+def _structure(system_config: dict) -> tuple:
+    # the parts of the config which need a new pipeline when they change
+    model = dict(get_env_dict(system_config, "model", {}))
+    model.pop("debug", None)
+    return (model,
+            get_env_dict(system_config, "addons", {}),
+            get_env_dict(system_config, "execution", {}))
+
+
+def _cache_fingerprint(system_config: dict, drawing_config: dict) -> bytes:
+    # the parts of the config the model output depends on, the zones crop
+    # the frames with model.roi
+    return fingerprint(_structure(system_config),
+                       drawing_config.get("zones"))
+
 
 class EventDetector:
     """
@@ -35,18 +132,69 @@ class EventDetector:
             in README.md file
         """
         self._logger = logging.getLogger(LOG_TAG)
-        model_class = get_env_dict(system_config,
-                                   "model.class")
+        self.metrics = Metrics(get_env_dict(system_config,
+                                            "metrics.enabled",
+                                            False),
+                               get_env_dict(system_config,
+                                            "metrics.window",
+                                            1024))
+        self.ready = False
+        self._forked = False
+        self._closed = False
+        # the live forks, reload swaps their pipelines as well
+        self._forks = weakref.WeakSet()
+        self.display = DebugDisplay.from_config(system_config)
+        self.buffer_pool = BufferPool(get_env_dict(system_config,
+                                                   "model.buffers",
+                                                   8))
+        self.cache = ResultCache.from_config(system_config)
+        metrics_port = get_env_dict(system_config, "metrics.port")
+        if metrics_port is not None:
+            self.metrics.serve(int(metrics_port),
+                               get_env_dict(system_config, "metrics.host",
+                                            "127.0.0.1"),
+                               ready=lambda: self.ready)
+        self._swap_lock = threading.Lock()
+        self._pipeline = self._load(system_config)
+        self.warm_up(_warmup_frames(system_config))
+        self.ready = True
+
+    @property
+    def model_driver(self) -> ModelDriver:
+        return self._pipeline.model_driver
+
+    @property
+    def addons(self) -> List[Addon]:
+        return self._pipeline.addons
+
+    @property
+    def _addon_executor(self) -> SerialAddonExecutor:
+        return self._pipeline.executor
+
+    @property
+    def scheduler(self) -> Optional[FrameScheduler]:
+        return self._pipeline.scheduler
+
+    @property
+    def roi(self) -> Optional[RegionOfInterest]:
+        return self._pipeline.roi
+
+    def _load(self, system_config: dict) -> _Pipeline:
+        # reads the config and creates the model driver and the addons
+        startup_stamp = time.perf_counter()
+        self.startup_report = {}
+        self._system_config = system_config
+        model_class = registry.resolve(get_env_dict(system_config,
+                                                    "model.class"),
+                                       MODEL_GROUP)
         model_default_settings = get_env_dict(
             system_config,
             "model.default_settings",
             '.'.join(model_class.split('.')[:-2]) + '.settings.DEFAULT')
 
-        try:
-            default_settings = import_default_settings(model_default_settings)
-        except Exception as e:
-            self._logger.error(e)
-            default_settings = {}
+        stamp = time.perf_counter()
+        default_settings = registry.default_settings(model_default_settings)
+        settings_time = time.perf_counter() - stamp
 
         model_settings = get_env_dict(system_config,
                                       "model.settings")
@@ -58,17 +206,32 @@ class EventDetector:
                                    "model.debug",
                                    False)
         self._drawing_config = get_env_dict(system_config, "drawing", {})
-        profile_path = os.path.join("vsdkx", "model", "profile.yaml")
-        profile = io.import_yaml(profile_path)
-        model_config = get_env_dict(profile, model_profile)
-        module_name, class_name = model_class.rsplit(".", 1)
-        module = importlib.import_module(module_name)
-        class_ = getattr(module, class_name)
-        self.model_driver: ModelDriver = class_({**default_settings,
-                                                 **model_settings},
-                                                model_config,
-                                                self._drawing_config)
-        self._logger.info(f"Loaded driver {self.model_driver}, "
+        model_config = {}
+        if model_profile is not None:
+            stamp = time.perf_counter()
+            profile = registry.profile(get_env_dict(
+                system_config,
+                "model.profile_path",
+                os.path.join("vsdkx", "model", "profile.yaml")))
+            model_config = get_env_dict(profile, model_profile)
+            self.startup_report["profile"] = {
+                "load": time.perf_counter() - stamp}
+        self._execution = get_env_dict(system_config,
+                                       "execution.addons",
+                                       "serial")
+        if self._execution not in ("serial", "process", "graph"):
+            raise ValueError(f"Unknown addons execution {self._execution}")
+        self._start_method = get_env_dict(system_config,
+                                          "execution.start_method",
+                                          "spawn")
+        self._threads = get_env_dict(system_config,
+                                     "execution.threads")
+        model_driver: ModelDriver = self._create_plugin(
+            "model", model_class, settings_time,
+            {**default_settings, **model_settings},
+            model_config,
+            self._drawing_config)
+        self._logger.info(f"Loaded driver {model_driver}, "
                           f"with settings {model_settings}, "
                           f"with config {model_config}, "
                           f"with drawing {self._drawing_config}")
@@ -79,89 +242,565 @@ class EventDetector:
                 f"These settings have been set by default"
                 f"{dict({**default_settings, **model_settings}.keys() - model_settings.keys())}"
             )
-        addons_config = get_env_dict(system_config,
-                                     "addons",
-                                     {})
-        self.addons: [Addon] = []
-        for _, config in addons_config.items():
-            class_loader = get_env_dict(config, "class")
+        self._addons_config = get_env_dict(system_config,
+                                           "addons",
+                                           {})
+        self._model_settings = model_settings
+        self._model_config = model_config
+        addons = self._load_addons()
+        pipeline = _Pipeline(model_driver, addons,
+                             self._create_executor(addons),
+                             FrameScheduler.from_config(system_config),
+                             RegionOfInterest.from_config(
+                                 system_config, self._drawing_config),
+                             Renderer(self._drawing_config),
+                             _cache_fingerprint(system_config,
+                                                self._drawing_config))
+        self.startup_report["total"] = time.perf_counter() - startup_stamp
+        self._logger.info(f"Started in {self.startup_report['total']:.3f}s "
+                          f"{self.startup_report}")
+        return pipeline
+
+    def warm_up(self, frames: Sequence[ndarray]):
+        """
+        Run frames through the model driver and the addons, so that graphs
+        are built, tensors are allocated and caches are filled before the
+        first real frame. Debug drawing is skipped and the durations are not
+        recorded in the metrics, and the result cache is not used. Model
+        drivers and addons with coroutine hooks are not warmed up, only
+        AsyncEventDetector can await those.
+
+        Args:
+            frames: the frames to detect on
+        """
+        if not frames:
+            return
+        pipeline = self._acquire()
+        try:
+            self._warm_up(pipeline, frames)
+        finally:
+            pipeline.release()
+
+    def _warm_up(self, pipeline: _Pipeline, frames: Sequence[ndarray]):
+        # the frames run on copies of the detector and pipeline, so neither
+        # the metrics, the cache or the scheduler of the running detector
+        # see them
+        hooks = [pipeline.model_driver.inference] + \
+            [getattr(addon, stage) for addon in pipeline.addons
+             for stage in ("pre_process", "post_process")]
+        if any(asyncio.iscoroutinefunction(hook) for hook in hooks):
+            self._logger.warning("Skipping the warm-up, the model driver or "
+                                 "addons have coroutine hooks")
+            return
+        stamp = time.perf_counter()
+        staged = copy.copy(self)
+        staged._debug = False
+        staged.metrics = Metrics()
+        staged.cache = None
+        warming = copy.copy(pipeline)
+        warming.scheduler = None
+        warming.executor = copy.copy(pipeline.executor)
+        warming.executor._metrics = staged.metrics
+        for frame in frames:
+            staged._detect(warming, frame, {})
+        self.startup_report["warmup"] = time.perf_counter() - stamp
+        self._logger.info(f"Warmed up with {len(frames)} frames in "
+                          f"{self.startup_report['warmup']:.3f}s")
+
+    def _create_plugin(self, label: str, class_path: str,
+                       settings_time: float, *args):
+        # creates a model driver or an addon and reports how long importing
+        # its settings and class and initializing it took
+        stamp = time.perf_counter()
+        class_ = registry.load_class(class_path)
+        import_time = time.perf_counter() - stamp
+        stamp = time.perf_counter()
+        if label != "model" and self._execution == "process" \
+                and class_.independent:
+            plugin = RemoteAddon(
+                class_path, args,
+                multiprocessing.get_context(self._start_method))
+        else:
+            plugin = class_(*args)
+        self.startup_report[label] = {"class": class_path,
+                                      "settings": settings_time,
+                                      "import": import_time,
+                                      "init": time.perf_counter() - stamp}
+        return plugin
+
+    def _load_addons(self) -> List[Addon]:
+        addons = []
+        for name, config in self._addons_config.items():
+            class_loader = registry.resolve(get_env_dict(config, "class"),
+                                            ADDON_GROUP)
 
             model_default_settings = get_env_dict(
                 config,
                 "default_settings",
                 '.'.join(class_loader.split('.')[:-2]) + '.settings.DEFAULT')
 
-            try:
-                default_addon_settings = import_default_settings(
-                    model_default_settings)
-            except Exception as e:
-                self._logger.error(e)
-                default_addon_settings = {}
-
-            module_name, class_name = class_loader.rsplit(".", 1)
-            module = importlib.import_module(module_name)
-            class_ = getattr(module, class_name)
-            self.addons.append(
-                class_({**default_addon_settings, **config},
-                       model_settings, model_config, self._drawing_config))
+            stamp = time.perf_counter()
+            default_addon_settings = registry.default_settings(
+                model_default_settings)
+            settings_time = time.perf_counter() - stamp
+
+            addons.append(self._create_plugin(
+                f"addons.{name}", class_loader, settings_time,
+                {**default_addon_settings, **config},
+                self._model_settings, self._model_config,
+                self._drawing_config))
             if len({**default_addon_settings, **config}.keys()
                    - config.keys()
                    ) > 0:
                 self._logger.info(
                     f"These addon settings have been set by default"
                     f"{dict({**default_addon_settings, **config}.keys() - config.keys())}")
-        self._logger.info(f"Loaded addons {self.addons}")
+        self._logger.info(f"Loaded addons {addons}")
+        return addons
+
+    def _create_executor(self, addons: List[Addon]) -> SerialAddonExecutor:
+        names = list(self._addons_config.keys())
+        if self._execution == "process":
+            return ProcessAddonExecutor(addons, names, self.metrics)
+        if self._execution == "graph":
+            return GraphAddonExecutor(addons, names, self.metrics,
+                                      self._threads)
+        return SerialAddonExecutor(addons, names, self.metrics)
+
+    def update_config(self, system_config: dict):
+        """
+        Apply a changed config. Changes of model.debug, metrics.enabled and
+        the drawing section are applied right away, the drawing dictionary
+        is updated in place so the model driver and the addons see the new
+        values as well. Other changes of the model, addons or execution
+        sections reload the pipeline in the background.
+
+        Args:
+            system_config: the new config dictionary
+        """
+        if _structure(system_config) != _structure(self._system_config):
+            self.reload(system_config)
+            return
+        self._system_config = system_config
+        self._debug = get_env_dict(system_config, "model.debug", False)
+        self.metrics.enabled = get_env_dict(system_config,
+                                            "metrics.enabled",
+                                            False)
+        drawing_config = get_env_dict(system_config, "drawing", {})
+        if drawing_config != self._drawing_config:
+            # the forks share the drawing dictionary
+            self._drawing_config.clear()
+            self._drawing_config.update(drawing_config)
+            fingerprint = _cache_fingerprint(system_config,
+                                             self._drawing_config)
+            for detector in [self, *self._live_forks()]:
+                detector._pipeline.fingerprint = fingerprint
+        self._logger.info(f"Updated config, debug {self._debug}, "
+                          f"drawing {self._drawing_config}")
+
+    def reload(self, system_config: dict, frames: Sequence[ndarray] = (),
+               wait: bool = False) -> threading.Thread:
+        """
+        Load a new model driver and addons from system_config in the
+        background, warm them up with frames, or the model.warmup frames
+        of system_config, and swap them in between two frames. The live
+        forks of the detector get new addons for the new model driver at
+        the same time. Calls of detect which already started finish with
+        the old model driver and addons, which are closed afterwards. If
+        loading fails the detector keeps running with the old ones.
+
+        Args:
+            system_config: the new config dictionary
+            frames: frames to run through the new pipeline before the swap
+            wait: block until the swap is done
+
+        Returns:
+            (threading.Thread): the thread loading the new pipeline
+        """
+        thread = threading.Thread(target=self._reload,
+                                  args=(system_config, list(frames)),
+                                  name="vsdkx-reload",
+                                  daemon=True)
+        thread.start()
+        if wait:
+            thread.join()
+        return thread
+
+    def _reload(self, system_config: dict, frames: List[ndarray]):
+        # the new pipelines are loaded on copies, so the running detector
+        # and its forks don't see any of their settings before the swap
+        staged = copy.copy(self)
+        pipeline = None
+        forks = []
+        try:
+            pipeline = staged._load(system_config)
+            staged._warm_up(pipeline,
+                            frames or _warmup_frames(system_config))
+            for fork in self._live_forks():
+                forks.append((fork, staged._make_fork(pipeline)))
+        except Exception as e:
+            self._logger.error(f"Keeping the running pipeline, loading the "
+                               f"new one failed: {e}")
+            for _, staged_fork in forks:
+                staged_fork._pipeline.close()
+            if pipeline is not None:
+                pipeline.close()
+            return
+        swaps = [(self, staged, pipeline)] + \
+            [(fork, staged_fork, staged_fork._pipeline)
+             for fork, staged_fork in forks]
+        for detector, source, new in swaps:
+            with detector._swap_lock:
+                if detector._closed:
+                    new.close()
+                    continue
+                for attribute in _CONFIG_ATTRIBUTES:
+                    setattr(detector, attribute, getattr(source, attribute))
+                detector._debug = get_env_dict(system_config, "model.debug",
+                                               False)
+                old, detector._pipeline = detector._pipeline, new
+            old.retire()
+        self._logger.info(f"Swapped to driver {pipeline.model_driver} and "
+                          f"addons {pipeline.addons}, and the addons of "
+                          f"{len(forks)} forks")
 
-    def detect(self, frame: ndarray, metadata: dict = {}) -> dict:
+    def _acquire(self) -> _Pipeline:
+        while True:
+            pipeline = self._pipeline
+            if pipeline.acquire():
+                return pipeline
+            # a pipeline retired by reload has been replaced already, one
+            # retired by close has not
+            if self._pipeline is pipeline:
+                raise RuntimeError("detector is closed")
+
+    def close(self):
+        """
+        Stop the worker processes and threads of the addons, the metrics
+        server and the debug display, if there are any. Forked detectors
+        only stop their own addons, the rest belongs to the original. Calls
+        of detect after close raise a RuntimeError.
+        """
+        with self._swap_lock:
+            self._closed = True
+        self._pipeline.retire()
+        if not self._forked:
+            self.metrics.close()
+            self.display.close()
+            if self.cache is not None:
+                self.cache.close()
+
+    def fork(self) -> "EventDetector":
+        """
+        Create a detector which shares the model driver of this one but has
+        its own addon instances and frame scheduler, so the addon state
+        (e.g. tracking) of different streams doesn't get mixed while the
+        model is loaded only once. A reload of this detector also reloads
+        the addons of its forks, and a fork should be closed when its stream
+        ends.
+
+        Returns:
+            (EventDetector): the new detector
+        """
+        forked = self._make_fork(self._pipeline)
+        self._forks.add(forked)
+        return forked
+
+    def _make_fork(self, pipeline: _Pipeline) -> "EventDetector":
+        # a copy with its own addons and scheduler which uses the model
+        # driver of pipeline, forks of forks are registered with the original
+        forked = copy.copy(self)
+        forked.startup_report = dict(self.startup_report)
+        forked._swap_lock = threading.Lock()
+        forked._forked = True
+        forked._closed = False
+        addons = forked._load_addons()
+        forked._pipeline = _Pipeline(
+            pipeline.model_driver, addons, forked._create_executor(addons),
+            FrameScheduler.from_config(forked._system_config),
+            pipeline.roi, pipeline.renderer, pipeline.fingerprint)
+        return forked
+
+    def _live_forks(self) -> List["EventDetector"]:
+        if self._forked:
+            return []
+        return [fork for fork in list(self._forks) if not fork._closed]
+
+    def detect(self, frame: ndarray, metadata: dict = {}) -> Inference:
         """
         method to use model driver to get the inference result and apply all
-        the addons to the frame and inference.
+        the addons to the frame and inference. With model.skip the model
+        output of an earlier frame may be reused, see FrameScheduler, and
+        with model.cache the one of an identical frame, see ResultCache.
+
+        Args:
+            frame: the frame data
+            metadata: the metadata dictionary
+
+        Returns:
+            (Inference): the inference result, it is not copied
+        """
+        pipeline = self._acquire()
+        try:
+            return self._detect(pipeline, frame, metadata)
+        finally:
+            pipeline.release()
+
+    def _detect(self, pipeline: _Pipeline, frame: ndarray,
+                metadata: dict) -> Inference:
+        detect_start = self.metrics.clock()
+        addon_object, frame_object = self._pre_process(pipeline, frame,
+                                                       metadata)
+        inference = self._schedule(pipeline, frame_object)
+        inference = self._post_process(pipeline, addon_object, frame_object,
+                                       inference)
+        self.metrics.record("detect", detect_start)
+        return inference
+
+    def _schedule(self, pipeline: _Pipeline,
+                  frame_object: FrameObject) -> Inference:
+        # the model output of the frame, reused by the scheduler or inferred
+        steps = self._infer_steps(pipeline, frame_object)
+        inference = None
+        try:
+            while True:
+                inference = pipeline.model_driver.inference(
+                    steps.send(inference))
+        except StopIteration as stop:
+            return stop.value
+
+    async def _schedule_async(self, pipeline: _Pipeline,
+                              frame_object: FrameObject) -> Inference:
+        # _schedule for model drivers with coroutine inference
+        steps = self._infer_steps(pipeline, frame_object)
+        inference = None
+        try:
+            while True:
+                inference = await pipeline.model_driver.inference(
+                    steps.send(inference))
+        except StopIteration as stop:
+            return stop.value
+
+    def _infer_steps(self, pipeline: _Pipeline,
+                     frame_object: FrameObject
+                     ) -> Generator[FrameObject, Inference, Inference]:
+        # the scheduler, cache and region of interest around the model
+        # driver, without calling it: yields the frame objects to infer, is
+        # sent their inferences and returns the model output of the frame
+        scheduler = pipeline.scheduler
+        if scheduler is not None:
+            inference = scheduler.reuse(frame_object.frame)
+            if inference is not None:
+                return inference
+        key, inference = self._lookup(pipeline, frame_object)
+        if inference is None:
+            start = self.metrics.clock()
+            roi = pipeline.roi
+            if roi is None:
+                inference = yield frame_object
+            else:
+                inferences = []
+                for crop in roi.crop(frame_object):
+                    inferences.append((yield crop))
+                inference = roi.merge(frame_object.frame.shape, inferences)
+            self.metrics.record("inference", start)
+            if key is not None:
+                self.cache.put(key, inference)
+        if scheduler is not None:
+            scheduler.update(frame_object.frame, inference)
+        return inference
+
+    def _lookup(self, pipeline: _Pipeline, frame_object: FrameObject) -> tuple:
+        # the cache key of the frame for the model driver of pipeline and the
+        # cached inference, if any
+        if self.cache is None:
+            return None, None
+        start = self.metrics.clock()
+        key = self.cache.key(frame_object.frame, pipeline.fingerprint)
+        inference = self.cache.get(key)
+        self.metrics.record("cache_lookup", start)
+        self.metrics.count("cache_miss" if inference is None
+                           else "cache_hit")
+        return key, inference
+
+    def detect_batch(self, frames: List[ndarray],
+                     metadatas: List[dict] = None,
+                     detectors: List["EventDetector"] = None
+                     ) -> List[Inference]:
+        """
+        method to run a batch of frames through the model driver with a single
+        inference_batch call. Addons are still applied to each frame
+        separately and in the same order as in detect. Frames skipped by
+        model.skip or found in the result cache are left out of the batch.
+
+        Args:
+            frames: list of frame data
+            metadatas: list of metadata dictionaries, one for each frame
+            detectors: forks of this detector, one for each frame, whose
+            addons and scheduler process the frame, this detector by
+            default. The model driver of this detector infers all of them.
+
+        Returns:
+            (List[Inference]): the inference results in the same order as
+            frames
+        """
+        if metadatas is None:
+            metadatas = [{} for _ in frames]
+        if detectors is None:
+            detectors = [self] * len(frames)
+        if len(metadatas) != len(frames) or len(detectors) != len(frames):
+            raise ValueError(f"Got {len(frames)} frames but "
+                             f"{len(metadatas)} metadatas and "
+                             f"{len(detectors)} detectors")
+        pipelines = {}
+        try:
+            pipeline = pipelines[id(self)] = self._acquire()
+            for detector in detectors:
+                if id(detector) not in pipelines:
+                    pipelines[id(detector)] = detector._acquire()
+            prepared = [detector._pre_process(pipelines[id(detector)], frame,
+                                              metadata)
+                        for detector, frame, metadata
+                        in zip(detectors, frames, metadatas)]
+            # a scheduler can only reuse inferences of earlier batches, so
+            # after its first frame to infer the rest of the batch is inferred
+            inferring = set()
+            lookups = []
+            scheduled = []
+            for detector, (_, frame_object) in zip(detectors, prepared):
+                scheduler = pipelines[id(detector)].scheduler
+                if scheduler is not None and id(detector) not in inferring:
+                    inference = scheduler.reuse(frame_object.frame)
+                    if inference is not None:
+                        lookups.append((None, inference))
+                        scheduled.append(False)
+                        continue
+                if scheduler is not None:
+                    inferring.add(id(detector))
+                # the model driver of this detector infers the frame
+                lookups.append(self._lookup(pipeline, frame_object))
+                scheduled.append(scheduler is not None)
+            missing = [frame_object
+                       for (_, frame_object), (_, inference)
+                       in zip(prepared, lookups) if inference is None]
+            computed = iter(self._infer_batch(pipeline, missing)
+                            if missing else ())
+            inferences = []
+            for detector, (_, frame_object), (key, inference), update \
+                    in zip(detectors, prepared, lookups, scheduled):
+                if inference is None:
+                    inference = next(computed)
+                    if key is not None:
+                        self.cache.put(key, inference)
+                if update:
+                    pipelines[id(detector)].scheduler.update(
+                        frame_object.frame, inference)
+                inferences.append(inference)
+            return [detector._post_process(pipelines[id(detector)],
+                                           addon_object, frame_object,
+                                           inference)
+                    for detector, (addon_object, frame_object), inference
+                    in zip(detectors, prepared, inferences)]
+        finally:
+            for acquired in pipelines.values():
+                acquired.release()
+
+    def _infer_batch(self, pipeline: _Pipeline,
+                     frame_objects: List[FrameObject]) -> List[Inference]:
+        start = self.metrics.clock()
+        roi = pipeline.roi
+        if roi is None:
+            inferences = pipeline.model_driver.inference_batch(frame_objects)
+        else:
+            crops = [roi.crop(frame_object)
+                     for frame_object in frame_objects]
+            results = pipeline.model_driver.inference_batch(
+                [crop for frame_crops in crops for crop in frame_crops])
+            inferences = []
+            for frame_object, frame_crops in zip(frame_objects, crops):
+                inferences.append(roi.merge(
+                    frame_object.frame.shape,
+                    results[:len(frame_crops)]))
+                results = results[len(frame_crops):]
+        self.metrics.record("inference_batch", start)
+        if len(inferences) != len(frame_objects):
+            raise ValueError(f"Model driver returned {len(inferences)} "
+                             f"inferences for {len(frame_objects)} frames")
+        return inferences
+
+    def pre_process(self, frame: ndarray,
+                    metadata: dict) -> Tuple[AddonObject, FrameObject]:
+        """
+        Apply pre_process of all the addons to the frame
 
         Args:
             frame: the frame data
             metadata: the metadata dictionary
 
         Returns:
-            (dict): the dictionary which hase inference result in
+            (AddonObject, FrameObject): the addon object to pass to
+            post_process and the frame object for the model driver
         """
-        addon_stamp = time.time()
+        return self._pre_process(self._pipeline, frame, metadata)
+
+    def _pre_process(self, pipeline: _Pipeline, frame: ndarray,
+                     metadata: dict) -> Tuple[AddonObject, FrameObject]:
+        start = self.metrics.clock()
         addon_object = AddonObject(frame=frame, inference=None,
-                                   shared=metadata)
-        for addon in self.addons:
-            stamp = time.time()
-            addon_object = addon.pre_process(addon_object)
-            self._logger.debug(f"{addon} preprocessed in "
-                               f"{time.time() - stamp}")
-        self._logger.debug(f"All addons preprocessed in "
-                           f"{time.time() - addon_stamp}")
-        frame = addon_object.frame
-        stamp = time.time()
-        frame_object = FrameObject(frame, metadata)
-        inference = self.model_driver.inference(frame_object)
-        inference.boxes = box_sanity_check(inference.boxes,
-                                           frame.shape[1],
-                                           frame.shape[0])
-        self._logger.debug(f"Inference result in "
-                           f"{time.time() - stamp}")
-        addon_stamp = time.time()
+                                   shared=metadata,
+                                   buffers=self.buffer_pool.lease())
+        addon_object = pipeline.executor.pre_process(addon_object)
+        self.metrics.record("pre_process", start)
+        return addon_object, FrameObject(addon_object.frame, metadata)
+
+    def post_process(self, addon_object: AddonObject,
+                     frame_object: FrameObject,
+                     inference: Inference) -> Inference:
+        """
+        Sanitize the boxes of the inference and apply post_process of all the
+        addons to it
+
+        Args:
+            addon_object: the addon object returned by pre_process
+            frame_object: the frame object passed to the model driver
+            inference: the result of the model driver for frame_object
+
+        Returns:
+            (Inference): the inference result, it is not copied
+        """
+        return self._post_process(self._pipeline, addon_object, frame_object,
+                                  inference)
+
+    def _post_process(self, pipeline: _Pipeline, addon_object: AddonObject,
+                      frame_object: FrameObject,
+                      inference: Inference) -> Inference:
+        self._sanitize(frame_object, inference)
+        start = self.metrics.clock()
         addon_object.inference = inference
-        for addon in self.addons:
-            stamp = time.time()
-            addon_object = addon.post_process(addon_object)
-            self._logger.debug(f"{addon} post processed in "
-                               f"{time.time() - stamp}")
-
-        self._logger.debug(f"All addons post processed in "
-                           f"{time.time() - addon_stamp} {inference}")
+        addon_object = pipeline.executor.post_process(addon_object)
+        self.metrics.record("post_process", start)
+        return self._finish(pipeline, addon_object, frame_object)
+
+    def _sanitize(self, frame_object: FrameObject, inference: Inference):
+        start = self.metrics.clock()
+        inference.boxes = box_sanity_check(inference.boxes,
+                                           frame_object.frame.shape[1],
+                                           frame_object.frame.shape[0],
+                                           inplace=True)
+        self.metrics.record("box_sanity_check", start)
+
+    def _finish(self, pipeline: _Pipeline, addon_object: AddonObject,
+                frame_object: FrameObject) -> Inference:
+        frame = frame_object.frame
         inference = addon_object.inference
         frame_object.frame = addon_object.frame
         if self._debug:
-            draw_zones(self._drawing_config, addon_object.frame)
-            draw_boxes(self._drawing_config,
-                       addon_object.frame,
-                       inference.boxes,
-                       inference.scores,
-                       inference.classes)
-            self.model_driver.draw(frame_object, inference)
-            show_window(frame)
-        return asdict(inference)
+            pipeline.renderer.render(addon_object.frame,
+                                     inference.boxes,
+                                     inference.scores,
+                                     inference.classes)
+            pipeline.model_driver.draw(frame_object, inference)
+            self.display.show(frame)
+        if addon_object.buffers is not None:
+            addon_object.buffers.release()
+        return inference
@@ -0,0 +1,186 @@
+import atexit
+import logging
+import threading
+import time
+from typing import Optional
+
+import cv2
+from numpy import ndarray
+
+from vsdkx.core.util.io import get_env_dict
+from vsdkx.core.util.queues import DropOldestQueue
+
+LOG_TAG = "DebugDisplay"
+
+MODES = ("window", "video", "mjpeg")
+
+_STOP = object()
+
+
+class DebugDisplay:
+    """
+    Shows or records the annotated debug frames on its own thread. show
+    copies the frame into a small queue which drops the oldest frame when
+    the consumer falls behind, so the detector never waits for the window or
+    the encoder.
+
+    The window mode opens an OpenCV window, video writes the frames with
+    cv2.VideoWriter to path and mjpeg appends them as JPEG images to path,
+    which can be played with ffplay or VLC. The last two work headless.
+    close finishes the file, it is also called at exit when the display
+    wasn't closed, since a video without its trailer can't be played.
+    """
+
+    def __init__(self,
+                 mode: str = "window",
+                 path: str = None,
+                 fps: float = None,
+                 queue_size: int = 2,
+                 fourcc: str = "mp4v",
+                 quality: int = 80):
+        """
+        Initialize with mode
+
+        Args:
+            mode (str): window, video or mjpeg
+            path (str): output file of video and mjpeg
+            fps (float): maximum frames per second that are shown or
+            recorded, further frames are skipped, by default unlimited for
+            window and 5 otherwise
+            queue_size (int): number of frames waiting for the consumer
+            fourcc (str): codec of video
+            quality (int): JPEG quality of mjpeg
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown display mode {mode}")
+        if mode != "window" and path is None:
+            raise ValueError(f"The {mode} display needs a path")
+        self._logger = logging.getLogger(LOG_TAG)
+        self.mode = mode
+        self.path = path
+        self._interval = 1.0 / fps if fps \
+            else 0.0 if mode == "window" else 0.2
+        self._fourcc = fourcc
+        self._quality = quality
+        self._frames = DropOldestQueue(queue_size)
+        self._last = 0.0
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.frames_shown = 0
+
+    @classmethod
+    def from_config(cls, system_config: dict) -> "DebugDisplay":
+        """
+        Create the display from the display section, a window when there is
+        none
+
+        Args:
+            system_config: the config dictionary
+
+        Returns:
+            (DebugDisplay): the display
+        """
+        return cls(**get_env_dict(system_config, "display", {}))
+
+    @property
+    def frames_dropped(self) -> int:
+        """
+        Number of frames dropped because the consumer fell behind
+        """
+        return self._frames.dropped
+
+    def show(self, frame: ndarray):
+        """
+        Queue a copy of frame, unless the last one was queued less than
+        1 / fps seconds ago
+
+        Args:
+            frame (ndarray): the annotated frame
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._closed or now - self._last < self._interval:
+                return
+            self._last = now
+        copy = frame.copy()
+        # putting under the lock keeps frames from arriving after the stop
+        with self._lock:
+            if self._closed:
+                return
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run,
+                                                name="vsdkx-display",
+                                                daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+            self._frames.put(copy)
+
+    def close(self):
+        """
+        Show the queued frames and close the window or the file
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+            if thread is not None:
+                self._frames.put(_STOP)
+        if thread is not None:
+            thread.join()
+            atexit.unregister(self.close)
+
+    def _run(self):
+        output = None
+        try:
+            while True:
+                frame = self._frames.get()
+                if frame is _STOP:
+                    break
+                if output is None:
+                    output = self._open(frame)
+                self._write(output, frame)
+                self.frames_shown += 1
+        except Exception as e:
+            self._logger.error(f"Debug {self.mode} failed: {e}")
+        finally:
+            if output is not None:
+                self._release(output)
+
+    def _open(self, frame: ndarray):
+        if self.mode == "window":
+            cv2.namedWindow("Result", cv2.WND_PROP_FULLSCREEN)
+            cv2.setWindowProperty("Result",
+                                  cv2.WND_PROP_AUTOSIZE,
+                                  cv2.WINDOW_AUTOSIZE)
+            return "Result"
+        if self.mode == "video":
+            writer = cv2.VideoWriter(self.path,
+                                     cv2.VideoWriter_fourcc(*self._fourcc),
+                                     1.0 / self._interval,
+                                     (frame.shape[1], frame.shape[0]))
+            if not writer.isOpened():
+                raise RuntimeError(f"Could not open {self.path} for writing")
+            return writer
+        return open(self.path, "ab")
+
+    def _write(self, output, frame: ndarray):
+        if self.mode == "window":
+            cv2.imshow(output, frame)
+            cv2.waitKey(1)
+        elif self.mode == "video":
+            output.write(frame)
+        else:
+            status, encoded = cv2.imencode(
+                ".jpg", frame, (cv2.IMWRITE_JPEG_QUALITY, self._quality))
+            if status:
+                output.write(encoded.tobytes())
+
+    def _release(self, output):
+        if self.mode == "window":
+            cv2.destroyWindow(output)
+        elif self.mode == "video":
+            output.release()
+        else:
+            output.close()
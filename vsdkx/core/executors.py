@@ -0,0 +1,473 @@
+import copy
+import logging
+import multiprocessing
+import threading
+import traceback
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from multiprocessing.shared_memory import SharedMemory
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from vsdkx.core.interfaces import Addon
+from vsdkx.core.metrics import Metrics
+from vsdkx.core.structs import AddonObject, _equal
+from vsdkx.core.util.imp import import_class
+
+LOG_TAG = "AddonExecutor"
+
+FrameRef = Tuple[str, tuple, str]
+
+
+class SerialAddonExecutor:
+    """
+    Runs the hooks of the addons one after another on the calling thread, in
+    the order they are configured
+    """
+
+    def __init__(self, addons: List[Addon], names: List[str] = None,
+                 metrics: Metrics = None):
+        """
+        Initialize with addons
+
+        Args:
+            addons (List[Addon]): the addons in configured order
+            names (List[str]): names of the addons to record their
+            durations with, by default their position
+            metrics (Metrics): where to record the duration of each hook
+        """
+        self._logger = logging.getLogger(LOG_TAG)
+        self.addons = addons
+        self._names = {id(addon): name for addon, name in
+                       zip(addons, names or map(str, range(len(addons))))}
+        self._metrics = metrics or Metrics()
+
+    def _label(self, stage: str, addon: Addon) -> str:
+        return f"{stage}.{self._names[id(addon)]}"
+
+    def pre_process(self, addon_object: AddonObject) -> AddonObject:
+        """
+        Apply pre_process of all the addons
+
+        Args:
+            addon_object (AddonObject): the frame data
+
+        Returns:
+            (AddonObject): the addon object after all the addons
+        """
+        return self._run("pre_process", addon_object)
+
+    def post_process(self, addon_object: AddonObject) -> AddonObject:
+        """
+        Apply post_process of all the addons
+
+        Args:
+            addon_object (AddonObject): object containing frame, inference
+            result and shared data
+
+        Returns:
+            (AddonObject): the addon object after all the addons
+        """
+        return self._run("post_process", addon_object)
+
+    def close(self):
+        """
+        Release the resources held by the executor
+        """
+        pass
+
+    def _run(self, stage: str, addon_object: AddonObject) -> AddonObject:
+        for addon in self.addons:
+            start = self._metrics.clock()
+            addon_object = getattr(addon, stage)(addon_object)
+            self._metrics.record(self._label(stage, addon), start)
+        return addon_object
+
+
+class SharedFrame:
+    """
+    A shared memory block that frames are copied into, so they can be read by
+    worker processes without pickling them. The block grows when a bigger
+    frame is written.
+    """
+
+    def __init__(self):
+        self._shm: Optional[SharedMemory] = None
+        self._finalizer = None
+
+    def write(self, frame: np.ndarray) -> FrameRef:
+        """
+        Copy frame into shared memory
+
+        Args:
+            frame (ndarray): the frame data
+
+        Returns:
+            (FrameRef): name of the block, shape and dtype of the frame to
+            attach to it with attach_frame
+        """
+        if self._shm is None or self._shm.size < frame.nbytes:
+            self.close()
+            self._shm = SharedMemory(create=True, size=max(frame.nbytes, 1))
+            self._finalizer = weakref.finalize(self, _release, self._shm)
+        view = np.ndarray(frame.shape, frame.dtype, buffer=self._shm.buf)
+        np.copyto(view, frame)
+        return self._shm.name, frame.shape, frame.dtype.str
+
+    def close(self):
+        """
+        Unlink the shared memory block
+        """
+        if self._finalizer is not None:
+            self._finalizer()
+        self._shm = None
+        self._finalizer = None
+
+
+def _release(shm: SharedMemory):
+    shm.close()
+    shm.unlink()
+
+
+def attach_frame(segments: dict, ref: FrameRef) -> np.ndarray:
+    """
+    Get a read only view of a frame written with SharedFrame.write
+
+    Args:
+        segments (dict): blocks attached so far by name, blocks which are
+        not referenced anymore are closed
+        ref (FrameRef): the reference returned by SharedFrame.write
+
+    Returns:
+        (ndarray): the frame
+    """
+    name, shape, dtype = ref
+    if name not in segments:
+        for shm in segments.values():
+            shm.close()
+        segments.clear()
+        segments[name] = SharedMemory(name=name)
+    frame = np.ndarray(shape, np.dtype(dtype), buffer=segments[name].buf)
+    frame.flags.writeable = False
+    return frame
+
+
+def _diff(before: dict, after: dict) -> Tuple[dict, list]:
+    # before is a deep copy, so values changed in place are found as well
+    changed = {key: value for key, value in after.items()
+               if key not in before or not _equal(before[key], value)}
+    removed = [key for key in before if key not in after]
+    return changed, removed
+
+
+def _apply(target: dict, changed: dict, removed: list):
+    target.update(changed)
+    for key in removed:
+        target.pop(key, None)
+
+
+def _addon_worker(connection, class_path: str, args: tuple):
+    addon = import_class(class_path)(*args)
+    segments = {}
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        stage, ref, inference, shared = message
+        try:
+            shared_before = copy.deepcopy(shared)
+            extra_before = copy.deepcopy(inference.extra) \
+                if inference is not None else {}
+            result = getattr(addon, stage)(
+                AddonObject(frame=attach_frame(segments, ref),
+                            inference=inference,
+                            shared=shared))
+            extra = result.inference.extra \
+                if result.inference is not None else {}
+            connection.send((True,
+                             _diff(shared_before, result.shared),
+                             _diff(extra_before, extra)))
+        except Exception:
+            connection.send((False, traceback.format_exc()))
+    for shm in segments.values():
+        shm.close()
+
+
+def _shutdown(connection, process):
+    try:
+        connection.send(None)
+    except (BrokenPipeError, OSError):
+        pass
+    process.join(timeout=5)
+    if process.is_alive():
+        process.terminate()
+
+
+class RemoteAddon(Addon):
+    """
+    Proxy for an addon which lives in a worker process. The addon is created
+    in the worker, so its state stays there between frames, and its changes
+    to shared and inference.extra are sent back and merged into the addon
+    object. Only addons with independent set to True can be run like this.
+    A call holds lock from submit until merge, so calls from different
+    threads don't read each other's replies.
+    """
+
+    independent = True
+
+    def __init__(self, class_path: str, args: tuple,
+                 context: multiprocessing.context.BaseContext):
+        """
+        Start the worker process of the addon
+
+        Args:
+            class_path (str): dotted path of the addon class
+            args (tuple): arguments to initialize the addon with
+            context (BaseContext): multiprocessing context to start the
+            worker with
+        """
+        self._class_path = class_path
+        self.lock = threading.Lock()
+        self._connection, child = context.Pipe()
+        self._process = context.Process(target=_addon_worker,
+                                        args=(child, class_path, args),
+                                        name=f"vsdkx-{class_path}",
+                                        daemon=True)
+        self._process.start()
+        child.close()
+        self._frame = None
+        self._finalizer = weakref.finalize(self, _shutdown,
+                                           self._connection, self._process)
+
+    def __repr__(self):
+        return f"RemoteAddon({self._class_path})"
+
+    def submit(self, stage: str, ref: FrameRef, addon_object: AddonObject):
+        """
+        Send a hook call to the worker without waiting for it
+
+        Args:
+            stage (str): pre_process or post_process
+            ref (FrameRef): the frame of addon_object in shared memory
+            addon_object (AddonObject): the addon object to run the hook on
+        """
+        self._connection.send((stage, ref, addon_object.inference,
+                               addon_object.shared))
+
+    def merge(self, addon_object: AddonObject) -> AddonObject:
+        """
+        Wait for the call sent with submit and merge its result
+
+        Args:
+            addon_object (AddonObject): the addon object to merge into
+
+        Returns:
+            (AddonObject): addon_object with the changes of the addon
+        """
+        result = self._connection.recv()
+        if not result[0]:
+            raise RuntimeError(f"{self} failed in its worker:\n{result[1]}")
+        _, shared, extra = result
+        _apply(addon_object.shared, *shared)
+        if addon_object.inference is not None:
+            _apply(addon_object.inference.extra, *extra)
+        return addon_object
+
+    def pre_process(self, addon_object: AddonObject) -> AddonObject:
+        return self._call("pre_process", addon_object)
+
+    def post_process(self, addon_object: AddonObject) -> AddonObject:
+        return self._call("post_process", addon_object)
+
+    def close(self):
+        """
+        Stop the worker process
+        """
+        if self._frame is not None:
+            self._frame.close()
+        self._finalizer()
+
+    def _call(self, stage: str, addon_object: AddonObject) -> AddonObject:
+        with self.lock:
+            if self._frame is None:
+                self._frame = SharedFrame()
+            self.submit(stage, self._frame.write(addon_object.frame),
+                        addon_object)
+            return self.merge(addon_object)
+
+
+class ProcessAddonExecutor(SerialAddonExecutor):
+    """
+    Runs consecutive RemoteAddons concurrently in their worker processes and
+    the other addons on the calling thread. The frame is written to shared
+    memory once for each group of remote addons and the results are merged
+    back in the configured order, so the outcome doesn't depend on which
+    worker finishes first. Concurrent calls take turns for each group, since
+    the group shares the shared memory block and the pipes of its workers.
+    """
+
+    def __init__(self, addons: List[Addon], names: List[str] = None,
+                 metrics: Metrics = None):
+        super().__init__(addons, names, metrics)
+        self._frame = SharedFrame()
+        self._lock = threading.Lock()
+        self._groups = []
+        for addon in addons:
+            if isinstance(addon, RemoteAddon):
+                if self._groups and isinstance(self._groups[-1], list):
+                    self._groups[-1].append(addon)
+                else:
+                    self._groups.append([addon])
+            else:
+                self._groups.append(addon)
+
+    def close(self):
+        for addon in self.addons:
+            if isinstance(addon, RemoteAddon):
+                addon.close()
+        self._frame.close()
+
+    def _run(self, stage: str, addon_object: AddonObject) -> AddonObject:
+        for group in self._groups:
+            start = self._metrics.clock()
+            if isinstance(group, list):
+                addon_object = self._run_remote(stage, group, addon_object,
+                                                start)
+            else:
+                addon_object = getattr(group, stage)(addon_object)
+                self._metrics.record(self._label(stage, group), start)
+        return addon_object
+
+    def _run_remote(self, stage: str, group: List[RemoteAddon],
+                    addon_object: AddonObject, start: int) -> AddonObject:
+        # the locks of the addons are taken in configured order after the
+        # one of the executor, so they can't deadlock with RemoteAddon._call
+        with self._lock, ExitStack() as stack:
+            for addon in group:
+                stack.enter_context(addon.lock)
+            ref = self._frame.write(addon_object.frame)
+            for addon in group:
+                addon.submit(stage, ref, addon_object)
+            error = None
+            for addon in group:
+                # every worker has to be answered before raising, or its
+                # reply would be read as the result of the next call
+                try:
+                    addon_object = addon.merge(addon_object)
+                except RuntimeError as e:
+                    error = error or e
+                # time from sending the frame until the result is merged
+                self._metrics.record(self._label(stage, addon), start)
+        if error is not None:
+            raise error
+        return addon_object
+
+
+def _overlap(first: set, second: set) -> bool:
+    # "shared" covers "shared.count", so prefixes overlap as well
+    for a in first:
+        for b in second:
+            if a == b or a.startswith(b + ".") or b.startswith(a + "."):
+                return True
+    return False
+
+
+def _conflict(earlier: Addon, later: Addon) -> bool:
+    if earlier.reads is None or earlier.writes is None \
+            or later.reads is None or later.writes is None:
+        return True
+    return _overlap(earlier.writes, set(later.reads) | set(later.writes)) \
+        or _overlap(earlier.reads, later.writes)
+
+
+def _merge_declared(addon: Addon, source: AddonObject, target: AddonObject):
+    # copies what addon declared to write from the object it returned into
+    # the object shared by its level
+    for key in addon.writes:
+        if key == "frame":
+            target.frame = source.frame
+        elif key == "inference" and target.inference is not None:
+            target.inference.boxes = source.inference.boxes
+            target.inference.classes = source.inference.classes
+            target.inference.scores = source.inference.scores
+        elif key == "shared":
+            target.shared.update(source.shared)
+        elif key.startswith("shared."):
+            name = key[len("shared."):]
+            if name in source.shared:
+                target.shared[name] = source.shared[name]
+        elif key == "extra" and target.inference is not None:
+            target.inference.extra.update(source.inference.extra)
+        elif key.startswith("extra.") and target.inference is not None:
+            name = key[len("extra."):]
+            if name in source.inference.extra:
+                target.inference.extra[name] = source.inference.extra[name]
+
+
+class GraphAddonExecutor(SerialAddonExecutor):
+    """
+    Builds a dependency graph of the addons from their reads and writes
+    declarations and runs addons which don't depend on each other
+    concurrently in a thread pool. An addon depends on an earlier one if
+    either of them writes something the other reads or writes. Addons without
+    declarations depend on all the addons before them and all the addons
+    after them depend on them, so they keep their configured order.
+    """
+
+    def __init__(self, addons: List[Addon], names: List[str] = None,
+                 metrics: Metrics = None, max_workers: int = None):
+        """
+        Initialize with addons
+
+        Args:
+            addons (List[Addon]): the addons in configured order
+            names (List[str]): names of the addons to record their
+            durations with, by default their position
+            metrics (Metrics): where to record the duration of each hook
+            max_workers (int): size of the thread pool, by default the
+            size of the widest level of the graph
+        """
+        super().__init__(addons, names, metrics)
+        levels = []
+        for index, addon in enumerate(addons):
+            levels.append(1 + max([levels[before]
+                                   for before in range(index)
+                                   if _conflict(addons[before], addon)],
+                                  default=-1))
+        self._levels = [[addon for addon, level in zip(addons, levels)
+                         if level == current]
+                        for current in range(max(levels, default=-1) + 1)]
+        width = max([len(level) for level in self._levels], default=1)
+        self._pool = ThreadPoolExecutor(max_workers or width,
+                                        thread_name_prefix="vsdkx-addon") \
+            if width > 1 else None
+        self._logger.info(f"Addon levels {self._levels}")
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+
+    def _run(self, stage: str, addon_object: AddonObject) -> AddonObject:
+        for level in self._levels:
+            if len(level) == 1:
+                addon_object = self._timed(stage, level[0], addon_object)
+            else:
+                futures = [self._pool.submit(self._timed, stage, addon,
+                                             addon_object)
+                           for addon in level]
+                # merged in configured order, whichever finishes first
+                results = [future.result() for future in futures]
+                for addon, result in zip(level, results):
+                    if result is not addon_object:
+                        _merge_declared(addon, result, addon_object)
+        return addon_object
+
+    def _timed(self, stage: str, addon: Addon,
+               addon_object: AddonObject) -> AddonObject:
+        start = self._metrics.clock()
+        result = getattr(addon, stage)(addon_object)
+        self._metrics.record(self._label(stage, addon), start)
+        return result
+
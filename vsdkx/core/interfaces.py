@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import List
 
 from vsdkx.core.structs import Inference, AddonObject, FrameObject
 
@@ -6,6 +7,9 @@ from vsdkx.core.structs import Inference, AddonObject, FrameObject
 class ModelDriver(ABC):
     """
     Interface for all model drivers
+
+    inference can also be implemented as a coroutine (async def), then the
+    driver can only be used through AsyncEventDetector
     """
 
     @abstractmethod
@@ -38,6 +42,22 @@ class ModelDriver(ABC):
         """
         pass
 
+    def inference_batch(self, frames: List[FrameObject]) -> List[Inference]:
+        """
+        This method will be called by EventDetector.detect_batch to receive
+        inference results for a batch of frames with one call. Drivers whose
+        model supports batched input should override it, by default it calls
+        inference on each frame.
+
+        Args:
+            frames (List[FrameObject]): the frames data
+
+        Returns:
+            (List[Inference]): the results of the model driver, one for each
+            frame and in the same order
+        """
+        return [self.inference(frame) for frame in frames]
+
     def draw(self, frame: FrameObject, inference: Inference):
         """
         This method will be called by EventDetector only if debug is true in
@@ -53,8 +73,31 @@ class ModelDriver(ABC):
 class Addon(ABC):
     """
     Interface for all addons
+
+    pre_process and post_process can also be implemented as coroutines
+    (async def), then the addon can only be used through AsyncEventDetector
+
+    With capture.reuse_frames the runners read the next frames into the
+    array of a finished frame, so addons must copy addon_object.frame
+    instead of keeping a reference to it
+
+    Attributes:
+        independent (bool): set to True if the addon doesn't modify the frame
+        or the boxes, classes and scores of the inference and only assigns
+        its own keys in shared and inference.extra. Such addons can run in
+        their own worker process when execution.addons is set to process
+        reads (set|None): what the addon reads, "frame", "inference" for the
+        boxes, classes and scores, or single keys like "shared.count" and "extra.tracks". Used with writes
+        to run addons concurrently when execution.addons is set to graph,
+        None means the addon may read anything
+        writes (set|None): what the addon modifies, in the same form as
+        reads, None means the addon may modify anything
     """
 
+    independent = False
+    reads = None
+    writes = None
+
     @abstractmethod
     def __init__(self, addon_config: dict, model_settings: dict,
                  model_config: dict,
@@ -0,0 +1,231 @@
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict
+
+import numpy as np
+
+LOG_TAG = "Metrics"
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class _Series:
+    """
+    Rolling window of the latest durations of one stage, in nanoseconds
+    """
+
+    def __init__(self, window: int):
+        self._values = np.zeros(window, dtype=np.int64)
+        self._index = 0
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0
+
+    def add(self, value: int):
+        with self._lock:
+            self._values[self._index] = value
+            self._index = (self._index + 1) % len(self._values)
+            self.count += 1
+            self.total += value
+
+    def summary(self) -> dict:
+        with self._lock:
+            values = self._values[:min(self.count, len(self._values))].copy()
+            count, total = self.count, self.total
+        summary = {"count": count, "sum": total / 1e9}
+        if len(values):
+            for quantile, value in zip(QUANTILES,
+                                       np.quantile(values, QUANTILES)):
+                summary[f"p{round(quantile * 100)}"] = value / 1e9
+        return summary
+
+
+class Metrics:
+    """
+    Latency instrumentation of the detector stages. Timers are taken with
+    perf_counter_ns and the last window durations of every stage are kept to
+    report p50, p95 and p99. When disabled clock returns 0 and record returns
+    right away, so the instrumented code costs two calls.
+
+    Usage:
+        start = metrics.clock()
+        ...
+        metrics.record("inference", start)
+    """
+
+    def __init__(self, enabled: bool = False, window: int = 1024):
+        """
+        Initialize with enabled and window
+
+        Args:
+            enabled (bool): collect the durations
+            window (int): number of latest durations of each stage that the
+            percentiles are computed from
+        """
+        self._logger = logging.getLogger(LOG_TAG)
+        self.enabled = enabled
+        self._window = window
+        self._series: Dict[str, _Series] = {}
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+    def clock(self) -> int:
+        """
+        Returns:
+            (int): the start time to pass to record, 0 when disabled
+        """
+        return time.perf_counter_ns() if self.enabled else 0
+
+    def record(self, stage: str, start: int):
+        """
+        Record the time since start as a duration of stage
+
+        Args:
+            stage (str): name of the stage
+            start (int): the value returned by clock
+        """
+        if not start:
+            return
+        elapsed = time.perf_counter_ns() - start
+        series = self._series.get(stage)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(stage,
+                                                 _Series(self._window))
+        series.add(elapsed)
+
+    def count(self, event: str, value: int = 1):
+        """
+        Add value to the counter of event, e.g. cache hits
+
+        Args:
+            event (str): name of the counter
+            value (int): amount to add
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[event] = self._counters.get(event, 0) + value
+
+    def counters(self) -> dict:
+        """
+        Returns:
+            (dict): the value of each counter
+        """
+        with self._lock:
+            return dict(self._counters)
+
+    def snapshot(self) -> dict:
+        """
+        Returns:
+            (dict): count, sum and percentiles in seconds of each stage
+        """
+        return {stage: series.summary()
+                for stage, series in list(self._series.items())}
+
+    def to_json(self) -> str:
+        """
+        Returns:
+            (str): the snapshot as JSON, with the counters under counters
+            when there are any
+        """
+        snapshot = self.snapshot()
+        counters = self.counters()
+        if counters:
+            snapshot["counters"] = counters
+        return json.dumps(snapshot)
+
+    def to_prometheus(self) -> str:
+        """
+        Returns:
+            (str): the snapshot in Prometheus text exposition format
+        """
+        lines = ["# TYPE vsdkx_stage_seconds summary"]
+        for stage, summary in self.snapshot().items():
+            label = stage.replace("\\", "\\\\").replace('"', '\\"')
+            for quantile in QUANTILES:
+                key = f"p{round(quantile * 100)}"
+                if key in summary:
+                    lines.append(f'vsdkx_stage_seconds{{stage="{label}",'
+                                 f'quantile="{quantile}"}} {summary[key]}')
+            lines.append(f'vsdkx_stage_seconds_count{{stage="{label}"}} '
+                         f'{summary["count"]}')
+            lines.append(f'vsdkx_stage_seconds_sum{{stage="{label}"}} '
+                         f'{summary["sum"]}')
+        counters = self.counters()
+        if counters:
+            lines.append("# TYPE vsdkx_events_total counter")
+        for event, value in counters.items():
+            label = event.replace("\\", "\\\\").replace('"', '\\"')
+            lines.append(f'vsdkx_events_total{{event="{label}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int, host: str = "127.0.0.1",
+              ready: Callable[[], bool] = None):
+        """
+        Serve the metrics over HTTP on a daemon thread, in Prometheus format
+        on /metrics and as JSON on /metrics.json. /ready answers 200 when
+        ready returns True and 503 otherwise, for load balancer checks.
+
+        Args:
+            port (int): port to listen on, 0 picks a free one
+            host (str): address to bind to, only the local machine by
+            default, 0.0.0.0 serves all interfaces
+            ready (Callable[[], bool]): readiness check, always ready when
+            None
+        """
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body = metrics.to_prometheus()
+                    content_type = "text/plain; version=0.0.4"
+                elif self.path == "/metrics.json":
+                    body = metrics.to_json()
+                    content_type = "application/json"
+                elif self.path == "/ready":
+                    if ready is not None and not ready():
+                        self.send_error(503)
+                        return
+                    body = "ready\n"
+                    content_type = "text/plain"
+                else:
+                    self.send_error(404)
+                    return
+                body = body.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever,
+                         name="vsdkx-metrics", daemon=True).start()
+        self._logger.info(f"Serving metrics on {host}:{self.port}")
+
+    @property
+    def port(self) -> int:
+        """
+        The port the HTTP server listens on, None when it isn't running
+        """
+        if self._server is None:
+            return None
+        return self._server.server_address[1]
+
+    def close(self):
+        """
+        Stop the HTTP server started with serve
+        """
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -0,0 +1,186 @@
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Optional
+
+from numpy import ndarray
+
+from vsdkx.core.detector import EventDetector
+from vsdkx.core.structs import Inference
+from vsdkx.core.util.buffers import BufferPool
+from vsdkx.core.util.queues import DropOldestQueue
+
+LOG_TAG = "VideoPipeline"
+
+_STOP = object()
+
+
+class VideoPipeline:
+    """
+    Runs capture, inference and post processing of a video source in three
+    stages connected with bounded queues, so the slowest stage bounds the
+    throughput instead of the sum of all of them.
+
+    The reader thread feeds decoded frames to the inference stage which runs
+    on the calling thread, and the results are handed to on_result on a
+    separate worker.
+    """
+
+    def __init__(self,
+                 detector: EventDetector,
+                 capture,
+                 on_result: Callable[[ndarray, Inference], None] = None,
+                 queue_size: int = 4,
+                 drop_oldest: bool = False,
+                 buffer_pool: BufferPool = None):
+        """
+        Initialize with detector and capture
+
+        Args:
+            detector (EventDetector): detector to run on each frame
+            capture (cv2.VideoCapture): opened capture to read frames from
+            on_result (Callable): called with the frame and its inference on
+            the post processing worker
+            queue_size (int): depth of the queues between the stages
+            drop_oldest (bool): if True the reader drops the oldest waiting
+            frame instead of blocking when inference falls behind, which is
+            what you want for live cameras
+            buffer_pool (BufferPool): frames are read into arrays of this
+            pool and released after on_result returned, so on_result must
+            not keep the frame
+        """
+        self._logger = logging.getLogger(LOG_TAG)
+        self._detector = detector
+        self._capture = capture
+        self._on_result = on_result
+        self._buffer_pool = buffer_pool
+        self._frames = DropOldestQueue(queue_size, self._release) \
+            if drop_oldest else queue.Queue(queue_size)
+        self._results = queue.Queue(queue_size)
+        self._stopped = threading.Event()
+        self._source_done = threading.Event()
+        self._error: Optional[BaseException] = None
+        self.frames_read = 0
+        self.frames_processed = 0
+
+    @property
+    def frames_dropped(self) -> int:
+        """
+        Number of frames dropped by the reader, always 0 without drop_oldest
+        """
+        return getattr(self._frames, "dropped", 0)
+
+    def stop(self):
+        """
+        Ask all the stages to stop after the frame they are working on
+        """
+        self._stopped.set()
+
+    def run(self):
+        """
+        Run the pipeline until the source is exhausted or stop is called.
+        Exceptions raised in any of the stages are raised again here.
+        """
+        reader = threading.Thread(target=self._guard, args=(self._read,),
+                                  name="vsdkx-reader", daemon=True)
+        post = threading.Thread(target=self._guard, args=(self._post,),
+                                name="vsdkx-post", daemon=True)
+        start_stamp = time.time()
+        reader.start()
+        post.start()
+        try:
+            self._guard(self._infer)
+        finally:
+            # the inference stage ends the post stage with _STOP, so the
+            # results that are already queued still get post processed
+            post.join()
+            self.stop()
+            reader.join()
+        elapsed = time.time() - start_stamp
+        self._logger.debug(f"Processed {self.frames_processed} of "
+                           f"{self.frames_read} frames in {elapsed}, "
+                           f"dropped {self.frames_dropped}")
+        if self._error is not None:
+            raise self._error
+
+    def _guard(self, stage: Callable[[], None]):
+        try:
+            stage()
+        except BaseException as e:
+            if self._error is None:
+                self._error = e
+            self.stop()
+
+    def _put(self, target: queue.Queue, item) -> bool:
+        while not self._stopped.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, source: queue.Queue):
+        while not self._stopped.is_set():
+            try:
+                return source.get(timeout=0.1)
+            except queue.Empty:
+                if source is self._frames and self._source_done.is_set():
+                    # the reader may have queued its last frames after the
+                    # get timed out and before it signalled the end
+                    try:
+                        return source.get_nowait()
+                    except queue.Empty:
+                        break
+        return _STOP
+
+    def _release(self, frame: ndarray):
+        if self._buffer_pool is not None:
+            self._buffer_pool.release(frame)
+
+    def _read(self):
+        buffer = None
+        try:
+            while not self._stopped.is_set():
+                status, frame = self._capture.read() if buffer is None \
+                    else self._capture.read(buffer)
+                if not status:
+                    self._release(buffer)
+                    break
+                if buffer is not None and frame is not buffer:
+                    # the frame size changed and the capture allocated
+                    self._release(buffer)
+                if self._buffer_pool is not None:
+                    buffer = self._buffer_pool.acquire(frame.shape,
+                                                       frame.dtype)
+                self.frames_read += 1
+                if not self._put(self._frames, frame):
+                    break
+        finally:
+            # a sentinel could evict frames from a DropOldestQueue, so the
+            # end of the source is signalled with an event instead
+            self._source_done.set()
+
+    def _infer(self):
+        try:
+            while True:
+                frame = self._get(self._frames)
+                if frame is _STOP:
+                    break
+                result = self._detector.detect(frame)
+                self.frames_processed += 1
+                if not self._put(self._results, (frame, result)):
+                    break
+        finally:
+            self._put(self._results, _STOP)
+
+    def _post(self):
+        while True:
+            item = self._get(self._results)
+            if item is _STOP:
+                break
+            frame, result = item
+            if self._on_result is not None:
+                self._on_result(frame, result)
+            self._release(frame)
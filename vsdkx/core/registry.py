@@ -0,0 +1,138 @@
+import logging
+import os
+import threading
+import time
+from typing import Dict, Tuple
+
+from vsdkx.core.util import io
+from vsdkx.core.util.imp import import_class, import_default_settings
+
+LOG_TAG = "PluginRegistry"
+
+MODEL_GROUP = "vsdkx.models"
+ADDON_GROUP = "vsdkx.addons"
+
+
+def _entry_points(group: str) -> dict:
+    from importlib.metadata import entry_points
+    points = entry_points()
+    if hasattr(points, "select"):
+        selected = points.select(group=group)
+    else:
+        selected = points.get(group, [])
+    return {point.name: point.value for point in selected}
+
+
+class PluginRegistry:
+    """
+    Process wide cache of everything EventDetector loads by name: model and
+    addon classes, their default settings and the model profiles. Every
+    detector after the first one gets them without importing or parsing
+    again, and the time spent on the first load of each plugin is kept for
+    the startup report.
+
+    Besides dotted class paths, model drivers and addons can be referred to
+    by the name of an entry point in the vsdkx.models and vsdkx.addons
+    groups, which are only looked up when such a name is used.
+    """
+
+    def __init__(self):
+        self._logger = logging.getLogger(LOG_TAG)
+        self._lock = threading.RLock()
+        self._entry_points: Dict[str, dict] = {}
+        self._classes: Dict[str, type] = {}
+        self._settings: Dict[str, dict] = {}
+        self._profiles: Dict[str, Tuple[float, dict]] = {}
+        self.load_times: Dict[str, float] = {}
+
+    def resolve(self, name: str, group: str) -> str:
+        """
+        Get the dotted class path of a plugin without importing it
+
+        Args:
+            name (str): dotted class path or entry point name
+            group (str): entry point group to look the name up in
+
+        Returns:
+            (str): the dotted class path
+        """
+        if "." in name:
+            return name
+        with self._lock:
+            if group not in self._entry_points:
+                self._entry_points[group] = _entry_points(group)
+        points = self._entry_points[group]
+        if name not in points:
+            raise ValueError(f"No plugin named {name} in {group}")
+        return points[name].replace(":", ".")
+
+    def load_class(self, path: str) -> type:
+        """
+        Import a class once
+
+        Args:
+            path (str): dotted class path
+
+        Returns:
+            (type): the class
+        """
+        class_ = self._classes.get(path)
+        if class_ is None:
+            with self._lock:
+                class_ = self._classes.get(path)
+                if class_ is None:
+                    stamp = time.perf_counter()
+                    class_ = self._classes[path] = import_class(path)
+                    self.load_times[path] = time.perf_counter() - stamp
+        return class_
+
+    def default_settings(self, path: str) -> dict:
+        """
+        Import default settings once, settings which fail to import are
+        logged the first time and are empty
+
+        Args:
+            path (str): dotted path of the settings dictionary
+
+        Returns:
+            (dict): the default settings, they must not be modified
+        """
+        settings = self._settings.get(path)
+        if settings is None:
+            with self._lock:
+                settings = self._settings.get(path)
+                if settings is None:
+                    stamp = time.perf_counter()
+                    try:
+                        settings = import_default_settings(path)
+                    except Exception as e:
+                        self._logger.error(e)
+                        settings = {}
+                    self._settings[path] = settings
+                    self.load_times[path] = time.perf_counter() - stamp
+        return settings
+
+    def profile(self, path: str) -> dict:
+        """
+        Parse a profile yaml file, again only if it changed since the last
+        time
+
+        Args:
+            path (str): path of the yaml file
+
+        Returns:
+            (dict): the parsed profile, it must not be modified
+        """
+        key = os.path.abspath(path)
+        modified = os.path.getmtime(key)
+        with self._lock:
+            cached = self._profiles.get(key)
+            if cached is None or cached[0] != modified:
+                stamp = time.perf_counter()
+                cached = self._profiles[key] = (modified,
+                                                io.import_yaml(key))
+                self.load_times[path] = time.perf_counter() - stamp
+        return cached[1]
+
+
+registry = PluginRegistry()
@@ -0,0 +1,148 @@
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from vsdkx.core.structs import FrameObject, Inference
+from vsdkx.core.util.io import get_env_dict
+
+MODES = ("union", "tiles")
+
+Rectangle = Tuple[int, int, int, int]
+
+
+class RegionOfInterest:
+    """
+    Crops frames to the zones of the drawing config before inference, so
+    the model driver only processes the part of the frame that matters. In
+    union mode the model gets the bounding rectangle of all the zones, in
+    tiles mode the bounding rectangle of each zone separately. The crops are
+    views of the frame, and the boxes of the results are moved back to frame
+    coordinates.
+
+    Detections of overlapping tiles are not merged, so tiles works best for
+    zones far apart from each other.
+    """
+
+    def __init__(self, drawing_config: dict, mode: str = "union",
+                 margin: int = 0):
+        """
+        Initialize with drawing_config
+
+        Args:
+            drawing_config (dict): drawing config with the zones, zones
+            changed with EventDetector.update_config are picked up
+            mode (str): union or tiles
+            margin (int): pixels added around each rectangle
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown roi mode {mode}")
+        self._drawing_config = drawing_config
+        self.mode = mode
+        self.margin = margin
+        self._zones = None
+        self._shape = None
+        self._rectangles: List[Rectangle] = []
+
+    @classmethod
+    def from_config(cls, system_config: dict,
+                    drawing_config: dict) -> Optional["RegionOfInterest"]:
+        """
+        Create the cropper from the model.roi section, model.roi: true uses
+        the default settings
+
+        Args:
+            system_config: the config dictionary
+            drawing_config: the drawing section the zones are taken from
+
+        Returns:
+            (RegionOfInterest): the cropper, None without model.roi
+        """
+        config = get_env_dict(system_config, "model.roi")
+        if not config:
+            return None
+        return cls(drawing_config,
+                   **(config if isinstance(config, dict) else {}))
+
+    def rectangles(self, shape: Sequence[int]) -> List[Rectangle]:
+        """
+        Args:
+            shape: shape of the frame
+
+        Returns:
+            (List[Rectangle]): x1, y1, x2, y2 of the crops inside the frame,
+            the whole frame when there are no zones
+        """
+        zones = self._drawing_config.get("zones")
+        if zones is self._zones and shape == self._shape:
+            return self._rectangles
+        height, width = shape[:2]
+        rectangles = []
+        for zone in zones or []:
+            points = np.asarray(zone).reshape(-1, 2)
+            rectangles.append((points[:, 0].min(), points[:, 1].min(),
+                               points[:, 0].max(), points[:, 1].max()))
+        if rectangles and self.mode == "union":
+            corners = np.array(rectangles)
+            rectangles = [(corners[:, 0].min(), corners[:, 1].min(),
+                           corners[:, 2].max(), corners[:, 3].max())]
+        clipped = []
+        for x1, y1, x2, y2 in rectangles:
+            rectangle = (max(int(x1) - self.margin, 0),
+                         max(int(y1) - self.margin, 0),
+                         min(int(x2) + self.margin, width),
+                         min(int(y2) + self.margin, height))
+            if rectangle[0] < rectangle[2] and rectangle[1] < rectangle[3]:
+                clipped.append(rectangle)
+        self._rectangles = clipped or [(0, 0, width, height)]
+        self._zones = zones
+        self._shape = shape
+        return self._rectangles
+
+    def crop(self, frame_object: FrameObject) -> List[FrameObject]:
+        """
+        Args:
+            frame_object: the frame object of the whole frame
+
+        Returns:
+            (List[FrameObject]): one frame object for each rectangle, with
+            the same metadata
+        """
+        frame = frame_object.frame
+        return [FrameObject(frame[y1:y2, x1:x2], frame_object.metadata)
+                for x1, y1, x2, y2 in self.rectangles(frame.shape)]
+
+    def merge(self, shape: Sequence[int],
+              inferences: List[Inference]) -> Inference:
+        """
+        Move the boxes of the inferences of the crops to frame coordinates
+        and join them
+
+        Args:
+            shape: shape of the frame
+            inferences: the results of the frame objects returned by crop
+
+        Returns:
+            (Inference): the result for the whole frame
+        """
+        for (x1, y1, _, _), inference in zip(self.rectangles(shape),
+                                             inferences):
+            if x1 or y1:
+                # not in place, drivers may return arrays they reuse
+                inference.boxes = inference.boxes + np.array(
+                    (x1, y1, x1, y1), inference.boxes.dtype)
+        if len(inferences) == 1:
+            return inferences[0]
+        extra = {}
+        for inference in inferences:
+            extra.update(inference.extra)
+        # empty results may not have the classes layout of the others
+        inferences = [inference for inference in inferences
+                      if len(inference.boxes)] or inferences[:1]
+        return Inference(
+            boxes=np.concatenate([inference.boxes
+                                  for inference in inferences]),
+            classes=np.concatenate([inference.classes
+                                    for inference in inferences]),
+            scores=np.concatenate([inference.scores
+                                   for inference in inferences]),
+            extra=extra)
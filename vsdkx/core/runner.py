@@ -6,7 +6,13 @@ import cv2
 from vsdkx.connector.server import Server
 from numpy import ndarray
 from vsdkx.core.util import io
+from vsdkx.core.batching import BatchingEventDetector
+from vsdkx.core.bulk import BulkRunner
+from vsdkx.core.capture import open_capture
 from vsdkx.core.detector import EventDetector
+from vsdkx.core.pipeline import VideoPipeline
+from vsdkx.core.sinks import SINKS, open_sink
+from vsdkx.core.streams import MultiStreamRunner
 from vsdkx.core.structs import Inference
 
 
@@ -24,6 +30,14 @@ def getLogger(name=None):
 LOG_TAG = "SimpleRunner"
 
 
+def _parse_source(source: str):
+    # a number means a camera index
+    try:
+        return int(source)
+    except ValueError:
+        return source
+
+
 class SimpleRunner:
     """
     A simple class to parse default arguments and use EventDetector
@@ -42,13 +56,26 @@ class SimpleRunner:
             --no-server argument
         """
         self._draw_method = draw_method
+        self._sink = None
         logging.getLogger = getLogger
         self._logger = logging.getLogger(LOG_TAG)
 
     def _run_inference(self, detector: EventDetector, image: ndarray):
         result = detector.detect(image)
+        self._on_result(image, result)
+
+    def _on_result(self, image: ndarray, inference: Inference):
+        if self._sink is not None:
+            self._sink.write(inference)
+        if self._draw_method is not None:
+            self._draw_method(image, inference)
+
+    def _on_stream_result(self, stream: str, image: ndarray,
+                          inference: Inference):
+        if self._sink is not None:
+            self._sink.write(inference, stream)
         if self._draw_method is not None:
-            self._draw_method(image, Inference(**result))
+            self._draw_method(image, inference)
 
     def run(self):
         parser = argparse.ArgumentParser()
@@ -61,57 +88,158 @@ class SimpleRunner:
         parser.add_argument('--config-path', type=str,
                             default='vsdkx/settings.yaml',
                             help='path to system config')
+        parser.add_argument('--watch-config', default=False,
+                            action='store_true',
+                            help='apply changes of the system config while '
+                                 'running')
+        parser.add_argument('--pipeline', default=False, action='store_true',
+                            help='run capture, inference and drawing of the '
+                                 'video on separate threads')
+        parser.add_argument('--queue-size', type=int, default=4,
+                            help='depth of the queues between the pipeline '
+                                 'stages')
+        parser.add_argument('--drop-oldest', default=False,
+                            action='store_true',
+                            help='drop the oldest waiting frame when '
+                                 'inference falls behind, for live cameras')
+        parser.add_argument('--streams', type=str, nargs='+',
+                            help='paths, urls or camera indexes of many '
+                                 'videos to serve with one model')
+        parser.add_argument('--batch-size', type=int, default=1,
+                            help='maximum number of frames of different '
+                                 'streams inferred together')
+        parser.add_argument('--sink', type=str, choices=sorted(SINKS),
+                            help='write the results in this format to '
+                                 '--output')
+        parser.add_argument('--output', type=str, default='results',
+                            help='path of the results written with --sink')
+        parser.add_argument('--bulk', type=str, nargs='+',
+                            help='directories, globs or manifest files of '
+                                 'images and videos to process offline '
+                                 'with a pool of workers')
+        parser.add_argument('--workers', type=int,
+                            help='worker processes of --bulk, one per CPU '
+                                 'by default')
+        parser.add_argument('--segment-frames', type=int, default=0,
+                            help='split the videos of --bulk into segments '
+                                 'of this many frames')
+        parser.add_argument('--checkpoint', type=str,
+                            help='file of the finished --bulk tasks, to '
+                                 'resume an interrupted run')
 
         args = parser.parse_args()
 
         # Run people detection as a gRPC server
-        if not args.no_server:
-            Server.run(EventDetector)
+        if not args.no_server and not args.bulk:
+            Server.run(BatchingEventDetector)
         else:
-            if args.config_path is not None:
-                detector = EventDetector(
-                    io.import_yaml(args.config_path))
-                # Run inference on a single image
-                if args.image_path is not None:
-
-                    # Time stamp for performance reporting
-                    start_stamp = time.time()
-
-                    # Read the image
-                    image = cv2.imread(args.image_path)
-
-                    # Time stamp for performance reporting
-                    read_stamp = time.time()
-
-                    # Run the inference
-                    self._run_inference(detector, image)
-
-                    # Time stamp for performance reporting
-                    end_stamp = time.time()
-
-                    self._logger.debug(f'Read time {read_stamp - start_stamp}')
-                    self._logger.debug(f'Done {end_stamp - start_stamp}')
-
-                elif args.video_path is not None:
-                    # Check if video_path is valid
+            if args.config_path is not None and args.bulk:
+                # the workers load their own detectors
+                config = io.Config(args.config_path)
+                sink = open_sink(args.sink or 'jsonl', args.output)
+                try:
+                    BulkRunner(config.data,
+                               args.bulk,
+                               sink,
+                               args.workers,
+                               args.segment_frames,
+                               args.checkpoint).run()
+                finally:
+                    sink.close()
+            elif args.config_path is not None:
+                config = io.Config(args.config_path)
+                detector = EventDetector(config.data)
+                try:
+                    if args.sink is not None:
+                        self._sink = open_sink(args.sink, args.output)
                     try:
-                        video_path = int(args.video_path)
-                    except ValueError:
-                        video_path = args.video_path
-
-                    cap = cv2.VideoCapture(video_path)
-                    assert cap.isOpened(), "Video open failed."
-                    status = True
-                    start_stamp = time.time()
-                    while status:
-                        # Time stamp for performance reporting
-                        read_start_stamp = time.time()
-                        status, frame = cap.read()
-                        read_end_stamp = time.time()
-                        self._run_inference(detector, frame)
-                        self._logger.debug(
-                            f'Read time {read_end_stamp - read_start_stamp}')
-                    end_stamp = time.time()
-                    self._logger.debug(f'Done {end_stamp - start_stamp}')
-
-                    cap.release()
+                        self._run_local(args, config, detector)
+                    finally:
+                        if self._sink is not None:
+                            self._sink.close()
+                finally:
+                    # also finishes the debug recording of the display
+                    detector.close()
+
+    def _run_local(self, args: argparse.Namespace, config: io.Config,
+                   detector: EventDetector):
+        capture_config = io.get_env_dict(config.data, "capture", {})
+        # frames are only read into reused arrays when the addons and
+        # draw_method don't keep them
+        reuse_frames = capture_config.get("reuse_frames", False)
+        if args.watch_config:
+            config.watch(
+                lambda changed: detector.update_config(changed.data))
+        # Run inference on a single image
+        if args.image_path is not None:
+
+            # Time stamp for performance reporting
+            start_stamp = time.time()
+
+            # Read the image
+            image = cv2.imread(args.image_path)
+
+            # Time stamp for performance reporting
+            read_stamp = time.time()
+
+            # Run the inference
+            self._run_inference(detector, image)
+
+            # Time stamp for performance reporting
+            end_stamp = time.time()
+
+            self._logger.debug(f'Read time {read_stamp - start_stamp}')
+            self._logger.debug(f'Done {end_stamp - start_stamp}')
+
+        elif args.streams:
+            MultiStreamRunner(
+                detector,
+                [_parse_source(source) for source in args.streams],
+                self._on_stream_result,
+                args.batch_size,
+                args.queue_size,
+                args.drop_oldest,
+                capture_config=capture_config).run()
+
+        elif args.video_path is not None:
+            cap = open_capture(_parse_source(args.video_path),
+                               capture_config)
+            assert cap.isOpened(), "Video open failed."
+            if args.pipeline:
+                VideoPipeline(detector,
+                              cap,
+                              self._on_result,
+                              args.queue_size,
+                              args.drop_oldest,
+                              detector.buffer_pool if reuse_frames
+                              else None).run()
+            else:
+                status = True
+                buffer = None
+                start_stamp = time.time()
+                while status:
+                    # Time stamp for performance reporting
+                    read_start_stamp = time.time()
+                    status, frame = cap.read(buffer)
+                    read_end_stamp = time.time()
+                    self._run_inference(detector, frame)
+                    self._logger.debug(
+                        f'Read time '
+                        f'{read_end_stamp - read_start_stamp}')
+                    if reuse_frames:
+                        # the next frame is read into the same array
+                        detector.buffer_pool.release(frame)
+                        if frame is not None:
+                            buffer = detector.buffer_pool.acquire(
+                                frame.shape, frame.dtype)
+                end_stamp = time.time()
+                self._logger.debug(f'Done {end_stamp - start_stamp}')
+
+            cap.release()
+            self._logger.info(
+                f'Frame buffers {detector.buffer_pool.stats()}')
+            if detector.scheduler is not None:
+                self._logger.info(
+                    f'Inferred {detector.scheduler.frames_inferred} '
+                    f'frames, reused the inference on '
+                    f'{detector.scheduler.frames_skipped}')
@@ -0,0 +1,188 @@
+import logging
+from typing import Callable, Optional
+
+import cv2
+import numpy as np
+from numpy import ndarray
+
+from vsdkx.core.structs import Inference
+from vsdkx.core.util.io import get_env_dict
+
+LOG_TAG = "FrameScheduler"
+
+MODES = ("stride", "diff", "hash")
+
+
+def _copy(inference: Inference) -> Inference:
+    # the detector sanitizes the boxes in place and the addons modify extra
+    return Inference(boxes=inference.boxes.copy(),
+                     classes=inference.classes.copy(),
+                     scores=inference.scores.copy(),
+                     extra=dict(inference.extra))
+
+
+class FrameScheduler:
+    """
+    Decides for each frame of a video whether the model driver runs on it or
+    the model output of the last inferred frame is reused, which saves most
+    of the inference on static scenes. The addons still run on every frame.
+
+    With the stride mode the model runs on every stride-th frame. The diff
+    mode compares a downscaled grayscale of the frame with the one of the
+    last inferred frame and runs the model when the mean absolute difference
+    is above threshold, and the hash mode does the same with the number of
+    different bits of a difference hash. In any mode the model runs at the
+    latest after max_stale reused frames and when the frame size changes.
+    """
+
+    def __init__(self,
+                 mode: str = "stride",
+                 stride: int = 2,
+                 threshold: float = None,
+                 size: int = 16,
+                 max_stale: int = 10):
+        """
+        Initialize with mode
+
+        Args:
+            mode (str): stride, diff or hash
+            stride (int): run the model on every stride-th frame
+            threshold (float): change that makes the model run, mean absolute
+            difference in gray levels for diff, by default 4, and different
+            bits of the hash for hash, by default 5
+            size (int): side of the downscaled frame that is compared
+            max_stale (int): maximum number of frames in a row that reuse
+            the last inference
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown skip mode {mode}")
+        if stride <= 0 or max_stale < 0:
+            raise ValueError("stride must be positive and max_stale must "
+                             "not be negative")
+        self._logger = logging.getLogger(LOG_TAG)
+        self.mode = mode
+        self.stride = stride
+        self.threshold = threshold if threshold is not None \
+            else 4 if mode == "diff" else 5
+        self.size = size
+        self.max_stale = max_stale
+        self._last: Optional[Inference] = None
+        self._shape = None
+        self._reference = None
+        self._stale = 0
+        # the frame reuse last looked at and its signature
+        self._checked = (None, None)
+        self.frames_inferred = 0
+        self.frames_skipped = 0
+
+    @classmethod
+    def from_config(cls,
+                    system_config: dict) -> Optional["FrameScheduler"]:
+        """
+        Create a scheduler from the model.skip section, model.skip: true
+        uses the default settings
+
+        Args:
+            system_config: the config dictionary
+
+        Returns:
+            (FrameScheduler): the scheduler, None without model.skip
+        """
+        config = get_env_dict(system_config, "model.skip")
+        if not config:
+            return None
+        return cls(**(config if isinstance(config, dict) else {}))
+
+    def _signature(self, frame: ndarray) -> ndarray:
+        small = cv2.resize(frame, (self.size + 1, self.size)
+                           if self.mode == "hash" else (self.size, self.size),
+                           interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = small.mean(axis=2)
+        if self.mode == "hash":
+            return small[:, 1:] > small[:, :-1]
+        return small.astype(np.float32)
+
+    def _changed(self, signature: ndarray) -> bool:
+        if self.mode == "hash":
+            return np.count_nonzero(signature != self._reference) \
+                > self.threshold
+        return float(np.abs(signature - self._reference).mean()) \
+            > self.threshold
+
+    def infer(self, frame: ndarray,
+              inference: Callable[[], Inference]) -> Inference:
+        """
+        Return the output of inference, or of the last inferred frame when
+        the scheduler skips frame
+
+        Args:
+            frame: the pre processed frame
+            inference: runs the model driver on frame
+
+        Returns:
+            (Inference): a copy of the model output that may be modified
+        """
+        reused = self.reuse(frame)
+        if reused is not None:
+            return reused
+        result = inference()
+        self.update(frame, result)
+        return result
+
+    def reuse(self, frame: ndarray) -> Optional[Inference]:
+        """
+        Decide whether frame is skipped, for callers which run the model
+        themselves, e.g. in batches. Frames which aren't skipped must be
+        passed to update with their inference.
+
+        Args:
+            frame: the pre processed frame
+
+        Returns:
+            (Inference): a copy of the last model output when frame is
+            skipped, None when the model must run on it
+        """
+        signature = None
+        reuse = self._last is not None and frame.shape == self._shape \
+            and self._stale < self.max_stale
+        if reuse:
+            if self.mode == "stride":
+                reuse = (self._stale + 1) % self.stride != 0
+            else:
+                signature = self._signature(frame)
+                reuse = not self._changed(signature)
+        if reuse:
+            self._stale += 1
+            self.frames_skipped += 1
+            return _copy(self._last)
+        self._checked = (frame, signature)
+        return None
+
+    def update(self, frame: ndarray, inference: Inference):
+        """
+        Remember the model output of frame for the next frames
+
+        Args:
+            frame: the pre processed frame
+            inference: the model output of frame
+        """
+        checked, signature = self._checked
+        self._checked = (None, None)
+        self._last = _copy(inference)
+        self._shape = frame.shape
+        if self.mode != "stride":
+            self._reference = signature \
+                if checked is frame and signature is not None \
+                else self._signature(frame)
+        self._stale = 0
+        self.frames_inferred += 1
+
+    def reset(self):
+        """
+        Forget the last inference, so the model runs on the next frame
+        """
+        self._last = None
+        self._reference = None
+        self._checked = (None, None)
+        self._stale = 0
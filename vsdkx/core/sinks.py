@@ -0,0 +1,354 @@
+import glob
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from vsdkx.core.structs import Inference
+from vsdkx.core.util.codec import jsonable
+
+LOG_TAG = "ResultSink"
+
+_STOP = object()
+
+
+class Record:
+    """
+    A result queued for writing, with copies of the inference arrays so the
+    detector can reuse them right away
+
+    Attributes:
+        stream (str): name of the stream, None for a single video
+        frame (int): index of the frame in its stream
+        stamp (float): unix time the result was written
+        boxes (ndarray): (N, 4) boxes
+        classes (ndarray): class ids
+        scores (ndarray): scores
+        extra (dict): shallow copy of the extra of the inference
+    """
+
+    __slots__ = ("stream", "frame", "stamp", "boxes", "classes", "scores",
+                 "extra")
+
+    def __init__(self, stream: Optional[str], frame: int,
+                 inference: Inference):
+        self.stream = stream
+        self.frame = frame
+        self.stamp = time.time()
+        self.boxes = inference.boxes.copy()
+        self.classes = inference.classes.copy()
+        self.scores = inference.scores.copy()
+        self.extra = dict(inference.extra)
+
+
+class ResultSink(ABC):
+    """
+    Base of the result writers. write only queues the result, a background
+    thread takes up to batch_size results at once, or what arrived within
+    flush_interval seconds, and hands them to _write_batch. When the queue
+    of max_queue results is full write blocks, so a disk that is slower
+    than the detector for long slows the detector down instead of filling
+    the memory.
+
+    Subclasses implement _write_batch and optionally _open and _close.
+    """
+
+    def __init__(self,
+                 path: str,
+                 batch_size: int = 256,
+                 flush_interval: float = 1.0,
+                 max_queue: int = 4096):
+        """
+        Initialize with path
+
+        Args:
+            path (str): where the results are written
+            batch_size (int): maximum number of results written at once
+            flush_interval (float): maximum seconds a result waits for its
+            batch to fill up
+            max_queue (int): maximum number of results waiting to be written
+        """
+        if batch_size <= 0 or max_queue <= 0:
+            raise ValueError("batch_size and max_queue must be positive")
+        self._logger = logging.getLogger(LOG_TAG)
+        self.path = path
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._queue = queue.Queue(max_queue)
+        self._frames: Dict[Optional[str], int] = defaultdict(int)
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self.written = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._open()
+        self._thread = threading.Thread(target=self._run,
+                                        name="vsdkx-sink",
+                                        daemon=True)
+        self._thread.start()
+
+    def write(self, inference: Inference, stream: str = None,
+              frame: int = None):
+        """
+        Queue inference for writing, frames are numbered per stream in the
+        order they are written unless frame is given
+
+        Args:
+            inference (Inference): the result of a frame
+            stream (str): name of the stream the frame belongs to
+            frame (int): index of the frame in its stream
+        """
+        if self._error is not None:
+            raise self._error
+        if self._closed:
+            raise RuntimeError(f"{self.path} is closed")
+        if frame is None:
+            frame = self._frames[stream]
+        self._frames[stream] = frame + 1
+        self._queue.put(Record(stream, frame, inference))
+
+    def flush(self):
+        """
+        Block until the results queued so far are written
+        """
+        if self._closed:
+            return
+        flushed = threading.Event()
+        self._queue.put(flushed)
+        flushed.wait()
+        if self._error is not None:
+            raise self._error
+
+    def close(self):
+        """
+        Write the queued results and close the output
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._logger.info(f"Wrote {self.written} results to {self.path}")
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _run(self):
+        # flush puts an event which is set once the batch before it is written
+        stopping = False
+        flushed = None
+        try:
+            while not stopping:
+                record = self._queue.get()
+                if record is _STOP:
+                    break
+                if isinstance(record, threading.Event):
+                    record.set()
+                    continue
+                batch = [record]
+                deadline = time.monotonic() + self._flush_interval
+                while len(batch) < self._batch_size:
+                    timeout = deadline - time.monotonic()
+                    try:
+                        record = self._queue.get(timeout=max(timeout, 0))
+                    except queue.Empty:
+                        break
+                    if record is _STOP:
+                        stopping = True
+                        break
+                    if isinstance(record, threading.Event):
+                        flushed = record
+                        break
+                    batch.append(record)
+                self._write_batch(batch)
+                self.written += len(batch)
+                if flushed is not None:
+                    flushed.set()
+                    flushed = None
+        except BaseException as e:
+            self._error = e
+            self._logger.error(f"Writing to {self.path} failed: {e}")
+            if flushed is not None:
+                # the flush which ended the failed batch
+                flushed.set()
+            # keep draining so writers blocked on a full queue or a flush
+            # get released
+            while True:
+                record = self._queue.get()
+                if record is _STOP:
+                    break
+                if isinstance(record, threading.Event):
+                    record.set()
+        finally:
+            try:
+                self._close()
+            except BaseException as e:
+                if self._error is None:
+                    self._error = e
+
+    def _open(self):
+        pass
+
+    @abstractmethod
+    def _write_batch(self, records: List[Record]):
+        """
+        Write records, called on the writer thread
+
+        Args:
+            records (List[Record]): up to batch_size results in the order
+            they were written
+        """
+
+    def _close(self):
+        pass
+
+
+class JSONLinesSink(ResultSink):
+    """
+    Writes one JSON object per result and line
+    """
+
+    def _open(self):
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _write_batch(self, records: List[Record]):
+        self._file.write("".join(
+            json.dumps({"stream": record.stream,
+                        "frame": record.frame,
+                        "stamp": record.stamp,
+                        "boxes": record.boxes.tolist(),
+                        "classes": record.classes.tolist(),
+                        "scores": record.scores.tolist(),
+                        "extra": record.extra},
+                       default=jsonable) + "\n"
+            for record in records))
+        self._file.flush()
+
+    def _close(self):
+        self._file.close()
+
+
+def _columns(records: List[Record]) -> dict:
+    # the arrays of all the records joined, with offsets to split them
+    counts = np.array([len(record.boxes) for record in records], np.int64)
+    class_counts = np.array([record.classes.size for record in records],
+                            np.int64)
+    return {
+        "stream": np.array(["" if record.stream is None else record.stream
+                            for record in records]),
+        "frame": np.array([record.frame for record in records], np.int64),
+        "stamp": np.array([record.stamp for record in records], np.float64),
+        "box_offsets": np.concatenate(([0], np.cumsum(counts))),
+        "boxes": np.concatenate([record.boxes.reshape(-1, 4)
+                                 .astype(np.float32, copy=False)
+                                 for record in records]),
+        "class_offsets": np.concatenate(([0], np.cumsum(class_counts))),
+        "classes": np.concatenate([record.classes.reshape(-1)
+                                   for record in records]),
+        "scores": np.concatenate([record.scores for record in records]),
+        "extra": np.array([json.dumps(record.extra, default=jsonable)
+                           for record in records]),
+    }
+
+
+class NpzChunkSink(ResultSink):
+    """
+    Writes every batch to its own numbered npz file next to path. The boxes,
+    classes and scores of all the frames of a chunk are joined into single
+    arrays, box_offsets and class_offsets give the rows of each frame.
+    Numbering continues after the chunks already next to path.
+    """
+
+    def __init__(self, path: str, compress: bool = False, **kwargs):
+        self._stem = path[:-4] if path.endswith(".npz") else path
+        self._save = np.savez_compressed if compress else np.savez
+        chunks = glob.glob(f"{glob.escape(self._stem)}-"
+                           f"[0-9][0-9][0-9][0-9][0-9][0-9].npz")
+        self._chunk = max((int(chunk[-10:-4]) + 1 for chunk in chunks),
+                          default=0)
+        super().__init__(path, **kwargs)
+
+    def _write_batch(self, records: List[Record]):
+        self._save(f"{self._stem}-{self._chunk:06d}.npz", **_columns(records))
+        self._chunk += 1
+
+
+class ParquetSink(ResultSink):
+    """
+    Writes the results to a Parquet file with one row per frame, boxes,
+    classes and scores are list columns. It needs the optional pyarrow
+    package.
+    """
+
+    def __init__(self, path: str, **kwargs):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("The parquet sink needs the pyarrow package, "
+                              "install it with pip install pyarrow")
+        self._pa = pyarrow
+        self._writer = None
+        self._parquet = pyarrow.parquet
+        super().__init__(path, **kwargs)
+
+    def _write_batch(self, records: List[Record]):
+        pa = self._pa
+        columns = _columns(records)
+        table = pa.table({
+            "stream": columns["stream"],
+            "frame": columns["frame"],
+            "stamp": columns["stamp"],
+            "boxes": pa.ListArray.from_arrays(
+                pa.array(columns["box_offsets"].astype(np.int32)),
+                pa.FixedSizeListArray.from_arrays(
+                    pa.array(columns["boxes"].reshape(-1)), 4)),
+            "classes": pa.ListArray.from_arrays(
+                pa.array(columns["class_offsets"].astype(np.int32)),
+                pa.array(columns["classes"])),
+            "scores": pa.ListArray.from_arrays(
+                pa.array(columns["box_offsets"].astype(np.int32)),
+                pa.array(columns["scores"])),
+            "extra": columns["extra"],
+        })
+        if self._writer is None:
+            self._writer = self._parquet.ParquetWriter(self.path,
+                                                       table.schema)
+        self._writer.write_table(table)
+
+    def _close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+SINKS = {"jsonl": JSONLinesSink, "npz": NpzChunkSink,
+         "parquet": ParquetSink}
+
+
+def open_sink(kind: str, path: str, **kwargs) -> ResultSink:
+    """
+    Create a sink by name
+
+    Args:
+        kind (str): jsonl, npz or parquet
+        path (str): where the results are written
+        kwargs: further arguments of the sink
+
+    Returns:
+        (ResultSink): the sink, close it when done
+    """
+    if kind not in SINKS:
+        raise ValueError(f"Unknown sink {kind}")
+    return SINKS[kind](path, **kwargs)
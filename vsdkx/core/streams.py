@@ -0,0 +1,238 @@
+import logging
+import queue
+import threading
+import time
+from typing import Callable, List, Union
+
+from numpy import ndarray
+
+from vsdkx.core.capture import open_capture
+from vsdkx.core.detector import EventDetector
+from vsdkx.core.structs import Inference
+from vsdkx.core.util.queues import DropOldestQueue
+
+LOG_TAG = "MultiStreamRunner"
+
+
+class StreamStats:
+    """
+    Running statistics of one stream
+
+    Attributes:
+        frames_read (int): number of frames read from the source
+        frames_processed (int): number of frames that went through the
+        detector
+        fps (float): processed frames per second over the last report interval
+        lag (float): mean seconds between reading a frame and finishing its
+        post processing over the last report interval
+    """
+
+    def __init__(self):
+        self.frames_read = 0
+        self.frames_processed = 0
+        self.fps = 0.0
+        self.lag = 0.0
+        self._window_frames = 0
+        self._window_lag = 0.0
+        self._window_start = time.monotonic()
+
+    def processed(self, read_stamp: float):
+        self.frames_processed += 1
+        self._window_frames += 1
+        self._window_lag += time.monotonic() - read_stamp
+
+    def roll(self):
+        """
+        Close the current report window and update fps and lag from it
+        """
+        now = time.monotonic()
+        elapsed = now - self._window_start
+        if elapsed > 0:
+            self.fps = self._window_frames / elapsed
+        if self._window_frames > 0:
+            self.lag = self._window_lag / self._window_frames
+        self._window_frames = 0
+        self._window_lag = 0.0
+        self._window_start = now
+
+
+class _Stream:
+    def __init__(self, source: Union[str, int], detector: EventDetector,
+                 queue_size: int, drop_oldest: bool):
+        self.name = str(source)
+        self.source = source
+        self.detector = detector
+        self.frames = DropOldestQueue(queue_size) if drop_oldest \
+            else queue.Queue(queue_size)
+        self.stats = StreamStats()
+        self.done = threading.Event()
+        self.capture = None
+        self.thread = None
+
+    @property
+    def finished(self) -> bool:
+        return self.done.is_set() and self.frames.empty()
+
+
+class MultiStreamRunner:
+    """
+    Serves many video sources with one loaded model. Each stream gets its own
+    detector from EventDetector.fork, so the model driver is shared but the
+    addon state is kept per stream. Frames are taken from the streams in
+    round robin order and up to batch_size frames of different streams go
+    through the model driver with a single inference_batch call of
+    EventDetector.detect_batch.
+    """
+
+    def __init__(self,
+                 detector: EventDetector,
+                 sources: List[Union[str, int]],
+                 on_result: Callable[[str, ndarray, Inference], None] = None,
+                 batch_size: int = 1,
+                 queue_size: int = 2,
+                 drop_oldest: bool = True,
+                 report_interval: float = 10.0,
+                 capture_config: dict = None):
+        """
+        Initialize with detector and sources
+
+        Args:
+            detector (EventDetector): detector whose model driver is shared
+            by all the streams
+            sources (List[str|int]): video paths, urls or camera indexes
+            on_result (Callable): called with the stream name, the frame and
+            its inference after all addons got applied
+            batch_size (int): maximum number of frames of different streams
+            that are inferred together
+            queue_size (int): number of frames buffered for each stream
+            drop_oldest (bool): drop the oldest buffered frame of a stream
+            instead of blocking its reader when inference falls behind
+            report_interval (float): seconds between per stream fps and lag
+            reports in the log
+            capture_config (dict): capture section of the system config that
+            the sources are opened with, see open_capture
+        """
+        if batch_size <= 0:
+            raise ValueError("batch_size must be positive")
+        self._logger = logging.getLogger(LOG_TAG)
+        self._detector = detector
+        self._on_result = on_result
+        self._batch_size = batch_size
+        self._report_interval = report_interval
+        self._capture_config = capture_config
+        self._streams = [_Stream(source, detector.fork(), queue_size,
+                                 drop_oldest)
+                         for source in sources]
+        self._available = threading.Event()
+        self._stopped = threading.Event()
+        self._next = 0
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            (dict): StreamStats of each stream by stream name
+        """
+        return {stream.name: stream.stats for stream in self._streams}
+
+    def stop(self):
+        """
+        Ask the runner and all the readers to stop
+        """
+        self._stopped.set()
+        self._available.set()
+
+    def run(self):
+        """
+        Open all the sources and run until all of them are exhausted or stop
+        is called. The forked detectors of the streams are closed at the end,
+        the detector passed to the runner is left open.
+        """
+        report_stamp = time.monotonic()
+        try:
+            for stream in self._streams:
+                stream.capture = open_capture(stream.source,
+                                              self._capture_config)
+                assert stream.capture.isOpened(), \
+                    f"Video open failed for {stream.name}."
+            for stream in self._streams:
+                stream.thread = threading.Thread(target=self._read,
+                                                 args=(stream,),
+                                                 name=f"vsdkx-{stream.name}",
+                                                 daemon=True)
+                stream.thread.start()
+            while not self._stopped.is_set():
+                self._available.clear()
+                batch = self._next_batch()
+                if batch:
+                    self._process(batch)
+                elif all(stream.finished for stream in self._streams):
+                    break
+                else:
+                    self._available.wait(0.1)
+                if time.monotonic() - report_stamp >= self._report_interval:
+                    self._report()
+                    report_stamp = time.monotonic()
+        finally:
+            self.stop()
+            for stream in self._streams:
+                if stream.thread is not None:
+                    stream.thread.join()
+                if stream.capture is not None:
+                    stream.capture.release()
+                stream.detector.close()
+            self._report()
+
+    def _read(self, stream: _Stream):
+        try:
+            while not self._stopped.is_set():
+                status, frame = stream.capture.read()
+                if not status:
+                    break
+                stream.stats.frames_read += 1
+                item = (frame, time.monotonic())
+                while not self._stopped.is_set():
+                    try:
+                        stream.frames.put(item, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                self._available.set()
+        finally:
+            stream.done.set()
+            self._available.set()
+
+    def _next_batch(self) -> list:
+        # one frame per stream and round, starting after the stream which
+        # was served first last time, so every stream gets its turn
+        batch = []
+        count = len(self._streams)
+        for offset in range(count):
+            stream = self._streams[(self._next + offset) % count]
+            try:
+                frame, stamp = stream.frames.get_nowait()
+            except queue.Empty:
+                continue
+            batch.append((stream, frame, stamp))
+            if len(batch) == self._batch_size:
+                break
+        self._next = (self._next + 1) % count
+        return batch
+
+    def _process(self, batch: list):
+        results = self._detector.detect_batch(
+            [frame for _, frame, _ in batch],
+            [{"stream": stream.name} for stream, _, _ in batch],
+            [stream.detector for stream, _, _ in batch])
+        for (stream, frame, stamp), result in zip(batch, results):
+            stream.stats.processed(stamp)
+            if self._on_result is not None:
+                self._on_result(stream.name, frame, result)
+
+    def _report(self):
+        for stream in self._streams:
+            stream.stats.roll()
+            self._logger.info(f"Stream {stream.name}: "
+                              f"{stream.stats.fps:.2f} fps, "
+                              f"lag {stream.stats.lag:.3f}s, "
+                              f"processed {stream.stats.frames_processed} of "
+                              f"{stream.stats.frames_read} frames")
@@ -1,23 +1,121 @@
 from dataclasses import dataclass, field
+import numpy
 from numpy import ndarray
 from typing import Optional
 
+from vsdkx.core.util.buffers import BufferLease
+
+
+def _as_array(value, dtype, columns: int = None) -> ndarray:
+    # no copy when value already is a contiguous array of the right dtype.
+    # With columns, flat values are split into rows and wider rows, e.g.
+    # boxes followed by score and class, are cut to their first columns
+    if value is None:
+        value = ()
+    array = numpy.asarray(value, dtype=dtype)
+    if columns is not None and array.shape[1:] != (columns,):
+        if array.ndim <= 1:
+            array = array.reshape(-1, columns)
+        elif array.ndim == 2 and array.shape[1] > columns:
+            array = array[:, :columns]
+        else:
+            raise ValueError(f"expected an (N, {columns}) array, got shape "
+                             f"{array.shape}")
+    return numpy.ascontiguousarray(array)
+
+
+def _equal(a, b) -> bool:
+    # == of dicts and lists raises on arrays with more than one element
+    if isinstance(a, ndarray) or isinstance(b, ndarray):
+        return numpy.array_equal(a, b)
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() \
+            and all(_equal(a[key], b[key]) for key in a)
+    if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+        return type(a) is type(b) and len(a) == len(b) \
+            and all(_equal(x, y) for x, y in zip(a, b))
+    return bool(a == b)
+
 
-@dataclass
 class Inference:
     """
-    This is the structure of inference result
+    This is the structure of inference result. The arrays are kept
+    contiguous, boxes as int32 if they are integers and float32 otherwise,
+    classes as int32 and scores as float32. Converting only copies when the
+    given arrays don't already have that layout.
+
+    It can be used like a read only dict with boxes, classes, scores and
+    extra as keys, so Inference(**inference) makes a shallow copy.
 
     Attributes:
-        boxes (ndarray): numpy array of box coordinates
+        boxes (ndarray): (N, 4) numpy array of box coordinates, int32 after
+        EventDetector sanitized them. Wider (N, 5) or (N, 6) rows keep their
+        first four columns
         classes (ndarray): class ids for each bounding box
         scores (ndarray): confidence scores for each bounding box
         extra (dict): a dictionary to pass data between model driver and addonsxxxx
     """
-    boxes: ndarray = field(default_factory=lambda: [])
-    classes: ndarray = field(default_factory=lambda: [])
-    scores: ndarray = field(default_factory=lambda: [])
-    extra: dict = field(default_factory=lambda: {})
+
+    __slots__ = ("_boxes", "_classes", "_scores", "extra")
+
+    _FIELDS = ("boxes", "classes", "scores", "extra")
+
+    def __init__(self,
+                 boxes: ndarray = None,
+                 classes: ndarray = None,
+                 scores: ndarray = None,
+                 extra: dict = None):
+        self.boxes = boxes
+        self.classes = classes
+        self.scores = scores
+        self.extra = {} if extra is None else extra
+
+    @property
+    def boxes(self) -> ndarray:
+        return self._boxes
+
+    @boxes.setter
+    def boxes(self, value):
+        dtype = numpy.int32 \
+            if numpy.issubdtype(numpy.asarray(value).dtype, numpy.integer) \
+            else numpy.float32
+        self._boxes = _as_array(value, dtype, 4)
+
+    @property
+    def classes(self) -> ndarray:
+        return self._classes
+
+    @classes.setter
+    def classes(self, value):
+        self._classes = _as_array(value, numpy.int32)
+
+    @property
+    def scores(self) -> ndarray:
+        return self._scores
+
+    @scores.setter
+    def scores(self, value):
+        self._scores = _as_array(value, numpy.float32)
+
+    def keys(self):
+        return self._FIELDS
+
+    def __getitem__(self, key: str):
+        if key not in self._FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __eq__(self, other):
+        if not isinstance(other, Inference):
+            return NotImplemented
+        return numpy.array_equal(self.boxes, other.boxes) \
+            and numpy.array_equal(self.classes, other.classes) \
+            and numpy.array_equal(self.scores, other.scores) \
+            and _equal(self.extra, other.extra)
+
+    def __repr__(self):
+        return f"Inference(boxes={self.boxes!r}, classes={self.classes!r}, " \
+               f"scores={self.scores!r}, extra={self.extra!r})"
 
 
 @dataclass
@@ -29,10 +127,13 @@ class AddonObject:
         frame (ndarray): frame image
         inference (Inference): AI inference result
         shared (dict): data to be shared between addons
+        buffers (BufferLease): scratch arrays for the addons, released when
+        the frame finished the pipeline, None in addon worker processes
     """
     frame: ndarray
     inference: Optional[Inference]
     shared: dict = field(default_factory=lambda: {})
+    buffers: Optional[BufferLease] = None
 
 
 @dataclass
@@ -0,0 +1,130 @@
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+Key = Tuple[Tuple[int, ...], str]
+
+
+class BufferPool:
+    """
+    Reusable frame sized arrays, kept by shape and dtype. Releasing an array
+    makes it available to the next acquire of the same shape and dtype, so a
+    video loop doesn't allocate and page fault a new frame every iteration.
+    Arrays are handed out uninitialized.
+
+    Attributes:
+        allocated (int): number of arrays created
+        reused (int): number of acquires served from the pool, i.e. the
+        allocations saved
+    """
+
+    def __init__(self, max_per_key: int = 8):
+        """
+        Initialize with max_per_key
+
+        Args:
+            max_per_key (int): maximum number of free arrays kept for each
+            shape and dtype, further released arrays are left to the garbage
+            collector
+        """
+        self._max_per_key = max_per_key
+        self._free: Dict[Key, List[np.ndarray]] = defaultdict(list)
+        self._lock = threading.Lock()
+        self.allocated = 0
+        self.reused = 0
+
+    def acquire(self, shape: Tuple[int, ...],
+                dtype=np.uint8) -> np.ndarray:
+        """
+        Take an array from the pool or allocate it
+
+        Args:
+            shape: shape of the array
+            dtype: dtype of the array
+
+        Returns:
+            (np.ndarray): uninitialized contiguous array
+        """
+        key = (tuple(shape), np.dtype(dtype).str)
+        with self._lock:
+            free = self._free.get(key)
+            if free:
+                self.reused += 1
+                return free.pop()
+            self.allocated += 1
+        return np.empty(shape, dtype)
+
+    def release(self, array: Optional[np.ndarray]):
+        """
+        Give an array back, it must not be used afterwards. Views and arrays
+        which don't own their memory are ignored.
+
+        Args:
+            array: the array to release, None is ignored
+        """
+        if array is None or array.base is not None \
+                or not array.flags.c_contiguous:
+            return
+        key = (array.shape, array.dtype.str)
+        with self._lock:
+            free = self._free[key]
+            if len(free) < self._max_per_key \
+                    and not any(item is array for item in free):
+                free.append(array)
+
+    def lease(self) -> "BufferLease":
+        """
+        Returns:
+            (BufferLease): a lease whose arrays are released together
+        """
+        return BufferLease(self)
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            (dict): allocated, reused and the number of free arrays
+        """
+        with self._lock:
+            free = sum(len(arrays) for arrays in self._free.values())
+        return {"allocated": self.allocated,
+                "reused": self.reused,
+                "free": free}
+
+
+class BufferLease:
+    """
+    Scratch arrays borrowed from a BufferPool for one frame. EventDetector
+    gives each frame a lease in AddonObject.buffers and releases it when the
+    frame finished the pipeline, so addons must not keep its arrays, e.g. in
+    inference.extra, beyond that.
+    """
+
+    def __init__(self, pool: BufferPool):
+        self._pool = pool
+        self._arrays: List[np.ndarray] = []
+
+    def acquire(self, shape: Tuple[int, ...],
+                dtype=np.uint8) -> np.ndarray:
+        """
+        Borrow an uninitialized array until the lease is released
+
+        Args:
+            shape: shape of the array
+            dtype: dtype of the array
+
+        Returns:
+            (np.ndarray): uninitialized contiguous array
+        """
+        array = self._pool.acquire(shape, dtype)
+        self._arrays.append(array)
+        return array
+
+    def release(self):
+        """
+        Give all the borrowed arrays back to the pool
+        """
+        arrays, self._arrays = self._arrays, []
+        for array in arrays:
+            self._pool.release(array)
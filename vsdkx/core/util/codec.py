@@ -0,0 +1,106 @@
+import json
+import struct
+from typing import List, Union
+
+import numpy as np
+
+from vsdkx.core.structs import Inference
+
+MAGIC = b"VSDI"
+VERSION = 1
+
+# magic, version, boxes dtype, classes ndim, box count, classes columns,
+# length of extra, padded to 24 bytes so the arrays after it stay aligned
+_HEADER = struct.Struct("<4sBcBxIII4x")
+
+_BOX_DTYPES = {b"i": np.int32, b"f": np.float32}
+
+
+def jsonable(value):
+    """
+    The default of json.dumps for numpy arrays and scalars, e.g. in the
+    extra of an inference
+
+    Args:
+        value: the value json can't serialize
+
+    Returns:
+        the value as a list or a python scalar
+    """
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} in extra is not serializable")
+
+
+def _raw(array: np.ndarray) -> memoryview:
+    # flat byte view of a contiguous array, also for empty ones
+    return memoryview(array.reshape(-1).view(np.uint8))
+
+
+def encode_inference(inference: Inference) -> List[memoryview]:
+    """
+    Encode an inference without copying its arrays. The result is a header
+    followed by the raw boxes, classes and scores buffers and the JSON
+    encoded extra, ready for scatter/gather writes. Use b"".join on it when a
+    single bytes object is needed.
+
+    Args:
+        inference (Inference): the inference to encode
+
+    Returns:
+        (List[memoryview]): the buffers in order
+    """
+    count = len(inference.boxes)
+    classes = inference.classes
+    if len(classes) != count or len(inference.scores) != count:
+        raise ValueError("boxes, classes and scores have different lengths")
+    columns = classes.shape[1] if classes.ndim == 2 else 1
+    extra = json.dumps(inference.extra, default=jsonable).encode() \
+        if inference.extra else b""
+    header = _HEADER.pack(MAGIC,
+                          VERSION,
+                          b"i" if inference.boxes.dtype == np.int32 else b"f",
+                          classes.ndim,
+                          count,
+                          columns,
+                          len(extra))
+    return [memoryview(header),
+            _raw(inference.boxes),
+            _raw(classes),
+            _raw(inference.scores),
+            memoryview(extra)]
+
+
+def decode_inference(buffer: Union[bytes, bytearray, memoryview]) -> Inference:
+    """
+    Decode an inference encoded with encode_inference. The arrays of the
+    result are read only views into buffer, so buffer must not be modified
+    while they are in use.
+
+    Args:
+        buffer (bytes|bytearray|memoryview): the encoded inference
+
+    Returns:
+        (Inference): the decoded inference
+    """
+    buffer = memoryview(buffer)
+    magic, version, box_dtype, classes_ndim, count, columns, extra_length = \
+        _HEADER.unpack_from(buffer)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("buffer is not an encoded inference")
+    offset = _HEADER.size
+    boxes = np.frombuffer(buffer, _BOX_DTYPES[box_dtype], count * 4, offset)
+    offset += boxes.nbytes
+    classes = np.frombuffer(buffer, np.int32, count * columns, offset)
+    offset += classes.nbytes
+    scores = np.frombuffer(buffer, np.float32, count, offset)
+    offset += scores.nbytes
+    extra = json.loads(bytes(buffer[offset:offset + extra_length])) \
+        if extra_length else {}
+    return Inference(boxes=boxes.reshape(count, 4),
+                     classes=classes.reshape(count, columns)
+                     if classes_ndim == 2 else classes,
+                     scores=scores,
+                     extra=extra)
@@ -1,7 +1,181 @@
+from typing import Dict, Tuple
+
 from numpy import ndarray
 import numpy
 import cv2
 
+_FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+
+class Renderer:
+    """
+    Draws the zones, boxes and labels of the drawing config. The config is
+    compiled once into colors, thicknesses and int32 zone polylines, and
+    again only when it changes, which is checked once per call. All zones
+    are drawn with a single polylines call, the boxes and their labels like
+    before, so box_thickness -1 still fills them.
+
+    With overlay set in the drawing config the drawing goes to a separate
+    layer which is composed onto the frames, blended with overlay_alpha, and
+    only redrawn when the frame size or the boxes, scores or classes
+    change, e.g. when FrameScheduler reuses an inference.
+    """
+
+    def __init__(self, draw_config: dict):
+        """
+        Initialize with draw_config
+
+        Args:
+            draw_config (dict): configuration for the drawing like font and
+            colors, it may be changed in place later
+        """
+        self.config = draw_config
+        self._compiled_from = None
+        self._layer_key = None
+
+    def _compile(self):
+        if self._compiled_from == self.config:
+            return
+        config = self.config
+        self._zones = [numpy.asarray(zone, dtype=numpy.int32).reshape(-1, 2)
+                       for zone in config.get("zones", [])]
+        self._zones_color = config.get("zones_color", (0, 0, 0))
+        self._zone_thickness = config.get("zone_thickness", 3)
+        self._rectangle_color = config.get("rectangle_color") \
+            or (60, 179, 113)
+        self._box_thickness = config.get("box_thickness") or 3
+        self._text_thickness = config.get("box_thickness", 3)
+        self._font_scale = config.get("box_font_scale", 0.8)
+        self._text_color = config.get("text_color", (0, 0, 0))
+        self._overlay = config.get("overlay", False)
+        self._alpha = config.get("overlay_alpha", 1.0)
+        self._coverage_renderer = None
+        self._layer_key = None
+        self._compiled_from = dict(config)
+
+    def draw_zones(self, image: ndarray):
+        """
+        Args:
+            image (ndarray): raw frame of a video
+        """
+        self._compile()
+        self._draw_zones(image)
+
+    def _draw_zones(self, image: ndarray):
+        if self._zones:
+            cv2.polylines(image, self._zones, True,
+                          color=self._zones_color,
+                          thickness=self._zone_thickness)
+
+    def draw_boxes(self, image: ndarray, boxes: ndarray,
+                   scores: ndarray = None, classes: ndarray = None):
+        """
+        Args:
+            image (ndarray): raw frame of a video
+            boxes (ndarray): (N, 4) array of box coordinates
+            scores (ndarray): confidence scores, drawn as labels
+            classes (ndarray): class ids, not drawn
+        """
+        self._compile()
+        self._draw_boxes(image, boxes, scores)
+
+    def _draw_boxes(self, image: ndarray, boxes: ndarray, scores: ndarray):
+        if image is None or boxes is None or len(boxes) == 0:
+            return
+        corners = (numpy.asarray(boxes)[:, :4].astype(numpy.int32)
+                   + numpy.array((2, -2, 2, -2), dtype=numpy.int32)).tolist()
+        scores = [None] * len(corners) if scores is None \
+            else numpy.asarray(scores).tolist()
+        for (x1, y1, x2, y2), score in zip(corners, scores):
+            cv2.rectangle(image, (x1, y1), (x2, y2), self._rectangle_color,
+                          self._box_thickness)
+            if score:
+                cv2.putText(image, ": %.2f" % score, (x1, y1), _FONT,
+                            self._font_scale, self._text_color,
+                            self._text_thickness)
+
+    def render(self, image: ndarray, boxes: ndarray = None,
+               scores: ndarray = None, classes: ndarray = None):
+        """
+        Draw the zones and the boxes onto image, through the cached layer
+        when overlay is set in the drawing config
+
+        Args:
+            image (ndarray): raw frame of a video
+            boxes (ndarray): (N, 4) array of box coordinates
+            scores (ndarray): confidence scores, drawn as labels
+            classes (ndarray): class ids, not drawn
+        """
+        if image is None:
+            return
+        self._compile()
+        if not self._overlay:
+            self._draw_zones(image)
+            self._draw_boxes(image, boxes, scores)
+            return
+        key = _layer_key(image, boxes, scores, classes)
+        if key != self._layer_key:
+            self._draw_layer(image, boxes, scores)
+            self._layer_key = key
+        layer = self._layer
+        if self._alpha < 1.0:
+            layer = cv2.addWeighted(image, 1.0 - self._alpha, layer,
+                                    self._alpha, 0)
+        cv2.copyTo(layer, self._solid, image)
+        if len(self._edges) and image.flags.c_contiguous:
+            # the anti-aliased edges are blended by their coverage
+            pixels = image.reshape(len(self._solid.reshape(-1)), -1)
+            weights = self._edge_weights * self._alpha
+            pixels[self._edges] = (pixels[self._edges] * (1 - weights)
+                                   + self._edge_colors * weights + 0.5
+                                   ).astype(image.dtype)
+
+    def _draw_layer(self, image: ndarray, boxes: ndarray, scores: ndarray):
+        # the drawing on black and the same drawing in white on a single
+        # channel, which is how much each pixel is covered
+        layer = numpy.zeros_like(image)
+        self._draw_zones(layer)
+        self._draw_boxes(layer, boxes, scores)
+        if self._coverage_renderer is None:
+            self._coverage_renderer = Renderer(
+                dict(self.config, zones_color=255, rectangle_color=255,
+                     text_color=255, overlay=False))
+            self._coverage_renderer._compile()
+        coverage = numpy.zeros(image.shape[:2], dtype=numpy.uint8)
+        self._coverage_renderer._draw_zones(coverage)
+        self._coverage_renderer._draw_boxes(coverage, boxes, scores)
+        self._layer = layer
+        self._solid = (coverage == 255).view(numpy.uint8)
+        coverage = coverage.reshape(-1)
+        self._edges = numpy.flatnonzero((coverage > 0) & (coverage < 255))
+        self._edge_weights = \
+            coverage[self._edges, None].astype(numpy.float32) / 255
+        # colors of the edges were blended with black
+        self._edge_colors = numpy.minimum(
+            layer.reshape(len(coverage), -1)[self._edges]
+            / self._edge_weights, 255)
+
+
+def _layer_key(image: ndarray, boxes, scores, classes) -> Tuple:
+    return (image.shape,
+            None if boxes is None else numpy.asarray(boxes).tobytes(),
+            None if scores is None else numpy.asarray(scores).tobytes(),
+            None if classes is None else numpy.asarray(classes).tobytes())
+
+
+_renderers: Dict[int, Renderer] = {}
+
+
+def _renderer(draw_config: dict) -> Renderer:
+    # renderer of draw_config for the functions below, the renderer keeps a
+    # reference to the config so its id stays unique
+    renderer = _renderers.get(id(draw_config))
+    if renderer is None or renderer.config is not draw_config:
+        if len(_renderers) >= 16:
+            _renderers.clear()
+        renderer = _renderers[id(draw_config)] = Renderer(draw_config)
+    return renderer
+
 
 def draw_zones(draw_config: dict, image: ndarray):
     """
@@ -11,14 +185,7 @@ def draw_zones(draw_config: dict, image: ndarray):
         draw_config (dict): configuration for the drawing like font and colors
         image (ndarray): raw frame of a video
     """
-    for zone in draw_config.get("zones", []):
-        zone = numpy.array(zone)
-
-        cv2.polylines(image,
-                      [zone],
-                      True,
-                      color=draw_config.get("zones_color", (0, 0, 0)),
-                      thickness=draw_config.get("zone_thickness", 3))
+    _renderer(draw_config).draw_zones(image)
 
 
 def draw_boxes(
@@ -38,67 +205,7 @@ def draw_boxes(
         scores (ndarray):
         classes:
     """
-    if image is None or boxes is None:
-        return
-
-    height, width, _ = image.shape
-    bboxes = []
-
-    # for each list of bbox indices needed for NMS,
-    # we compute a confidence interval,
-    # and draw object bboxes
-    for idx, box in enumerate(boxes):
-        conf = ""
-        if scores is not None:
-            conf = float(scores[idx])
-        if classes is not None:
-            class_id = int(classes[idx][0])
-        else:
-            class_id = 0
-
-        xmin, ymin, xmax, ymax = box[0], box[1], box[2], box[3]
-        bbox = (
-            [xmin, ymin, xmax, ymax], class_id)
-        bboxes.append(bbox)
-
-        label = ""
-
-        # TODO: discuss what to do with different size bbox color change
-        #  feature. This feature was used for face mask detection only
-        #  and now it has to be commented out here (didn't delete before
-        #  consulting) for the sake of generalisation
-        box_width = xmax - xmin
-        box_height = ymax - ymin
-        # if bbox size is < certain threshold, make color white
-        # or transparent
-        # if (box_width * box_height) < (blur_threshold * width * height):
-        #     color = (255, 255, 255)
-        #     label = ''
-        # when wearing mask
-        # if classes is not None and id2class is not None:
-        #     if class_id in id2class:
-        #         option = id2class[class_id]
-        #         color = option["color"]
-        #         label = option["text"]
-
-        rectangle_color = draw_config.get(
-            "rectangle_color") or (60, 179, 113)
-        box_thickness = draw_config.get(
-            "box_thickness") or 3
-
-        cv2.rectangle(image,
-                      (xmin + 2, ymin - 2),
-                      (xmax + 2, ymax - 2),
-                      rectangle_color,
-                      box_thickness)
-        if label or conf:
-            cv2.putText(image,
-                        "%s: %.2f" % (label, conf),
-                        (xmin + 2, ymin - 2),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        draw_config.get("box_font_scale", 0.8),
-                        draw_config.get("text_color", (0, 0, 0)),
-                        draw_config.get("box_thickness", 3))
+    _renderer(draw_config).draw_boxes(image, boxes, scores, classes)
 
 
 def show_window(frame: ndarray):
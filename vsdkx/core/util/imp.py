@@ -6,3 +6,18 @@ def import_default_settings(path):
     module = importlib.import_module(settings_file)
     default_settings = getattr(module, settings_var)
     return default_settings
+
+
+def import_class(path):
+    """
+    Imports a class from its dotted path
+
+    Args:
+        path (str): module path and class name joined with a dot
+
+    Returns:
+        (type): the class
+    """
+    module_name, class_name = path.rsplit(".", 1)
+    module = importlib.import_module(module_name)
+    return getattr(module, class_name)
@@ -1,5 +1,18 @@
-import yaml
+import logging
 import os
+import threading
+from functools import lru_cache
+from typing import Callable
+
+import yaml
+
+try:
+    # the libyaml based loader is several times faster when it's available
+    from yaml import CFullLoader as _Loader
+except ImportError:
+    from yaml import FullLoader as _Loader
+
+LOG_TAG = "Config"
 
 
 def import_yaml(path):
@@ -14,7 +27,7 @@ def import_yaml(path):
         (dict): dictionary of yaml key-value pairs
     """
     with open(path) as config_file:
-        config_data = yaml.load(config_file, Loader=yaml.FullLoader)
+        config_data = yaml.load(config_file, Loader=_Loader)
     return config_data
 
 
@@ -39,10 +52,10 @@ def get_env(file: str, key: str, default=None):
     if file is None:
         return default
     try:
-        node = import_yaml(file)
+        config = _cached_config(file)
     except FileNotFoundError:
         return default
-    return get_env_dict(node, key, default)
+    return config.get(key, default)
 
 
 def get_env_dict(node: dict, key: str, default=None):
@@ -67,8 +80,7 @@ def get_env_dict(node: dict, key: str, default=None):
     """
     if node is None:
         return default
-    path = key.split(".")
-    for p in path:
+    for p in _split_key(key):
         if p in node:
             node = node[p]
         else:
@@ -77,3 +89,150 @@ def get_env_dict(node: dict, key: str, default=None):
         if node.startswith("${") and node.endswith("}"):
             return os.getenv(node[2:-1], default)
     return node
+
+
+@lru_cache(maxsize=1024)
+def _split_key(key: str) -> tuple:
+    return tuple(key.split("."))
+
+
+_MISSING = object()
+
+
+def _resolve(node):
+    # replaces ${ENV} strings with the value of the environment variable,
+    # keys of unset variables are dropped so lookups return their default
+    if isinstance(node, dict):
+        resolved = {}
+        for key, value in node.items():
+            value = _resolve(value)
+            if value is not _MISSING:
+                resolved[key] = value
+        return resolved
+    if isinstance(node, str) and node.startswith("${") and node.endswith("}"):
+        return os.environ.get(node[2:-1], _MISSING)
+    return node
+
+
+def _index(node: dict, prefix: str, index: dict):
+    for key, value in node.items():
+        path = f"{prefix}{key}"
+        index[path] = value
+        if isinstance(value, dict):
+            _index(value, f"{path}.", index)
+
+
+class Config:
+    """
+    A yaml config which is parsed once. ${ENV} references are resolved when
+    it is loaded and every dotted key is indexed, so get is a single dict
+    lookup. With watch the file is reloaded when it changes.
+
+    Attributes:
+        path (str): path of the yaml file
+        data (dict): the resolved config
+    """
+
+    def __init__(self, path: str):
+        """
+        Load the config from path
+
+        Args:
+            path (str): path to a yaml file
+        """
+        self._logger = logging.getLogger(LOG_TAG)
+        self.path = path
+        self._watcher = None
+        self._stop = threading.Event()
+        self.reload()
+
+    def reload(self):
+        """
+        Parse the file again
+        """
+        self._modified = os.path.getmtime(self.path)
+        data = _resolve(import_yaml(self.path) or {})
+        index = {}
+        _index(data, "", index)
+        # swapped together so readers never see a half loaded config
+        self.data, self._index = data, index
+
+    def changed(self) -> bool:
+        """
+        Returns:
+            (bool): True if the file was modified since it was loaded
+        """
+        try:
+            return os.path.getmtime(self.path) != self._modified
+        except FileNotFoundError:
+            return False
+
+    def get(self, key: str, default=None):
+        """
+        Get a config parameter
+
+        Args:
+            key (str): key of config in yaml file with dot as delimiter.
+            default (Any|None): returned if the key is not in the config
+
+        Returns:
+            (Any): the value of the key if present else default value
+        """
+        return self._index.get(key, default)
+
+    def watch(self, callback: Callable[["Config"], None],
+              interval: float = 1.0):
+        """
+        Check the file for changes on a daemon thread, reload it and call
+        callback when it changed. Files which fail to parse are logged and
+        the previous config is kept.
+
+        Args:
+            callback (Callable): called with this config after a reload
+            interval (float): seconds between checks
+        """
+        if self._watcher is not None:
+            raise RuntimeError(f"{self.path} is already watched")
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch,
+                                         args=(callback, interval),
+                                         name="vsdkx-config",
+                                         daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        """
+        Stop the thread started by watch
+        """
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def _watch(self, callback: Callable[["Config"], None], interval: float):
+        while not self._stop.wait(interval):
+            if not self.changed():
+                continue
+            try:
+                self.reload()
+            except Exception as e:
+                self._logger.error(f"Keeping the previous config, "
+                                   f"reloading {self.path} failed: {e}")
+                continue
+            self._logger.info(f"Reloaded {self.path}")
+            try:
+                callback(self)
+            except Exception as e:
+                self._logger.error(f"Applying {self.path} failed: {e}")
+
+
+_configs = {}
+
+
+def _cached_config(path: str) -> Config:
+    config = _configs.get(path)
+    if config is None:
+        config = _configs[path] = Config(path)
+    elif config.changed():
+        config.reload()
+    return config
@@ -1,28 +1,186 @@
-import tensorflow as tf
+import contextlib
+import queue
+from typing import Callable, Iterator, List
+
 import numpy as np
 
 
-def load_tflite(tf_model_path):
+def _create_interpreter(tf_model_path, num_threads=None, xnnpack=True):
+    # TensorFlow takes seconds to import, so it is only imported by the
+    # drivers which actually need it
+    import tensorflow as tf
+
+    kwargs = {"model_path": tf_model_path}
+    if num_threads is not None:
+        kwargs["num_threads"] = num_threads
+    # no XNNPACK delegate is loaded here, the AUTO op resolver, which is
+    # also TensorFlow's default, applies it as one of its default delegates
+    # when the TensorFlow build includes it. xnnpack=False picks the
+    # resolver without default delegates, older TensorFlow versions without
+    # resolver types get their defaults either way
+    resolvers = getattr(tf.lite.experimental, "OpResolverType", None)
+    if resolvers is not None:
+        kwargs["experimental_op_resolver_type"] = \
+            resolvers.AUTO if xnnpack \
+            else resolvers.BUILTIN_WITHOUT_DEFAULT_DELEGATES
+    interpreter = tf.lite.Interpreter(**kwargs)
+    interpreter.allocate_tensors()
+    return interpreter
+
+
+def load_tflite(tf_model_path, num_threads=None, xnnpack=True):
     """
     Loads tflite model from a given path
 
     Args:
         tf_model_path (str): Path to the model
+        num_threads (int): threads of the interpreter, TensorFlow's default
+        when None
+        xnnpack (bool): keep the default delegates of the op resolver, which
+        include XNNPACK in TensorFlow builds that ship it, False disables them
 
     Returns:
         (interpreter, input_details, output_details):
         tf.lite.Interpreter, interpreter's input and output details
     """
     # Load the tflite model and allocate tensors
-    interpreter = tf.lite.Interpreter(model_path=tf_model_path)
-    interpreter.allocate_tensors()
+    interpreter = _create_interpreter(tf_model_path, num_threads, xnnpack)
     # Get input and output tensors.
     input_details = interpreter.get_input_details()
     output_details = interpreter.get_output_details()
     return interpreter, input_details, output_details
 
 
-def box_sanity_check(boxes, width, height):
+class TFLiteSlot:
+    """
+    An interpreter of TFLiteInterpreterPool with accessors of its input and
+    output tensors, which are created once. The arrays returned by input and
+    output are views into the interpreter's buffers, they are only valid
+    until the next invoke and must not be kept after the slot is checked in.
+    """
+
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        self.input_details = interpreter.get_input_details()
+        self.output_details = interpreter.get_output_details()
+        self._inputs: List[Callable[[], np.ndarray]] = [
+            interpreter.tensor(detail["index"])
+            for detail in self.input_details]
+        self._outputs: List[Callable[[], np.ndarray]] = [
+            interpreter.tensor(detail["index"])
+            for detail in self.output_details]
+
+    def input(self, index: int = 0) -> np.ndarray:
+        """
+        Args:
+            index (int): position of the input in input_details
+
+        Returns:
+            (np.ndarray): writeable view of the input tensor
+        """
+        return self._inputs[index]()
+
+    def set_input(self, array: np.ndarray, index: int = 0):
+        """
+        Copy array into the input tensor, casting it to the tensor's dtype
+
+        Args:
+            array (np.ndarray): the input data, broadcastable to the tensor
+            index (int): position of the input in input_details
+        """
+        np.copyto(self._inputs[index](), array, casting="unsafe")
+
+    def invoke(self):
+        self.interpreter.invoke()
+
+    def output(self, index: int = 0) -> np.ndarray:
+        """
+        Args:
+            index (int): position of the output in output_details
+
+        Returns:
+            (np.ndarray): view of the output tensor
+        """
+        return self._outputs[index]()
+
+
+class TFLiteInterpreterPool:
+    """
+    A fixed number of interpreters of one tflite model, allocated up front.
+    An interpreter can't be used by two threads at once, so each detect call
+    checks one out, which lets concurrent calls run on all the cores instead
+    of waiting for a single interpreter.
+
+    Usage:
+        with pool.interpreter() as slot:
+            slot.set_input(frame)
+            slot.invoke()
+            boxes = slot.output(0).copy()
+    """
+
+    def __init__(self, tf_model_path, size=1, num_threads=None,
+                 xnnpack=True):
+        """
+        Initialize with tf_model_path
+
+        Args:
+            tf_model_path (str): Path to the model
+            size (int): number of interpreters
+            num_threads (int): threads of each interpreter
+            xnnpack (bool): keep the default delegates of the op resolver,
+            which include XNNPACK in TensorFlow builds that ship it, False
+            disables them
+        """
+        if size <= 0:
+            raise ValueError("size must be positive")
+        self._slots = queue.Queue()
+        for _ in range(size):
+            self._slots.put(TFLiteSlot(_create_interpreter(tf_model_path,
+                                                           num_threads,
+                                                           xnnpack)))
+        self.size = size
+
+    def checkout(self, timeout=None) -> TFLiteSlot:
+        """
+        Take an interpreter, waiting until one is checked in when all of
+        them are in use
+
+        Args:
+            timeout (float): seconds to wait, forever when None
+
+        Returns:
+            (TFLiteSlot): the interpreter, pass it to checkin when done
+        """
+        try:
+            return self._slots.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No free interpreter after {timeout}s")
+
+    def checkin(self, slot: TFLiteSlot):
+        """
+        Give back an interpreter taken with checkout
+
+        Args:
+            slot (TFLiteSlot): the interpreter
+        """
+        self._slots.put(slot)
+
+    @contextlib.contextmanager
+    def interpreter(self, timeout=None) -> Iterator[TFLiteSlot]:
+        """
+        checkout an interpreter and checkin it when the block exits
+
+        Args:
+            timeout (float): seconds to wait for an interpreter
+        """
+        slot = self.checkout(timeout)
+        try:
+            yield slot
+        finally:
+            self.checkin(slot)
+
+
+def box_sanity_check(boxes, width, height, inplace=False):
     """
     Performing a sanity check on the detected bounding
     boxes, to prevent negative coordinates from being drawn
@@ -30,27 +188,34 @@ def box_sanity_check(boxes, width, height):
         boxes (np.array): ND array with the box x1y1x2y2 coordinates
         width (float): The width of the box
         height (float): The height of the box
+        inplace (bool): fix the boxes in place when they are already a
+        writeable (N, 4) int32 array instead of allocating a new one
 
     Returns:
-        (np.array): np.array with positive box coordinates
+        (np.array): (N, 4) int32 array with positive box coordinates
     """
-    sanitized_boxes = []
-
-    for box in boxes:
-        xmin = max(0, int(box[0]))
-        ymin = max(0, int(box[1]))
-        xmax = min(width, int(box[2]))
-        ymax = min(height, int(box[3]))
-
-        # Checking if ymin and xmin are equal or bigger than ymax and xmax
-        # If true, we set them to 10, a higher number than the minimum of
-        # xmin and ymin which are set to 0.
-
-        if xmin >= xmax:
-            xmax = min(xmin + 10, width)
-        if ymin >= ymax:
-            ymax = min(ymin + 10, height)
+    boxes = np.asarray(boxes)
+    if boxes.size == 0:
+        return np.empty((0, 4), dtype=np.int32)
+    if boxes.ndim != 2:
+        boxes = boxes.reshape(-1, 4)
+    if inplace and boxes.dtype == np.int32 and boxes.shape[1] == 4 \
+            and boxes.flags.writeable:
+        sanitized = boxes
+    else:
+        # casting truncates towards zero like int() does
+        sanitized = boxes[:, :4].astype(np.int32, order="C")
+    np.maximum(sanitized[:, :2], 0, out=sanitized[:, :2])
+    np.minimum(sanitized[:, 2], width, out=sanitized[:, 2])
+    np.minimum(sanitized[:, 3], height, out=sanitized[:, 3])
 
-        sanitized_boxes.append(np.array([xmin, ymin, xmax, ymax]))
+    # Checking if ymin and xmin are equal or bigger than ymax and xmax
+    # If true, we set them to 10, a higher number than the minimum of
+    # xmin and ymin which are set to 0.
+    for low, high, limit in ((0, 2, width), (1, 3, height)):
+        invalid = sanitized[:, low] >= sanitized[:, high]
+        if invalid.any():
+            sanitized[invalid, high] = np.minimum(
+                sanitized[invalid, low] + 10, limit)
 
-    return sanitized_boxes
+    return sanitized
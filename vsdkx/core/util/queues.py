@@ -0,0 +1,54 @@
+import queue
+from typing import Any, Callable
+
+_NOTHING = object()
+
+
+class DropOldestQueue(queue.Queue):
+    """
+    Bounded queue which never blocks the producer, when the queue is full the
+    oldest item is dropped to make room for the new one. This keeps the
+    latency of live sources low when the consumer falls behind.
+
+    Attributes:
+        dropped (int): number of items dropped so far
+    """
+
+    def __init__(self, maxsize: int,
+                 on_drop: Callable[[Any], None] = None):
+        """
+        Initialize with maxsize
+
+        Args:
+            maxsize (int): maximum number of items in the queue, must be
+            positive
+            on_drop (Callable): called with each dropped item, outside of
+            the queue's lock
+        """
+        if maxsize <= 0:
+            raise ValueError("DropOldestQueue needs a positive maxsize")
+        super().__init__(maxsize)
+        self.dropped = 0
+        self._on_drop = on_drop
+
+    def put(self, item, block=True, timeout=None):
+        """
+        Put item into the queue, dropping the oldest item if it is full.
+        block and timeout are accepted for compatibility with queue.Queue
+        and ignored.
+
+        Args:
+            item (Any): the item to put
+        """
+        dropped = _NOTHING
+        with self.not_full:
+            if self._qsize() >= self.maxsize:
+                dropped = self._get()
+                self.dropped += 1
+                # the dropped item counts as done for join()
+                self.unfinished_tasks -= 1
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+        if dropped is not _NOTHING and self._on_drop is not None:
+            self._on_drop(dropped)